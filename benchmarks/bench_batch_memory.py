@@ -0,0 +1,106 @@
+"""Measures peak Python memory of the batch pipeline for a large URL file.
+
+Each mode runs in its own interpreter with a no-op download so only the
+batching machinery is measured:
+
+    eager      read the whole file into a list and submit one future per URL (the old behaviour)
+    streaming  VideoDownloader.iter_batch_download over utils.iter_urls
+    jobstore   JobStore.enqueue_file + VideoDownloader.download_jobs
+
+Usage:
+    python benchmarks/bench_batch_memory.py [--count 1000000] [--modes eager,streaming,jobstore]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from moaz_downloader.downloader import VideoDownloader
+from moaz_downloader.engine import ENGINE_INPROCESS
+from moaz_downloader.jobs import JobStore
+from moaz_downloader.progress import DownloadResult
+from moaz_downloader.utils import iter_urls
+
+MODES = ("eager", "streaming", "jobstore")
+
+
+class NoopDownloader(VideoDownloader):
+    """Pretends every download succeeds instantly.
+
+    Built by the real constructor, so the batch loop finds everything it uses
+    (bandwidth governor, post-processing pool, retry policy); the in-process
+    engine skips the yt-dlp executable search.
+    """
+    def __init__(self):
+        super().__init__(engine=ENGINE_INPROCESS)
+
+    def download_result(self, url, output_dir, *args, **kwargs):
+        return DownloadResult(url, True)
+
+
+def run_mode(mode, url_file, workdir):
+    downloader = NoopDownloader()
+    options = dict(output_dir=workdir, quality="best", audio_only=False, playlist=False, cookie_file=None, parallel=8)
+    completed = 0
+    if mode == "eager":
+        with open(url_file) as f:
+            urls = [line.strip() for line in f if line.strip()]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = {executor.submit(downloader.download, url, workdir): url for url in urls}
+            for future in as_completed(futures):
+                future.result()
+                completed += 1
+    elif mode == "streaming":
+        with open(url_file) as f:
+            for _ in downloader.iter_batch_download(iter_urls(f), **options):
+                completed += 1
+    elif mode == "jobstore":
+        store = JobStore(os.path.join(workdir, "jobs.db"))
+        with open(url_file) as f:
+            store.enqueue_file(url_file, iter_urls(f))
+        for _ in downloader.download_jobs(store, **options):
+            completed += 1
+        store.close()
+    return completed
+
+
+def child(mode, url_file):
+    with tempfile.TemporaryDirectory() as workdir:
+        tracemalloc.start()
+        start = time.perf_counter()
+        completed = run_mode(mode, url_file, workdir)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    print(f"{mode:>10}: {completed} URLs, peak {peak / 2**20:8.1f} MiB, {elapsed:7.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000, help="Number of URLs in the generated batch file.")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated modes to run.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--url-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.url_file)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        url_file = os.path.join(workdir, "urls.txt")
+        with open(url_file, "w") as f:
+            for i in range(args.count):
+                f.write(f"https://example.com/watch?v={i:011d}\n")
+        for mode in args.modes.split(","):
+            subprocess.run([sys.executable, __file__, "--child", mode, "--url-file", url_file], check=True)
+
+
+if __name__ == "__main__":
+    main()
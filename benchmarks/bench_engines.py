@@ -0,0 +1,83 @@
+"""Compares per-URL overhead of the subprocess and in-process yt-dlp engines.
+
+Serves a small file from a local HTTP server and downloads it N times with each
+engine, so the numbers reflect engine startup/extraction cost rather than network speed.
+
+Usage:
+    python benchmarks/bench_engines.py [--count 20]
+"""
+import argparse
+import functools
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from moaz_downloader.downloader import VideoDownloader
+from moaz_downloader.engine import ENGINE_SUBPROCESS, ENGINE_INPROCESS, ytdlp_importable
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class _QuietServer(http.server.ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # yt-dlp's generic extractor closes its probe request early; the broken pipe is expected
+        pass
+
+
+def serve(directory):
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = _QuietServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(engine, base_url, count, workdir):
+    downloader = VideoDownloader(engine=engine)
+    timings = []
+    for i in range(count):
+        out_dir = os.path.join(workdir, f"{engine}-{i}")
+        start = time.perf_counter()
+        success, _ = downloader.download(f"{base_url}/clip.mp4", out_dir, file_template="%(id)s.%(ext)s")
+        timings.append(time.perf_counter() - start)
+        if not success:
+            print(f"  {engine}: download {i} failed")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=20, help="Number of URLs per engine.")
+    args = parser.parse_args()
+
+    if not ytdlp_importable():
+        print("yt_dlp is not installed; install it with 'pip install yt-dlp' to run this benchmark.")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        media_dir = os.path.join(workdir, "media")
+        os.makedirs(media_dir)
+        with open(os.path.join(media_dir, "clip.mp4"), "wb") as f:
+            f.write(os.urandom(256 * 1024))
+        server = serve(media_dir)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            for engine in (ENGINE_SUBPROCESS, ENGINE_INPROCESS):
+                timings = run(engine, base_url, args.count, workdir)
+                first, rest = timings[0], timings[1:] or timings
+                print(f"{engine:>10}: first URL {first * 1000:8.1f} ms, "
+                      f"mean of remaining {sum(rest) / len(rest) * 1000:8.1f} ms/URL, total {sum(timings):6.2f} s")
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""ffmpeg probing cost and what an up-front stream-copy decision saves.
+
+Probe: FFmpegManager.capabilities() with an empty tool cache (runs
+`-version`, `-encoders`, `-muxers`) and again from a fresh manager on the
+same cache, which must spawn no subprocess.
+
+Transcode vs. copy: ffmpeg generates an --seconds long MP3, then the same
+file is converted the two ways yt-dlp's audio extraction can: re-encoded to
+192k MP3 (what happens without a plan) and stream-copied (what the plan
+picks when the source is already MP3). Needs ffmpeg with libmp3lame.
+
+Usage:
+    python benchmarks/bench_ffmpeg.py [--ffmpeg PATH] [--seconds 300] [--runs 3]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from moaz_downloader.ffmpeg import FFmpegManager
+from moaz_downloader.tools import ToolCache
+
+
+def timed(cmd, runs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, capture_output=True, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ffmpeg", default=shutil.which("ffmpeg"), help="ffmpeg executable (default: from PATH).")
+    parser.add_argument("--seconds", type=int, default=300, help="Length of the generated audio.")
+    parser.add_argument("--runs", type=int, default=3, help="Best of this many conversions each way.")
+    args = parser.parse_args()
+    if not args.ffmpeg:
+        sys.exit("ffmpeg not found; pass --ffmpeg PATH")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cache_path = os.path.join(workdir, "tools.json")
+        for label in ("cold cache", "warm cache"):
+            tools = ToolCache(cache_path)
+            start = time.perf_counter()
+            capabilities = FFmpegManager(args.ffmpeg, tools).capabilities()
+            print(f"probe, {label}: {(time.perf_counter() - start) * 1000:7.1f} ms, {tools.runs} subprocess(es)")
+        if capabilities is None:
+            sys.exit(f"{args.ffmpeg} did not run")
+        print(f"  {capabilities.version}: {len(capabilities.encoders)} encoders, {len(capabilities.muxers)} muxers, "
+              f"mp3 encoder: {capabilities.can_encode('mp3')}")
+        if not capabilities.can_encode("mp3"):
+            sys.exit("this build has no MP3 encoder; nothing to compare")
+
+        source = os.path.join(workdir, "source.mp3")
+        subprocess.run([args.ffmpeg, "-v", "error", "-f", "lavfi", "-i", f"sine=frequency=440:duration={args.seconds}",
+                        "-c:a", "libmp3lame", "-b:a", "192k", source], check=True)
+        output = os.path.join(workdir, "out.mp3")
+        base = [args.ffmpeg, "-v", "error", "-y", "-i", source, "-vn"]
+        encode = timed(base + ["-c:a", "libmp3lame", "-b:a", "192k", output], args.runs)
+        copy = timed(base + ["-c:a", "copy", output], args.runs)
+        print(f"{args.seconds} s of MP3 -> MP3: re-encode {encode:.2f} s, stream copy {copy:.2f} s ({encode / copy:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
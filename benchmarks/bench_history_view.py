@@ -0,0 +1,97 @@
+"""Per-download cost of keeping the history and recent downloads tabs current, old vs. incremental.
+
+Fills a HistoryStore with --entries downloads, then finishes --downloads more.
+The old GUI re-queried the newest 100 entries, re-rendered them all and
+os.path.exists()-ed the newest 15 paths after every completion; the new one
+checks the entry against the view's filters and inserts one row, and the
+recent list needs no stat because the file was just written. Widget work is
+counted in rows (this runs without a display). Also times the first and a
+deep keyset page with the search, status and date filters the history tab
+offers.
+
+Usage:
+    python benchmarks/bench_history_view.py [--entries 100000] [--downloads 200]
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from moaz_downloader.history import HistoryStore, entry_matches
+from moaz_downloader.utils import PathCache
+
+
+def fill(store, count, workdir):
+    start = datetime.datetime(2024, 1, 1)
+    store.add_many({"time": (start + datetime.timedelta(minutes=i)).isoformat(), "url": f"https://example.com/watch?v={i:08d}",
+                    "status": "Failed" if i % 10 == 0 else "Success", "path": os.path.join(workdir, f"{i}.mp4")} for i in range(count))
+
+
+def old_refresh(store):
+    rows = [f"{entry.get('time', '')} | {entry.get('status', '')} | {entry.get('url', '')}" for entry in store.query(limit=100)]
+    recent = [entry["path"] for entry in store.query(limit=15) if entry.get("path") and os.path.exists(entry["path"])]
+    return len(rows) + len(recent), 15
+
+
+def new_refresh(cache, entry, filters):
+    rows = 1 if entry_matches(entry, **filters) else 0
+    cache.mark(entry["path"], True)
+    return rows + 1, 0
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000, help="History entries before the run.")
+    parser.add_argument("--downloads", type=int, default=200, help="Downloads finished during the run.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        store = HistoryStore(os.path.join(workdir, "history.db"))
+        fill(store, args.entries, workdir)
+        cache = PathCache()
+        filters = {"status": "Success"}
+        for name, refresh in (("old full re-render", lambda entry: old_refresh(store)),
+                              ("incremental", lambda entry: new_refresh(cache, entry, filters))):
+            rows = stats = 0
+            start = time.perf_counter()
+            for n in range(args.downloads):
+                entry = {"time": datetime.datetime.now().isoformat(), "url": f"https://example.com/new{n}", "status": "Success",
+                         "path": os.path.join(workdir, f"new{n}.mp4")}
+                store.add(entry)
+                done_rows, done_stats = refresh(entry)
+                rows += done_rows
+                stats += done_stats
+            elapsed = time.perf_counter() - start
+            print(f"{name:>20}: {elapsed / args.downloads * 1000:7.3f} ms per download on the main loop, "
+                  f"{rows / args.downloads:5.1f} rows and {stats / args.downloads:4.1f} stats per download")
+
+        since = (datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=args.entries // 2)).isoformat()
+        print(f"pages of 100 from {store.count()} entries:")
+        for label, query in (("newest", {}), ("status=Failed", {"status": "Failed"}), ("since midpoint", {"since": since}),
+                             ("search", {"search": "v=0000"})):
+            first_ms, page = timed(lambda: store.query(limit=100, **query))
+            before = (page[-1]["time"], page[-1]["id"]) if page else None
+            deep_ms = 0.0
+            for _ in range(20):
+                if before is None:
+                    break
+                ms, page = timed(lambda: store.query(limit=100, before=before, **query))
+                deep_ms = ms
+                before = (page[-1]["time"], page[-1]["id"]) if len(page) == 100 else None
+            print(f"  {label:>15}: first page {first_ms:6.2f} ms, 21st page {deep_ms:6.2f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Measures what keep-alive pooling saves on small metadata requests.
+
+A local HTTP/1.1 server answers JSON requests and sleeps --handshake-ms on
+every new connection, standing in for TCP + TLS setup to a remote host.
+The same requests are sent once with a one-off requests.get each (a fresh
+connection per request, the old update-check behaviour) and once through
+a pooled HTTPSession, then a few segmented downloads share the pool. The
+session's connection counters are printed after each pooled run.
+
+Usage:
+    python benchmarks/bench_http_pool.py [--requests 200] [--threads 4] [--handshake-ms 30]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import requests
+
+from bench_segmented import RangeHandler, _QuietServer
+from moaz_downloader.net import HTTPSession
+from moaz_downloader.segmented import SegmentedDownloader
+
+
+class MetadataHandler(RangeHandler):
+    """Serves JSON for /info paths and the range-capable file for everything else."""
+    handshake = 0.03
+    # Headers and body go out as separate writes; without this, delayed ACKs add ~40 ms to every keep-alive reply
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        time.sleep(self.handshake)
+        super().setup()
+
+    def do_GET(self):
+        if not self.path.startswith("/info"):
+            return super().do_GET()
+        body = json.dumps({"info": {"version": "2024.01.01", "path": self.path}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def run(get_json, base, count, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda i: get_json(f"{base}/info/{i}"), range(count)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Metadata requests per run.")
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent requesters.")
+    parser.add_argument("--handshake-ms", type=float, default=30, help="Simulated connection setup cost in ms.")
+    args = parser.parse_args()
+
+    MetadataHandler.handshake = args.handshake_ms / 1000
+    MetadataHandler.data = os.urandom(8 * 1024 * 1024)
+    MetadataHandler.rate = 256 * 1024 * 1024
+    server = _QuietServer(("127.0.0.1", 0), MetadataHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://localhost:{server.server_port}"
+
+    elapsed = run(lambda url: requests.get(url, timeout=30).json(), base, args.requests, args.threads)
+    print(f"connection per request: {elapsed:.2f} s  {args.requests} requests.get calls")
+
+    pooled = HTTPSession()
+    elapsed = run(pooled.get_json, base, args.requests, args.threads)
+    print(f"pooled session:         {elapsed:.2f} s  {pooled.stats()}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        downloader = SegmentedDownloader(connections=4, segment_size=1024 * 1024, session=pooled)
+        before = pooled.stats()
+        start = time.perf_counter()
+        for i in range(5):
+            downloader.download(f"{base}/file{i}.mp4", workdir)
+        after = pooled.stats()
+        print(f"5 segmented downloads:  {time.perf_counter() - start:.2f} s  "
+              f"{after.requests - before.requests} requests, {after.connections_opened - before.connections_opened} new connections")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Frame cost of the GUI job table with hundreds of active downloads.
+
+Creates --rows rows in a JobTable and, every 33 ms for --seconds, feeds each
+row a fresh progress event (new bytes, speed, ETA), then calls refresh() and
+lets Tk redraw, as DownloaderGUI's frame tick does. Reports the average and
+slowest frame and the Treeview item() calls made, next to the calls a
+redraw-every-row-every-frame table would make. Needs a display.
+
+Usage:
+    python benchmarks/bench_job_table.py [--rows 500] [--seconds 5] [--row-interval 0.25]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from moaz_downloader.progress import ProgressEvent, PHASE_DOWNLOADING
+
+FRAME = 0.033
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500, help="Active downloads in the table.")
+    parser.add_argument("--seconds", type=float, default=5, help="How long to run.")
+    parser.add_argument("--row-interval", type=float, default=0.25, help="JobTable.row_interval: minimum seconds between progress redraws of a row.")
+    args = parser.parse_args()
+
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        sys.exit(f"needs a display: {e}")
+    from moaz_downloader.widgets import JobTable
+
+    table = JobTable(root, {}, height=20, row_interval=args.row_interval)
+    table.frame.pack(fill="both", expand=True)
+    jobs = [f"job{i}" for i in range(args.rows)]
+    for job in jobs:
+        table.add(job, f"https://example.com/watch?v={job}", "Downloading")
+    root.update()
+
+    start = time.perf_counter()
+    frames, spent, slowest = 0, 0.0, 0.0
+    while time.perf_counter() - start < args.seconds:
+        frame_start = time.perf_counter()
+        elapsed = frame_start - start
+        for i, job in enumerate(jobs):
+            done = int((elapsed / args.seconds) * (1 << 30)) + i * 4096
+            table.show_event(job, ProgressEvent(PHASE_DOWNLOADING, downloaded_bytes=done, total_bytes=1 << 30,
+                                                speed=4e6 + (frames * 7919 + i) % 1e6, eta=(1 << 30) - done), {})
+        table.refresh()
+        root.update()
+        cost = time.perf_counter() - frame_start
+        spent += cost
+        slowest = max(slowest, cost)
+        frames += 1
+        time.sleep(max(0.0, FRAME - cost))
+    root.destroy()
+
+    print(f"{args.rows} rows, {frames} frames: {spent / frames * 1000:.1f} ms average, {slowest * 1000:.1f} ms slowest")
+    print(f"  item() calls: {table.updates} ({table.updates / args.seconds:.0f}/s); "
+          f"every row every frame would be {args.rows * frames} ({args.rows * frames / args.seconds:.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
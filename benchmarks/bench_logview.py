@@ -0,0 +1,116 @@
+"""GUI log throughput: per-line Text inserts vs. a LogBuffer flushed once per frame.
+
+Producer threads append --rate lines/second in total for --seconds while the
+consumer drains the buffer every 33 ms, as DownloaderGUI does. Reported:
+append cost per line, the slowest frame, lines shown vs. skipped, and the
+spill file size. With a display available, the frames also go into a real
+Text widget through LogView, and the old way (insert + see per line) is
+timed on the same input for comparison.
+
+Usage:
+    python benchmarks/bench_logview.py [--rate 10000] [--seconds 5] [--threads 4] [--max-lines 5000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from moaz_downloader.logbuffer import LogBuffer
+
+FRAME = 0.033
+LINE = "[download]  42.0% of 512.00MiB at 10.00MiB/s ETA 00:30 (frag 120/300) job {thread}-{n}"
+
+
+def make_text():
+    """Returns (root, Text widget), or (None, None) without a display."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return None, None
+    text = tk.Text(root, height=8, width=80, wrap=tk.WORD)
+    text.pack()
+    root.update()
+    return root, text
+
+
+def produce(log, rate, seconds, thread):
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    n = 0
+    while True:
+        due = start + n * interval
+        now = time.perf_counter()
+        if now - start >= seconds:
+            return
+        if due > now:
+            time.sleep(due - now)
+        log.append(LINE.format(thread=thread, n=n))
+        n += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, default=10000, help="Total lines per second across all producers.")
+    parser.add_argument("--seconds", type=float, default=5, help="How long the producers run.")
+    parser.add_argument("--threads", type=int, default=4, help="Producer threads (parallel downloads).")
+    parser.add_argument("--max-lines", type=int, default=5000, help="Lines kept in the buffer and the widget.")
+    args = parser.parse_args()
+
+    root, text = make_text()
+    view = None
+    with tempfile.TemporaryDirectory() as workdir:
+        spill = os.path.join(workdir, "full.log")
+        log = LogBuffer(args.max_lines, spill)
+        if text is not None:
+            from moaz_downloader.widgets import LogView
+            view = LogView(text, log)
+
+        producers = [threading.Thread(target=produce, args=(log, args.rate / args.threads, args.seconds, i)) for i in range(args.threads)]
+        start = time.perf_counter()
+        for thread in producers:
+            thread.start()
+        frames, slowest, shown, skipped = 0, 0.0, 0, 0
+        while any(thread.is_alive() for thread in producers) or frames == 0:
+            time.sleep(FRAME)
+            frame_start = time.perf_counter()
+            if view is not None:
+                view.flush()
+                root.update_idletasks()
+            else:
+                lines, dropped = log.drain()
+                shown += len(lines)
+                skipped += dropped
+            slowest = max(slowest, time.perf_counter() - frame_start)
+            frames += 1
+        elapsed = time.perf_counter() - start
+        log.close()
+        print(f"{log.total} lines in {elapsed:.1f} s ({log.total / elapsed:.0f}/s), {frames} frames, slowest frame {slowest * 1000:.1f} ms")
+        if view is None:
+            print(f"  shown {shown}, skipped {skipped}; no display, widget not measured")
+        else:
+            print(f"  widget holds {int(text.index('end-1c').split('.')[0]) - 1} lines")
+        print(f"  spill file: {os.path.getsize(spill) / 1024 / 1024:.1f} MiB")
+
+    if text is not None:
+        import tkinter as tk
+        text.delete("1.0", tk.END)
+        count = min(log.total, args.rate)
+        start = time.perf_counter()
+        for n in range(count):
+            text.insert(tk.END, LINE.format(thread=0, n=n) + "\n")
+            text.see(tk.END)
+        root.update_idletasks()
+        per_line = time.perf_counter() - start
+        print(f"old per-line insert + see: {count} lines took {per_line:.2f} s of main-loop time "
+              f"({per_line / count * 1e6:.0f} µs/line, unbounded widget)")
+        root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Per-file plugin overhead: one interpreter per plugin per file vs. cached in-process plugins.
+
+Creates --files empty "downloaded" files and a plugin directory with two
+cheap plugins, then post-processes every file three ways:
+
+    legacy      os.listdir + `python plugin.py <file>` per plugin per file (the old run_plugin_dir)
+    isolated    PluginManager(isolate=True): still one interpreter per plugin per file
+    in-process  PluginManager: each plugin imported once, process() called directly
+
+Usage:
+    python benchmarks/bench_plugins.py [--files 1000] [--subprocess-files 1000]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from moaz_downloader.plugins import PluginManager
+
+PLUGINS = {
+    "tag_size.py": (
+        "import os, sys\n"
+        "def process(filepath, metadata):\n"
+        "    with open(filepath + '.size', 'w') as f:\n"
+        "        f.write(str(os.path.getsize(filepath)))\n"
+        "if __name__ == '__main__':\n"
+        "    process(sys.argv[1], {})\n"
+    ),
+    "touch_done.py": (
+        "import sys\n"
+        "def process(filepath, metadata):\n"
+        "    open(filepath + '.done', 'w').close()\n"
+        "if __name__ == '__main__':\n"
+        "    process(sys.argv[1], {})\n"
+    ),
+}
+
+
+def legacy_run(plugin_dir, filepath):
+    """The pre-plugin-API run_plugin_dir."""
+    for fname in os.listdir(plugin_dir):
+        if fname.endswith('.py'):
+            subprocess.run([sys.executable, os.path.join(plugin_dir, fname), filepath], capture_output=True, text=True)
+
+
+def measure(label, files, run):
+    start = time.perf_counter()
+    for path in files:
+        run(path)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<11} {len(files):>5} files  {elapsed:8.2f} s  {elapsed / len(files) * 1000:8.2f} ms/file")
+    return elapsed / len(files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=1000, help="Files to post-process in-process.")
+    parser.add_argument("--subprocess-files", type=int, default=1000, help="Files for the legacy and isolated runs (they take far longer).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        plugin_dir = os.path.join(workdir, "plugins")
+        os.makedirs(plugin_dir)
+        for name, source in PLUGINS.items():
+            with open(os.path.join(plugin_dir, name), "w") as f:
+                f.write(source)
+        files = []
+        for i in range(max(args.files, args.subprocess_files)):
+            path = os.path.join(workdir, f"video{i}.mp4")
+            with open(path, "wb") as f:
+                f.write(b"\0" * 1024)
+            files.append(path)
+
+        legacy = measure("legacy", files[:args.subprocess_files], lambda path: legacy_run(plugin_dir, path))
+        isolated = PluginManager(plugin_dir, isolate=True)
+        measure("isolated", files[:args.subprocess_files], lambda path: isolated.run(path, {"url": ""}))
+        manager = PluginManager(plugin_dir)
+        in_process = measure("in-process", files[:args.files], lambda path: manager.run(path, {"url": ""}))
+
+        print(f"per-file overhead: {legacy / in_process:.0f}x lower in-process")
+        for name, stats in sorted(manager.stats().items()):
+            print(f"  {name}: {stats['calls']} calls, {stats['mean_ms']:.3f} ms average")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""UI work per second: one main-loop callback per progress event vs. a ProgressPump drained at 30 Hz.
+
+--jobs worker threads each post --rate progress events per second for
+--seconds. A stand-in UI thread drains the pump every 33 ms and "renders"
+each drained event (formats it, as the progress table and log do). The old
+scheme scheduled one root.after(0, ...) per event, so its UI call count is
+the number of events posted; the pump's is the number it hands out.
+
+Usage:
+    python benchmarks/bench_progress_pump.py [--jobs 50] [--rate 200] [--seconds 3]
+"""
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from moaz_downloader.progress import ProgressEvent, ProgressPump, PHASE_DOWNLOADING
+
+FRAME = 0.033
+
+
+def worker(pump, job, rate, seconds):
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    n = 0
+    while time.perf_counter() - start < seconds:
+        pump.post(job, ProgressEvent(PHASE_DOWNLOADING, downloaded_bytes=n * 65536, total_bytes=1 << 30, speed=5e6, eta=100, url=job))
+        n += 1
+        due = start + n * interval
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=50, help="Concurrent downloads posting progress.")
+    parser.add_argument("--rate", type=float, default=200, help="Progress events per second per job.")
+    parser.add_argument("--seconds", type=float, default=3, help="How long the workers run.")
+    args = parser.parse_args()
+
+    pump = ProgressPump()
+    workers = [threading.Thread(target=worker, args=(pump, f"job{i}", args.rate, args.seconds)) for i in range(args.jobs)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    frames, rendered, ui_time, slowest = 0, 0, 0.0, 0.0
+    while any(thread.is_alive() for thread in workers) or frames == 0:
+        time.sleep(FRAME)
+        frame_start = time.perf_counter()
+        for event in pump.drain().values():
+            str(event)
+            rendered += 1
+        spent = time.perf_counter() - frame_start
+        ui_time += spent
+        slowest = max(slowest, spent)
+        frames += 1
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.jobs} jobs x {args.rate:.0f} events/s for {elapsed:.1f} s: {pump.posted} events posted")
+    print(f"  per-event callbacks (old): {pump.posted / elapsed:8.0f} UI calls/s")
+    print(f"  pump at {1 / FRAME:.0f} Hz:          {rendered / elapsed:8.0f} UI calls/s  ({pump.coalesced} coalesced, "
+          f"{frames} frames, {ui_time / frames * 1000:.2f} ms average, {slowest * 1000:.2f} ms slowest)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Compares single-connection and segmented downloads of a direct media link.
+
+Serves a generated file from a local HTTP/1.1 server that supports Range
+requests and throttles every connection to --per-connection MiB/s, which is
+the situation segmenting is meant for. Each run is checked byte-for-byte
+against the served file.
+
+Usage:
+    python benchmarks/bench_segmented.py [--size-mb 64] [--per-connection 8] [--connections 1,4,8]
+"""
+import argparse
+import hashlib
+import http.server
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from moaz_downloader.segmented import SegmentedDownloader
+
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    """Serves one in-memory file with Range support and a per-connection speed limit."""
+    protocol_version = "HTTP/1.1"
+    data = b""
+    rate = 8 * 1024 * 1024
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        size = len(self.data)
+        match = _RANGE.match(self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else size - 1, size - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            start, end = 0, size - 1
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        chunk = 64 * 1024
+        began = time.monotonic()
+        sent = 0
+        for offset in range(start, end + 1, chunk):
+            piece = self.data[offset:min(offset + chunk, end + 1)]
+            self.wfile.write(piece)
+            sent += len(piece)
+            ahead = sent / self.rate - (time.monotonic() - began)
+            if ahead > 0:
+                time.sleep(ahead)
+
+
+class _QuietServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=64, help="Size of the served file in MiB.")
+    parser.add_argument("--per-connection", type=float, default=8, help="Server speed limit per connection in MiB/s.")
+    parser.add_argument("--connections", default="1,4,8", help="Comma-separated connection counts to compare.")
+    args = parser.parse_args()
+
+    RangeHandler.data = os.urandom(args.size_mb * 1024 * 1024)
+    RangeHandler.rate = args.per_connection * 1024 * 1024
+    expected = hashlib.sha256(RangeHandler.data).hexdigest()
+    server = _QuietServer(("127.0.0.1", 0), RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/video.mp4"
+
+    try:
+        for connections in (int(n) for n in args.connections.split(",")):
+            with tempfile.TemporaryDirectory() as workdir:
+                start = time.perf_counter()
+                path = SegmentedDownloader(connections=connections).download(url, workdir).path
+                elapsed = time.perf_counter() - start
+                with open(path, "rb") as f:
+                    ok = hashlib.sha256(f.read()).hexdigest() == expected
+            print(f"{connections:>3} connection(s): {elapsed:6.2f} s, {args.size_mb / elapsed:7.1f} MiB/s, content {'OK' if ok else 'MISMATCH'}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Startup cost of the entry points and of VideoDownloader's tool discovery.
+
+Import profile: each entry point is started under `python -X importtime`
+and the report is summarised: total import time, the slowest top-level
+imports (cumulative), and whether any GUI module (tkinter, ttkthemes, plyer,
+moaz_downloader.gui) or asyncio was loaded. The CLI entries must load none.
+
+Tool cache: each run starts a fresh interpreter that constructs a VideoDownloader
+(subprocess engine, so yt-dlp has to be located) and calls
+check_dependencies(), the way the GUI does on launch. The first run uses an
+empty tool cache; later runs reuse it. Reports wall time per run and how
+many --version subprocesses were spawned.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 10]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from moaz_downloader.downloader import VideoDownloader
+from moaz_downloader.tools import ToolCache
+tools = ToolCache(sys.argv[2])
+downloader = VideoDownloader(tools=tools)
+status = downloader.check_dependencies()
+print(json.dumps({"seconds": time.perf_counter() - start, "spawned": tools.runs, "status": status}))
+"""
+
+
+# Entry point label -> interpreter arguments; every one exits right after startup
+ENTRY_POINTS = {
+    "cli --help": ["-m", "moaz_downloader", "--cli", "--help"],
+    "import cli": ["-c", "import moaz_downloader.cli"],
+    "import downloader": ["-c", "import moaz_downloader.downloader"],
+}
+UNWANTED = ("tkinter", "ttkthemes", "plyer", "moaz_downloader.gui", "asyncio")
+
+
+def import_profile(args):
+    """Runs the interpreter under -X importtime and returns [(module, depth, cumulative µs)] in import order."""
+    result = subprocess.run([sys.executable, "-X", "importtime"] + args, capture_output=True, text=True, cwd=ROOT)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), (len(name) - len(name.lstrip())) // 2, int(cumulative)))
+    return rows
+
+
+def report_imports(top):
+    for label, args in ENTRY_POINTS.items():
+        rows = import_profile(args)
+        total = sum(cumulative for _, depth, cumulative in rows if depth == 0)
+        unwanted = sorted({name for name, _, _ in rows if name.split(".")[0] in UNWANTED or name in UNWANTED})
+        print(f"{label}: {len(rows)} modules, {total / 1000:.1f} ms importing"
+              f"{'  loads ' + ', '.join(unwanted) if unwanted else ''}")
+        for name, depth, cumulative in sorted(rows, key=lambda row: -row[2])[:top]:
+            print(f"    {cumulative / 1000:7.1f} ms  {'  ' * depth}{name}")
+
+
+def run_child(cache_path):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", CHILD, str(ROOT), cache_path], capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["wall"] = time.perf_counter() - start
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Warm runs after the cold one.")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports listed per entry point.")
+    args = parser.parse_args()
+
+    report_imports(args.top)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cache_path = os.path.join(workdir, "tools.json")
+        cold = run_child(cache_path)
+        print(f"cold cache: {cold['wall'] * 1000:7.1f} ms wall, {cold['seconds'] * 1000:7.1f} ms in-process, "
+              f"{cold['spawned']} subprocess(es)  {cold['status']}")
+        warm = [run_child(cache_path) for _ in range(args.runs)]
+        best = min(warm, key=lambda report: report["wall"])
+        print(f"warm cache: {best['wall'] * 1000:7.1f} ms wall, {best['seconds'] * 1000:7.1f} ms in-process, "
+              f"{max(report['spawned'] for report in warm)} subprocess(es)  (best of {args.runs})")
+
+
+if __name__ == "__main__":
+    main()
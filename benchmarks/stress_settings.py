@@ -0,0 +1,98 @@
+"""Stress test for settings and history persistence under concurrent writers.
+
+Many threads call Settings.add_history and Settings.add_recent_url at once
+while another thread keeps re-reading the settings file. Checks that:
+
+    - every history entry is stored exactly once
+    - the settings file is valid, complete JSON at every moment it is read
+    - bursts of mutations are coalesced into far fewer file writes
+
+Usage:
+    python benchmarks/stress_settings.py [--threads 16] [--calls 500]
+"""
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from moaz_downloader.settings import Settings
+
+
+class CountingSettings(Settings):
+    """Counts how often the settings file is actually written."""
+    writes = 0
+
+    def _write(self, content):
+        CountingSettings.writes += 1
+        super()._write(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16, help="Number of writer threads.")
+    parser.add_argument("--calls", type=int, default=500, help="add_history calls per thread.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / "settings.json"
+        settings = CountingSettings(path=path, save_delay=0.05)
+        settings.save(immediate=True)
+        stop = threading.Event()
+        bad_reads = []
+        reads = 0
+
+        def reader():
+            nonlocal reads
+            while not stop.is_set():
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        json.load(f)
+                    reads += 1
+                except ValueError as e:
+                    bad_reads.append(str(e))
+
+        def writer(index):
+            for i in range(args.calls):
+                url = f"https://example.com/{index}/{i}"
+                settings.add_history({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "url": url, "status": "Success", "path": None})
+                if i % 10 == 0:
+                    settings.add_recent_url(url)
+
+        reader_thread = threading.Thread(target=reader)
+        reader_thread.start()
+        start = time.perf_counter()
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        settings.flush()
+        settings.history.flush()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        reader_thread.join()
+
+        expected = args.threads * args.calls
+        stored = settings.history.count()
+        mutations = args.threads * ((args.calls + 9) // 10)
+        with open(path, encoding="utf-8") as f:
+            recent = json.load(f)["recent_urls"]
+        settings.history.close()
+
+    print(f"{expected} add_history calls from {args.threads} threads in {elapsed:.2f} s")
+    print(f"history entries stored: {stored} (expected {expected})")
+    print(f"settings file writes: {CountingSettings.writes} for {mutations} recent-URL changes")
+    print(f"concurrent reads: {reads} valid, {len(bad_reads)} invalid; recent_urls kept: {len(recent)}")
+    if stored != expected or bad_reads or len(recent) != 10:
+        print("FAILED")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import threading
+from itertools import islice
+from pathlib import Path
+from typing import Optional, Iterable, Union
+
+from .info_cache import normalize_url
+
+DEFAULT_ARCHIVE_PATH = Path.home() / ".video_downloader_archive.db"
+# Text archive written by earlier versions via yt-dlp's --download-archive
+LEGACY_ARCHIVE_PATH = Path.home() / "moaz_download_archive.txt"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive (
+    entry TEXT PRIMARY KEY
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS archive_urls (
+    url TEXT PRIMARY KEY
+) WITHOUT ROWID;
+"""
+
+
+class DownloadArchive:
+    """Index of already-downloaded videos, checked before yt-dlp is started.
+
+    Entries use yt-dlp's archive format ("<extractor> <id>"), so the object can
+    be handed to an in-process YoutubeDL as its `download_archive` (it behaves
+    like the set yt-dlp would load from a text file) and converted to and from
+    yt-dlp's text archive. Finished URLs are indexed too, which lets URLs whose
+    video ID can't be derived without extraction be skipped as well.
+    """
+    def __init__(self, path: Union[str, Path] = DEFAULT_ARCHIVE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def open_default(cls) -> "DownloadArchive":
+        """Opens the user's archive, importing the legacy text archive the first time."""
+        created = not DEFAULT_ARCHIVE_PATH.exists()
+        archive = cls(DEFAULT_ARCHIVE_PATH)
+        if created and LEGACY_ARCHIVE_PATH.exists():
+            archive.import_text(LEGACY_ARCHIVE_PATH)
+        return archive
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __repr__(self) -> str:
+        # Part of the in-process engine's YoutubeDL cache key, so it must be stable
+        return f"DownloadArchive({str(self.path)!r})"
+
+    def __bool__(self) -> bool:
+        # yt-dlp skips archive lookups entirely when its archive is falsy
+        return True
+
+    def __contains__(self, entry: object) -> bool:
+        if not isinstance(entry, str):
+            return False
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM archive WHERE entry = ?", (entry.strip(),)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM archive").fetchone()[0]
+
+    def add(self, entry: str):
+        """Records an archive entry; yt-dlp calls this after each finished video."""
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO archive (entry) VALUES (?)", (entry.strip(),))
+            self._conn.commit()
+
+    def has_entries(self) -> bool:
+        """Whether any archive entry (as opposed to a bare URL) has been recorded."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM archive LIMIT 1").fetchone() is not None
+
+    def contains_url(self, url: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM archive_urls WHERE url = ?", (normalize_url(url),)).fetchone() is not None
+
+    def add_url(self, url: str, entry: Optional[str] = None):
+        """Records a finished URL, plus its archive entry if known."""
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO archive_urls (url) VALUES (?)", (normalize_url(url),))
+            if entry:
+                self._conn.execute("INSERT OR IGNORE INTO archive (entry) VALUES (?)", (entry.strip(),))
+            self._conn.commit()
+
+    def add_many(self, entries: Iterable[str], chunk_size: int = 10000) -> int:
+        """Adds entries in chunked transactions. Returns the number that were new."""
+        added = 0
+        iterator = (entry.strip() for entry in entries)
+        while True:
+            chunk = [(entry,) for entry in islice(iterator, chunk_size) if entry]
+            if not chunk:
+                return added
+            with self._lock:
+                before = self._conn.total_changes
+                self._conn.executemany("INSERT OR IGNORE INTO archive (entry) VALUES (?)", chunk)
+                self._conn.commit()
+                added += self._conn.total_changes - before
+
+    def import_text(self, path: Union[str, Path]) -> int:
+        """Imports a yt-dlp --download-archive file. Returns the number of new entries."""
+        with open(path, "r", encoding="utf-8") as f:
+            return self.add_many(line for line in f if line.strip())
+
+    def export_text(self, path: Union[str, Path]) -> int:
+        """Writes all entries as a yt-dlp --download-archive file. Returns the number written."""
+        count = 0
+        tmp = f"{path}.tmp"
+        with self._lock:
+            cursor = self._conn.execute("SELECT entry FROM archive ORDER BY entry")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for (entry,) in cursor:
+                    f.write(entry + "\n")
+                    count += 1
+        os.replace(tmp, path)
+        return count
@@ -0,0 +1,232 @@
+import asyncio
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Callable, Union, Iterable, AsyncIterable, AsyncIterator, TYPE_CHECKING
+
+from .engine import ENGINE_INPROCESS
+from .progress import ProgressEvent, DownloadResult
+from .retry import FAILURE_CANCELLED, FAILURE_NETWORK, classify_failure
+
+if TYPE_CHECKING:
+    from .downloader import VideoDownloader
+
+_DONE = object()
+# Progress JSON lines can exceed asyncio's default 64 KiB line limit on long titles/paths
+_LINE_LIMIT = 1024 * 1024
+
+
+class AsyncDownloader:
+    """Runs VideoDownloader jobs on an asyncio event loop.
+
+    The subprocess engine is driven with asyncio.create_subprocess_exec, so one
+    loop can supervise hundreds of yt-dlp processes without a thread per download.
+    In-process downloads run on a private thread pool of the same size.
+    """
+    def __init__(self, downloader: "VideoDownloader", concurrency: int = 32, timeout: Optional[float] = None):
+        self.downloader = downloader
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def download(self, url: str, output_dir: str, quality: str = "best", audio_only: bool = False, playlist: bool = False, cookie_file: Optional[str] = None, progress_callback: Optional[Callable[[str], None]] = None, progress_hook: Optional[Callable[[ProgressEvent], Optional[bool]]] = None, timeout: Optional[float] = None, postprocess: bool = True) -> DownloadResult:
+        """Downloads one URL. Cancelling the awaiting task stops the download; a timeout counts as a failure.
+
+        The timeout covers the download only; post-processing (skipped with postprocess=False) runs afterwards.
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        # Segmented direct-link downloads run on threads just like the in-process engine
+        if self.downloader.engine == ENGINE_INPROCESS or self.downloader._use_segmented(url, audio_only, playlist, None):
+            coro = self._download_inprocess(url, output_dir, quality, audio_only, playlist, cookie_file, progress_callback, progress_hook)
+        else:
+            coro = self._download_subprocess(url, output_dir, quality, audio_only, playlist, cookie_file, progress_callback, progress_hook)
+        try:
+            result = await asyncio.wait_for(coro, timeout)
+        except asyncio.TimeoutError:
+            if progress_callback:
+                progress_callback(f"Timed out after {timeout} s")
+            return DownloadResult(url, False, failure=FAILURE_NETWORK, error=f"Timed out after {timeout} s")
+        if postprocess:
+            await self._postprocess(result)
+        return result
+
+    async def _download_subprocess(self, url, output_dir, quality, audio_only, playlist, cookie_file, progress_callback, progress_hook) -> DownloadResult:
+        downloader = self.downloader
+        # The first lookup may load yt-dlp's extractor registry, so keep it off the event loop
+        archived, archive_entry = await asyncio.get_running_loop().run_in_executor(self._get_executor(), downloader._check_archive, url, playlist)
+        if archived:
+            if progress_callback:
+                progress_callback(f"[download] {url} has already been recorded in the archive")
+            return DownloadResult(url, True, skipped=True)
+        os.makedirs(output_dir, exist_ok=True)
+        variant = downloader._info_variant(cookie_file)
+        info_file = None if playlist else downloader.info_cache.path_for(url, variant)
+        # Like the sync subprocess path, yt-dlp gets a fixed share of the aggregate limit at spawn time
+        # Probing ffmpeg (once per downloader) and reading cached info for the MP3 plan block, so they stay off the event loop too
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._get_executor(), downloader.ffmpeg.version)
+        audio_plan = None
+        if audio_only:
+            audio_plan = await loop.run_in_executor(self._get_executor(), downloader._audio_plan, url, info_file, progress_callback or (lambda line: None))
+        with downloader.governor.acquire(adjustable=False) as lease:
+            cmd = downloader.build_command(url, output_dir, quality=quality, audio_only=audio_only, playlist=playlist, cookie_file=cookie_file,
+                                           info_file=info_file, bandwidth=downloader._rate_arg(lease), audio_plan=audio_plan)
+            return await self._run_subprocess(url, cmd, info_file, variant, archive_entry, playlist, progress_callback, progress_hook)
+
+    async def _run_subprocess(self, url, cmd, info_file, variant, archive_entry, playlist, progress_callback, progress_hook) -> DownloadResult:
+        downloader = self.downloader
+        on_event = downloader._event_handler(url, progress_callback, progress_hook)
+        on_line, errors = downloader._capture_errors(progress_callback)
+        on_line(f"yt-dlp command: {' '.join(cmd)}")
+
+        try:
+            process = await asyncio.create_subprocess_exec(*cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, limit=_LINE_LIMIT, creationflags=downloader.CREATE_NO_WINDOW)
+        except OSError:
+            cmd = await asyncio.get_running_loop().run_in_executor(self._get_executor(), downloader._rediscover_ytdlp, cmd)
+            process = await asyncio.create_subprocess_exec(*cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, limit=_LINE_LIMIT, creationflags=downloader.CREATE_NO_WINDOW)
+        last_file = None
+        try:
+            while True:
+                raw = await process.stdout.readline()
+                if not raw:
+                    break
+                keep_going, filepath = downloader._handle_output_line(raw.decode('utf-8', 'replace'), on_line, on_event)
+                last_file = filepath or last_file
+                if keep_going is False:
+                    return DownloadResult(url, False, last_file, FAILURE_CANCELLED)
+            await process.wait()
+        finally:
+            # Runs on cancellation, timeout and callback-requested stops alike
+            if process.returncode is None:
+                process.terminate()
+                try:
+                    await asyncio.wait_for(process.wait(), 5)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+
+        if process.returncode != 0:
+            if info_file:
+                downloader.info_cache.discard(url, variant)
+            return downloader._failure_result(url, last_file, errors)
+        downloader._record_archive(url, archive_entry, playlist)
+        return DownloadResult(url, True, last_file, info_file=info_file)
+
+    async def _postprocess(self, result: DownloadResult):
+        """Runs the post-process script and plugins on the downloader's post-processing pool, off the download workers."""
+        if self.downloader._needs_postprocess(result):
+            metadata = self.downloader._plugin_metadata(result.url, result.path, result.info_file)
+            await asyncio.wrap_future(self.downloader.submit_postprocess(result.path, metadata))
+
+    async def _download_inprocess(self, url, output_dir, quality, audio_only, playlist, cookie_file, progress_callback, progress_hook) -> DownloadResult:
+        cancelled = threading.Event()
+
+        def hook(event: ProgressEvent):
+            if cancelled.is_set():
+                return False
+            if progress_hook:
+                return progress_hook(event)
+            if progress_callback:
+                return progress_callback(str(event))
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), lambda: self.downloader.download_result(
+            url, output_dir, quality, audio_only, playlist, cookie_file, progress_callback, progress_hook=hook, postprocess=False))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The worker thread can't be interrupted directly; the hook stops yt-dlp at its next progress update
+            cancelled.set()
+            raise
+
+    async def iter_batch_download(self, urls: Union[Iterable[str], AsyncIterable[str]], output_dir: str, quality: str = "best", audio_only: bool = False, playlist: bool = False, cookie_file: Optional[str] = None, progress_callback: Optional[Callable[[str], None]] = None, progress_hook: Optional[Callable[[ProgressEvent], Optional[bool]]] = None, timeout: Optional[float] = None) -> AsyncIterator[DownloadResult]:
+        """Downloads URLs with at most `concurrency` in flight, yielding a DownloadResult as each finishes.
+
+        Both the URL source and the result stream are bounded queues, so a slow
+        consumer pauses the workers and the workers pause the URL source.
+        Closing the iterator early cancels every running download. Post-processing
+        runs as a separate task, so a worker takes the next URL as soon as its
+        download is done; at most postprocess_workers * 4 files wait for it.
+        """
+        self.downloader.governor.expect(self.concurrency)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        postprocess_slots = asyncio.Semaphore(self.downloader.postprocess_workers * 4)
+        postprocessing = set()
+
+        async def finish_workers():
+            for _ in range(self.concurrency):
+                await queue.put(_DONE)
+
+        async def produce():
+            try:
+                if hasattr(urls, '__aiter__'):
+                    async for url in urls:
+                        await queue.put(url)
+                else:
+                    for url in urls:
+                        await queue.put(url)
+            except Exception:
+                # Let the workers drain and stop; the error is re-raised once results are consumed
+                await finish_workers()
+                raise
+            await finish_workers()
+
+        async def finish(result: DownloadResult):
+            try:
+                await self._postprocess(result)
+            except Exception as e:
+                self.downloader.logger.error(f"Post-processing {result.path} failed: {e}")
+            finally:
+                postprocess_slots.release()
+            await results.put(result)
+
+        async def work():
+            while True:
+                url = await queue.get()
+                if url is _DONE:
+                    if postprocessing:
+                        await asyncio.gather(*postprocessing)
+                    await results.put(_DONE)
+                    return
+                prefixed = (lambda msg, u=url: progress_callback(f"[{u}] {msg}")) if progress_callback else None
+                try:
+                    result = await self.download(url, output_dir, quality, audio_only, playlist, cookie_file, prefixed, progress_hook, timeout, postprocess=False)
+                except Exception as e:
+                    if progress_callback:
+                        progress_callback(f"Failed to process {url}: {str(e)}")
+                    result = DownloadResult(url, False, failure=classify_failure([str(e)]), error=str(e))
+                if self.downloader._needs_postprocess(result):
+                    await postprocess_slots.acquire()
+                    task = asyncio.ensure_future(finish(result))
+                    postprocessing.add(task)
+                    task.add_done_callback(postprocessing.discard)
+                    continue
+                await results.put(result)
+
+        tasks = [asyncio.ensure_future(produce())] + [asyncio.ensure_future(work()) for _ in range(self.concurrency)]
+        try:
+            running = self.concurrency
+            while running:
+                item = await results.get()
+                if item is _DONE:
+                    running -= 1
+                    continue
+                yield item
+            await tasks[0]
+        finally:
+            for task in tasks + list(postprocessing):
+                task.cancel()
+            await asyncio.gather(*tasks, *postprocessing, return_exceptions=True)
+            self.downloader.governor.expect(1)
@@ -0,0 +1,213 @@
+import datetime
+import threading
+import time
+from typing import Optional, List, Tuple, Callable, Iterable, Union
+
+# Below this a transfer would stall rather than just slow down
+MIN_RATE = 8 * 1024
+
+
+def parse_rate(value: Union[str, float, int, None]) -> Optional[float]:
+    """Converts a KiB/s setting ('1000', 1000, '' or None) to bytes per second; None means unlimited."""
+    if value is None or value == "":
+        return None
+    try:
+        rate = float(value) * 1024
+    except (TypeError, ValueError):
+        return None
+    return rate if rate > 0 else None
+
+
+def parse_schedule(entries: Iterable[Tuple[str, Union[str, float, None]]]) -> List[Tuple[datetime.time, Optional[float]]]:
+    """Parses [("08:00", "500"), ("23:00", "")] into (start time, bytes per second) pairs."""
+    schedule = []
+    for start, limit in entries:
+        hours, minutes = (int(part) for part in str(start).split(":", 1))
+        schedule.append((datetime.time(hours, minutes), parse_rate(limit)))
+    return sorted(schedule, key=lambda entry: entry[0])
+
+
+class TokenBucket:
+    """Blocking token bucket; consume() sleeps just long enough to keep to `rate` bytes per second."""
+    def __init__(self, rate: Optional[float] = None, burst_seconds: float = 0.25, clock: Callable[[], float] = time.monotonic):
+        self.burst_seconds = burst_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._rate = rate
+        self._tokens = 0.0
+        self._updated = clock()
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self._rate
+
+    def set_rate(self, rate: Optional[float]):
+        with self._lock:
+            self._refill()
+            self._rate = rate
+
+    def _refill(self):
+        now = self.clock()
+        if self._rate:
+            burst = max(self._rate * self.burst_seconds, 64 * 1024)
+            self._tokens = min(burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def consume(self, amount: int):
+        with self._lock:
+            if not self._rate:
+                return
+            self._refill()
+            # Going into debt lets a large chunk through now and makes the next caller wait for it
+            self._tokens -= amount
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class Lease:
+    """One transfer's share of the governor's budget.
+
+    `rate` (bytes per second, None = unlimited) is updated whenever the budget is
+    redistributed. Adjustable leases follow it while running, either through
+    throttle() for streams this process reads itself or by re-reading `rate` (the
+    in-process engine feeds it to yt-dlp). Fixed leases (yt-dlp subprocesses)
+    keep the rate they were started with.
+    """
+    def __init__(self, governor: "BandwidthGovernor", cap: Optional[float], adjustable: bool):
+        self.governor = governor
+        self.cap = cap
+        self.adjustable = adjustable
+        self.rate: Optional[float] = cap
+        self.observed: Optional[float] = None
+        self._bucket = TokenBucket(cap)
+
+    def _set_rate(self, rate: Optional[float]):
+        self.rate = rate
+        self._bucket.set_rate(rate)
+
+    def observe(self, speed: Optional[float]):
+        """Reports the transfer's current speed so unused budget can be handed to others."""
+        if speed is not None:
+            self.observed = speed
+            self.governor._maybe_rebalance()
+
+    def throttle(self, amount: int):
+        """Blocks until `amount` more bytes fit within this lease's rate."""
+        self._bucket.consume(amount)
+
+    def release(self):
+        self.governor._release(self)
+
+    def __enter__(self) -> "Lease":
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class BandwidthGovernor:
+    """Enforces one aggregate bandwidth limit across all concurrent downloads.
+
+    Every download takes a Lease. The budget is split by water-filling: transfers
+    that use less than an equal share (a slow server, or their own cap) keep
+    what they use plus some headroom, and the rest is shared among the others.
+    The limit can be changed at any time, directly or via a time-of-day
+    schedule, and running adjustable transfers pick up the new rates.
+    """
+    def __init__(self, limit: Optional[float] = None, schedule: Optional[List[Tuple[datetime.time, Optional[float]]]] = None,
+                 rebalance_interval: float = 1.0, headroom: float = 1.25, now: Callable[[], datetime.datetime] = datetime.datetime.now):
+        self.limit = limit
+        self.schedule = schedule or []
+        self.rebalance_interval = rebalance_interval
+        self.headroom = headroom
+        self.now = now
+        self._expected = 1
+        self._leases: List[Lease] = []
+        self._lock = threading.Lock()
+        self._last_rebalance = 0.0
+
+    def set_limit(self, limit: Optional[float]):
+        with self._lock:
+            self.limit = limit
+            self._rebalance()
+
+    def set_schedule(self, schedule: List[Tuple[datetime.time, Optional[float]]]):
+        """Sets (start time, limit) pairs; from each start time until the next, its limit replaces the static one."""
+        with self._lock:
+            self.schedule = sorted(schedule, key=lambda entry: entry[0])
+            self._rebalance()
+
+    def expect(self, transfers: int):
+        """Tells the governor how many transfers will run at once (e.g. batch workers), for sizing fixed leases."""
+        with self._lock:
+            self._expected = max(1, transfers)
+
+    def current_limit(self) -> Optional[float]:
+        if not self.schedule:
+            return self.limit
+        now = self.now().time()
+        active = self.schedule[-1][1]  # before the first start time, yesterday's last entry still applies
+        for start, limit in self.schedule:
+            if start <= now:
+                active = limit
+        return active
+
+    def acquire(self, cap: Optional[float] = None, adjustable: bool = True) -> Lease:
+        """Starts a transfer. cap is an optional per-download limit on top of the aggregate one."""
+        lease = Lease(self, cap, adjustable)
+        with self._lock:
+            self._leases.append(lease)
+            if not adjustable:
+                limit = self.current_limit()
+                if limit is not None:
+                    # Can't be changed later, so never hand out more than an equal share of a full house
+                    share = max(MIN_RATE, limit / max(self._expected, len(self._leases)))
+                    lease._set_rate(min(share, cap) if cap else share)
+            self._rebalance()
+        return lease
+
+    def _release(self, lease: Lease):
+        with self._lock:
+            if lease in self._leases:
+                self._leases.remove(lease)
+                self._rebalance()
+
+    def _maybe_rebalance(self):
+        now = time.monotonic()
+        if now - self._last_rebalance < self.rebalance_interval:
+            return
+        with self._lock:
+            self._rebalance()
+
+    def _rebalance(self):
+        self._last_rebalance = time.monotonic()
+        limit = self.current_limit()
+        flexible = [lease for lease in self._leases if lease.adjustable]
+        if limit is None:
+            for lease in flexible:
+                lease._set_rate(lease.cap)
+            return
+        remaining = limit - sum(lease.rate or 0 for lease in self._leases if not lease.adjustable)
+        pending = list(flexible)
+        while pending:
+            share = max(remaining, 0) / len(pending)
+            satisfied = [lease for lease in pending if self._demand(lease) < share]
+            if not satisfied:
+                for lease in pending:
+                    lease._set_rate(max(MIN_RATE, share))
+                return
+            for lease in satisfied:
+                demand = self._demand(lease)
+                lease._set_rate(max(MIN_RATE, demand))
+                remaining -= demand
+                pending.remove(lease)
+
+    def _demand(self, lease: Lease) -> float:
+        """What a lease would use if unconstrained: its cap, or a bit above its measured speed."""
+        demand = float("inf")
+        if lease.observed is not None and lease.rate is not None and lease.observed < lease.rate * 0.9:
+            demand = lease.observed * self.headroom
+        if lease.cap is not None:
+            demand = min(demand, lease.cap)
+        return demand
@@ -1,10 +1,37 @@
 import argparse
+import datetime
 import logging
 import sys
 from pathlib import Path
 
 from .settings import Settings
-from .downloader import VideoDownloader
+from .archive import DownloadArchive
+from .engine import ENGINES
+from .info_cache import InfoCache
+from .jobs import JobStore, JOB_QUEUED, JOB_DONE, JOB_FAILED
+from .retry import RetryPolicy
+from .utils import iter_urls
+
+def parse_bandwidth_schedule(text: str):
+    """Splits '08:00=500,23:00=' into [("08:00", "500"), ("23:00", "")]; raises ValueError on a bad entry."""
+    entries = []
+    for entry in text.split(","):
+        start, sep, limit = entry.strip().partition("=")
+        if not sep:
+            raise ValueError(f"'{entry}' is not START=LIMIT (e.g. 08:00=500)")
+        try:
+            datetime.datetime.strptime(start.strip(), "%H:%M")
+        except ValueError:
+            raise ValueError(f"'{start}' in '{entry}' is not a HH:MM time") from None
+        limit = limit.strip()
+        if limit:
+            try:
+                if float(limit) < 0:
+                    raise ValueError
+            except ValueError:
+                raise ValueError(f"'{limit}' in '{entry}' is not a KiB/s limit (a number, or empty for unlimited)") from None
+        entries.append((start.strip(), limit))
+    return entries
 
 def main():
     """Command-line entry point."""
@@ -15,11 +42,35 @@ def main():
     parser.add_argument("-a", "--audio", action="store_true", help="Download audio only (MP3).")
     parser.add_argument("-p", "--playlist", action="store_true", help="Download the entire playlist.")
     parser.add_argument("--batch-file", help="Path to a file containing URLs to download.")
+    parser.add_argument("--job-db", help="Job database used to resume a batch (default: <batch-file>.jobs.db).")
+    parser.add_argument("--no-job-db", action="store_true", help="Stream the batch file straight to the downloader without recording progress.")
+    parser.add_argument("--retry-failed", action="store_true", help="Requeue URLs that failed in a previous run of the same batch.")
     parser.add_argument("--parallel", type=int, default=2, help="Number of parallel downloads for batch processing.")
+    parser.add_argument("--per-host", type=int, help="Maximum simultaneous downloads from the same host in a batch (default: no per-host limit, only --parallel applies).")
+    parser.add_argument("--host-delay", type=float, help="Minimum seconds between starting two downloads from the same host.")
+    parser.add_argument("--attempts", type=int, help="Attempts per URL in a batch before a transient failure (network, 429, 403) is final.")
+    parser.add_argument("--bandwidth", help="Total bandwidth limit in KiB/s, shared by all parallel downloads.")
+    parser.add_argument("--bandwidth-schedule", help="Time-of-day limits in KiB/s, e.g. '08:00=500,23:00=' (empty means unlimited).")
+    parser.add_argument("--isolate-plugins", action="store_true", help="Run each plugin in its own interpreter instead of importing it.")
+    parser.add_argument("--postprocess-workers", type=int, help="Files post-processed at once in a batch, independently of --parallel.")
+    parser.add_argument("--connections", type=int, help="Parallel connections for direct media links (default: 4; 1 lets yt-dlp fetch them).")
+    parser.add_argument("--engine", choices=ENGINES, help="Download engine: 'subprocess' runs yt-dlp per URL, 'inprocess' reuses a loaded yt_dlp.")
+    parser.add_argument("--archive", help="Download archive database (default: ~/.video_downloader_archive.db).")
+    parser.add_argument("--no-archive", action="store_true", help="Download even if a video is already recorded in the archive.")
+    parser.add_argument("--import-archive", metavar="FILE", help="Import a yt-dlp --download-archive text file into the archive.")
+    parser.add_argument("--export-archive", metavar="FILE", help="Export the archive as a yt-dlp --download-archive text file.")
     parser.add_argument("--config", help="Path to a custom settings JSON file.")
     parser.add_argument("--verbose", "-v", action="count", default=0, help="Increase verbosity level.")
     
     args = parser.parse_args()
+    schedule = None
+    if args.bandwidth_schedule:
+        try:
+            schedule = parse_bandwidth_schedule(args.bandwidth_schedule)
+        except ValueError as e:
+            parser.error(f"--bandwidth-schedule: {e}")
+    # Imported after parsing so --help and usage errors return without loading the download stack
+    from .downloader import VideoDownloader
 
     # Setup logging
     log_levels = [logging.WARNING, logging.INFO, logging.DEBUG]
@@ -35,33 +86,115 @@ def main():
         logger=logging.getLogger(__name__),
         proxy=settings.data.get('proxy'),
         user_agent=settings.data.get('user_agent'),
-        bandwidth=settings.data.get('bandwidth'),
-        ffmpeg_path=settings.data.get('ffmpeg_path') # Assuming you add this to settings
+        postprocess_script=settings.data.get('postprocess_script') or None,
+        plugin_dir=settings.data.get('plugin_dir') or None,
+        bandwidth=args.bandwidth if args.bandwidth is not None else settings.data.get('bandwidth'),
+        ffmpeg_path=settings.data.get('ffmpeg_path'), # Assuming you add this to settings
+        engine=args.engine or settings.data.get('engine', 'subprocess'),
+        info_cache=InfoCache(ttl=settings.data.get('info_cache_ttl', 1800), max_bytes=settings.data.get('info_cache_size_mb', 100) * 1024 * 1024)
     )
+    downloader.set_connections(args.connections or settings.data.get('connections', 4))
+    if args.isolate_plugins or settings.data.get('plugin_isolation'):
+        downloader.set_plugin_isolation(True)
+    if args.postprocess_workers or settings.data.get('postprocess_workers'):
+        downloader.set_postprocess_workers(args.postprocess_workers or settings.data.get('postprocess_workers'))
+    if schedule is not None:
+        downloader.set_bandwidth_schedule(schedule)
+    else:
+        downloader.set_bandwidth_schedule(settings.data.get('bandwidth_schedule', []))
+    downloader.set_retry_policy(RetryPolicy(max_attempts=args.attempts or settings.data.get('max_attempts', 3)))
+
+    archive = None
+    if args.archive or args.import_archive or args.export_archive or (settings.data.get('skip_downloaded', True) and not args.no_archive):
+        archive = DownloadArchive(args.archive) if args.archive else DownloadArchive.open_default()
+    if args.import_archive:
+        added = archive.import_text(args.import_archive)
+        print(f"Imported {added} new archive entries from {args.import_archive}.")
+    if args.export_archive:
+        written = archive.export_text(args.export_archive)
+        print(f"Exported {written} archive entries to {args.export_archive}.")
+    if (args.import_archive or args.export_archive) and not (args.url or args.batch_file):
+        return
+    downloader.set_archive(None if args.no_archive else archive)
     
     def cli_progress(message):
         print(message)
 
+    def record_history(result):
+        status = 'Skipped' if result.skipped else 'Success' if result.success else 'Failed'
+        settings.add_history({'time': datetime.datetime.now().isoformat(), 'url': result.url, 'status': status, 'path': result.path})
+
+    def report_postprocessing():
+        for name, stats in sorted(downloader.ffmpeg.stats().items()):
+            logging.info(f"{name}: {stats['count']} run(s), {stats['mean_s']:.2f} s average, {stats['max_s']:.2f} s slowest")
+        if downloader.plugins is not None:
+            for name, stats in sorted(downloader.plugins.stats().items()):
+                logging.info(f"Plugin {name}: {stats['calls']} call(s), {stats['failures']} failed, {stats['mean_ms']:.1f} ms average")
+
+    def describe_result(result):
+        if result.skipped:
+            return f"Download for {result.url}: skipped (already in archive)"
+        if result.success:
+            return f"Download for {result.url}: succeeded"
+        return f"Download for {result.url}: failed ({result.failure}, {result.attempts} attempt(s))"
+
     if args.batch_file:
+        def report_invalid(line_number, line):
+            logging.warning(f"Skipping invalid URL on line {line_number}: {line}")
+
+        options = dict(
+            output_dir=output_dir,
+            quality=args.quality,
+            audio_only=args.audio,
+            playlist=args.playlist,
+            cookie_file=settings.data.get('cookie_file'),
+            parallel=args.parallel,
+            progress_callback=cli_progress,
+            per_host_limit=args.per_host if args.per_host is not None else settings.data.get('per_host_limit'),
+            host_interval=args.host_delay if args.host_delay is not None else settings.data.get('host_interval', 0.0)
+        )
         try:
             with open(args.batch_file, 'r') as f:
-                urls = [line.strip() for line in f if line.strip()]
-            
-            logging.info(f"Starting batch download from {args.batch_file}...")
-            results = downloader.batch_download(
-                urls=urls,
-                output_dir=output_dir,
-                quality=args.quality,
-                audio_only=args.audio,
-                playlist=args.playlist,
-                cookie_file=settings.data.get('cookie_file'),
-                parallel=args.parallel,
-                progress_callback=cli_progress
-            )
-            
-            for url, success in results.items():
-                status = "succeeded" if success else "failed"
-                print(f"Download for {url}: {status}")
+                if args.no_job_db:
+                    logging.info(f"Streaming batch download from {args.batch_file}...")
+                    succeeded = failed = 0
+                    for result in downloader.iter_batch_download(iter_urls(f, report_invalid), **options):
+                        succeeded += result.success
+                        failed += not result.success
+                        record_history(result)
+                        print(describe_result(result))
+                    print(f"Batch finished: {succeeded} succeeded, {failed} failed.")
+                    logging.info(f"Connections: {downloader.session.stats()}")
+                    report_postprocessing()
+                    return
+
+                store = JobStore(args.job_db) if args.job_db else JobStore.for_batch_file(args.batch_file)
+                with store:
+                    recovered = store.recover()
+                    if recovered:
+                        logging.info(f"Resuming {recovered} interrupted job(s) from {store.path}")
+                    added = store.enqueue_file(args.batch_file, iter_urls(f, report_invalid))
+                    if args.retry_failed:
+                        store.requeue_failed()
+
+                    counts = store.counts()
+                    if not counts[JOB_QUEUED]:
+                        print(f"Batch already completed ({counts[JOB_DONE]} succeeded, {counts[JOB_FAILED]} failed); nothing new to download. "
+                              f"Use --retry-failed to retry the failures or --no-job-db to download every URL again.")
+                        return
+
+                    logging.info(f"Starting batch download from {args.batch_file} ({added} new URL(s) queued)...")
+                    for result in downloader.download_jobs(store=store, **options):
+                        record_history(result)
+                        print(describe_result(result))
+
+                    counts = store.counts()
+                    print(f"Batch finished: {counts[JOB_DONE]} succeeded, {counts[JOB_FAILED]} failed.")
+                    failures = store.failure_counts()
+                    if failures:
+                        print("Failures by cause: " + ", ".join(f"{cause} {count}" for cause, count in sorted(failures.items())))
+                    logging.info(f"Connections: {downloader.session.stats()}")
+                    report_postprocessing()
 
         except FileNotFoundError:
             logging.error(f"Batch file not found: {args.batch_file}")
@@ -69,7 +202,7 @@ def main():
             
     elif args.url:
         logging.info(f"Downloading {args.url} to {output_dir}...")
-        success, final_path = downloader.download(
+        result = downloader.download_result(
             url=args.url,
             output_dir=output_dir,
             quality=args.quality,
@@ -78,8 +211,11 @@ def main():
             cookie_file=settings.data.get('cookie_file'),
             progress_callback=cli_progress
         )
-        if success:
-            print(f"Download successful! File saved to: {final_path}")
+        record_history(result)
+        if result.skipped:
+            print("Already downloaded (recorded in the archive).")
+        elif result.success:
+            print(f"Download successful! File saved to: {result.path}")
         else:
             print("Download failed.")
             sys.exit(1)
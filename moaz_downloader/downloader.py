@@ -1,24 +1,71 @@
+import json
 import logging
 import os
 import subprocess
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Optional, List, Callable, Dict, Tuple
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Optional, List, Callable, Dict, Tuple, Any, Iterator, Iterable, AsyncIterable, Union, Deque
 
+from .bandwidth import BandwidthGovernor, Lease, parse_rate, parse_schedule
+from .engine import InProcessEngine, ENGINE_SUBPROCESS, ENGINE_INPROCESS, ytdlp_importable
+from .ffmpeg import FFmpegManager, AudioPlan
+from .archive import DownloadArchive
+from .info_cache import InfoCache
+from .jobs import JobStore
+from .net import HTTPSession, http2_available
+from .plugins import PluginManager
+from .progress import ProgressEvent, DownloadResult, format_bytes, PROGRESS_TEMPLATE_ARGS, PHASE_FINISHED, PHASE_POSTPROCESSED
+from .retry import RetryPolicy, classify_failure, FAILURE_CANCELLED
+from .scheduler import HostScheduler, NOTHING_READY
+from .segmented import SegmentedDownloader, SegmentedDownloadError, SegmentedDownloadCancelled, is_direct_media_url
+from .tools import ToolCache
 from .utils import is_valid_url
 
 class VideoDownloader:
     """Handles the actual download logic."""
-    def __init__(self, logger: Optional[logging.Logger] = None, postprocess_script: Optional[str] = None, proxy: Optional[str] = None, user_agent: Optional[str] = None, bandwidth: Optional[str] = None, plugin_dir: Optional[str] = None, ffmpeg_path: Optional[str] = None):
+    def __init__(self, logger: Optional[logging.Logger] = None, postprocess_script: Optional[str] = None, proxy: Optional[str] = None, user_agent: Optional[str] = None, bandwidth: Optional[str] = None, plugin_dir: Optional[str] = None, ffmpeg_path: Optional[str] = None, engine: str = ENGINE_SUBPROCESS, info_cache: Optional[InfoCache] = None, archive: Optional[DownloadArchive] = None, tools: Optional[ToolCache] = None):
         self.logger = logger or logging.getLogger(__name__)
         self.postprocess_script = postprocess_script
         self.proxy = proxy
         self.user_agent = user_agent
         self.bandwidth = bandwidth
         self.plugin_dir = plugin_dir
+        self.plugin_isolation = False
+        self.plugins = PluginManager(plugin_dir, logger=self.logger) if plugin_dir else None
         self.ffmpeg_path = ffmpeg_path
         self.CREATE_NO_WINDOW = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
-        
+        # Tool checks are cached on disk, so a start where nothing changed spawns no --version runs
+        self.tools = tools or ToolCache(creationflags=self.CREATE_NO_WINDOW)
+        # Capabilities are probed lazily and cached with the tool checks; also times each merge/extraction
+        self.ffmpeg = FFmpegManager(ffmpeg_path, self.tools, self.logger)
+        self.inprocess = InProcessEngine(self.logger)
+        self.retries = 3
+        # Post-processing runs subprocesses, so its pool is sized separately from the network-bound download workers
+        self.postprocess_workers = max(1, (os.cpu_count() or 2) // 2)
+        self._postprocess_pool: Optional[ThreadPoolExecutor] = None
+        self._postprocess_lock = threading.Lock()
+        self.retry_policy = RetryPolicy()
+        self.info_cache = info_cache or InfoCache()
+        self.archive = archive
+        self._can_match_ids: Optional[bool] = None
+        # Keep-alive pool shared by update checks and direct-link probes and downloads
+        self.session = HTTPSession(http2=http2_available())
+        self.segmented = SegmentedDownloader(headers={"User-Agent": user_agent} if user_agent else None, session=self.session)
+        # One limit shared by every download this downloader runs, however many run at once
+        self.governor = BandwidthGovernor(parse_rate(bandwidth))
+
+        if engine == ENGINE_INPROCESS and not ytdlp_importable():
+            self.logger.warning("yt_dlp is not importable in this interpreter; falling back to the subprocess engine.")
+            engine = ENGINE_SUBPROCESS
+        self.engine = engine
+
+        if self.engine == ENGINE_INPROCESS:
+            # The module is importable, so the same interpreter can serve the remaining subprocess calls
+            self.ytdlp_cmd = [sys.executable, "-m", "yt_dlp"]
+            return
         try:
             self.ytdlp_cmd = self.find_ytdlp()
         except FileNotFoundError:
@@ -26,7 +73,10 @@ class VideoDownloader:
                 raise FileNotFoundError("Failed to install yt-dlp. Please install it manually using: pip install yt-dlp")
 
     def find_ytdlp(self) -> List[str]:
-        """Find yt-dlp command or install it if not found."""
+        """Find yt-dlp command or install it if not found.
+
+        Candidates are checked through the tool cache, so only new or changed installs are run.
+        """
         candidates = [
             ["yt-dlp"],
             [sys.executable, "-m", "yt_dlp"],
@@ -34,11 +84,8 @@ class VideoDownloader:
             ["py", "-m", "yt_dlp"]
         ]
         for cmd in candidates:
-            try:
-                subprocess.run(cmd + ["--version"], capture_output=True, check=True, creationflags=self.CREATE_NO_WINDOW)
+            if self.tools.works(cmd):
                 return cmd
-            except Exception:
-                continue
         
         try:
             self.logger.info("yt-dlp not found. Attempting to install...")
@@ -47,11 +94,8 @@ class VideoDownloader:
             self.logger.info("yt-dlp installed successfully!")
             
             for cmd in candidates:
-                try:
-                    subprocess.run(cmd + ["--version"], capture_output=True, check=True, creationflags=self.CREATE_NO_WINDOW)
+                if self.tools.works(cmd):
                     return cmd
-                except Exception:
-                    continue
         except Exception as e:
             self.logger.error(f"Failed to install yt-dlp: {e}")
             
@@ -86,6 +130,25 @@ class VideoDownloader:
     def set_postprocess_script(self, script_path: Optional[str]):
         self.postprocess_script = script_path
 
+    def set_postprocess_workers(self, workers: int):
+        """Sets how many files batch downloads post-process at once, independently of `parallel`."""
+        with self._postprocess_lock:
+            self.postprocess_workers = max(1, workers)
+            if self._postprocess_pool is not None:
+                # Queued and running jobs finish on the old pool; new ones start on a resized pool
+                self._postprocess_pool.shutdown(wait=False)
+                self._postprocess_pool = None
+
+    def submit_postprocess(self, filepath: Optional[str], metadata: Optional[Dict[str, Any]] = None) -> Future:
+        """Queues the post-process script and plugins for a downloaded file on the post-processing pool."""
+        with self._postprocess_lock:
+            if self._postprocess_pool is None:
+                self._postprocess_pool = ThreadPoolExecutor(max_workers=self.postprocess_workers, thread_name_prefix="postprocess")
+            return self._postprocess_pool.submit(self._after_download, filepath, metadata)
+
+    def _needs_postprocess(self, result: DownloadResult) -> bool:
+        return bool(result.success and not result.skipped and result.path and (self.postprocess_script or self.plugin_dir))
+
     def run_postprocess(self, filepath: str):
         if self.postprocess_script and os.path.exists(self.postprocess_script):
             try:
@@ -102,155 +165,562 @@ class VideoDownloader:
 
     def set_user_agent(self, ua: Optional[str]):
         self.user_agent = ua
+        # Direct-link downloads send their own requests; replaced rather than edited, as workers copy it per request
+        headers = {key: value for key, value in self.segmented.headers.items() if key != "User-Agent"}
+        if ua:
+            headers["User-Agent"] = ua
+        self.segmented.headers = headers
 
     def set_bandwidth(self, bw: Optional[str]):
+        """Sets the aggregate limit in KiB/s ('' or None for unlimited); running downloads are rebalanced."""
         self.bandwidth = bw
+        self.governor.set_limit(parse_rate(bw))
+
+    def set_bandwidth_schedule(self, schedule: Iterable[Tuple[str, Optional[str]]]):
+        """Sets time-of-day limits, e.g. [("08:00", "500"), ("23:00", "")]; each applies until the next start time."""
+        self.governor.set_schedule(parse_schedule(schedule))
 
     def set_plugin_dir(self, path: Optional[str]):
+        if path != self.plugin_dir:
+            self.plugins = PluginManager(path, self.plugin_isolation, logger=self.logger) if path else None
         self.plugin_dir = path
 
-    def run_plugin_dir(self, filepath: str):
-        if self.plugin_dir and os.path.isdir(self.plugin_dir):
-            for fname in os.listdir(self.plugin_dir):
-                if fname.endswith('.py'):
-                    try:
-                        subprocess.run([sys.executable, os.path.join(self.plugin_dir, fname), filepath], 
-                                    capture_output=True, text=True, creationflags=self.CREATE_NO_WINDOW)
-                    except Exception as e:
-                        self.logger.error(f"Plugin error: {e}")
+    def set_plugin_isolation(self, isolate: bool):
+        """Runs every plugin in its own interpreter (for untrusted plugins) instead of importing it."""
+        self.plugin_isolation = isolate
+        if self.plugins is not None:
+            self.plugins = PluginManager(self.plugin_dir, isolate, logger=self.logger)
+
+    def set_retries(self, retries: int):
+        """Sets how often yt-dlp itself retries a request within one attempt."""
+        self.retries = retries
+
+    def set_retry_policy(self, policy: RetryPolicy):
+        """Sets how batch downloads requeue URLs that failed with a transient error."""
+        self.retry_policy = policy
+
+    def set_connections(self, connections: int):
+        """Sets how many parallel connections fetch a direct media link (1 leaves direct links to yt-dlp)."""
+        self.segmented.connections = max(1, connections)
+        # Keep every segment connection of a download for the next one instead of discarding the extras
+        self.session.set_max_per_host(max(8, self.segmented.connections))
+
+    def set_archive(self, archive: Optional[DownloadArchive]):
+        """Sets the archive of finished videos that downloads skip (None to download everything)."""
+        self.archive = archive
+
+    def set_engine(self, engine: str):
+        """Switches between the 'subprocess' and 'inprocess' engines."""
+        if engine == ENGINE_INPROCESS and not ytdlp_importable():
+            self.logger.warning("yt_dlp is not importable in this interpreter; keeping the subprocess engine.")
+            return
+        self.engine = engine
+
+    def run_plugin_dir(self, filepath: str, metadata: Optional[Dict[str, Any]] = None):
+        """Runs the plugin directory's plugins on a file; see PluginManager."""
+        if self.plugins is not None:
+            self.plugins.run(filepath, metadata)
 
     def check_for_updates(self) -> bool:
-        import requests
         try:
-            resp = requests.get('https://pypi.org/pypi/yt-dlp/json', timeout=5)
-            latest = resp.json()['info']['version']
-            result = subprocess.run(self.ytdlp_cmd + ['--version'], capture_output=True, text=True, 
-                                 creationflags=self.CREATE_NO_WINDOW)
-            current = result.stdout.strip().splitlines()[0]
-            return latest != current
+            latest = self.session.get_json('https://pypi.org/pypi/yt-dlp/json', timeout=5)['info']['version']
+            current = self.tools.version(self.ytdlp_cmd)
+            return current is not None and latest != current
         except Exception:
             return False
 
-    def download(self, url: str, output_dir: str, quality: str = "best", audio_only: bool = False, playlist: bool = False, cookie_file: Optional[str] = None, progress_callback: Optional[Callable[[str], None]] = None, proxy: Optional[str] = None, file_template: Optional[str] = None, user_agent: Optional[str] = None, bandwidth: Optional[str] = None, plugin_dir: Optional[str] = None, download_archive: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+    def _format_args(self, quality: str, audio_only: bool, audio_plan: Optional[AudioPlan] = None) -> List[str]:
+        if audio_only:
+            plan = audio_plan or self.ffmpeg.audio_plan()
+            selector = ["-f", plan.format] if plan.format != "bestaudio/best" else []
+            return selector + ["--extract-audio", "--audio-format", plan.codec, "--audio-quality", "192K"]
+        # A build that fails its probe can't merge either, so it is treated like no ffmpeg at all
+        ffmpeg_available = self.ffmpeg.available
+        if ffmpeg_available:
+            if quality == "worst":
+                return ["-f", "worst"]
+            elif quality != "best":
+                height = quality.replace('p', '')
+                return ["-f", f"bestvideo[height<={height}]+bestaudio/best[height<={height}]"]
+            return ["-f", "best"]
+        if quality == "worst":
+            return ["-f", "worst[acodec!=none][vcodec!=none]/worst"]
+        elif quality != "best":
+            height = quality.replace('p', '')
+            return ["-f", f"best[height<={height}][acodec!=none][vcodec!=none]/best[height<={height}]"]
+        return ["-f", "best[acodec!=none][vcodec!=none]/best"]
+
+    def build_command(self, url: str, output_dir: str, quality: str = "best", audio_only: bool = False, playlist: bool = False, cookie_file: Optional[str] = None, proxy: Optional[str] = None, file_template: Optional[str] = None, user_agent: Optional[str] = None, bandwidth: Optional[str] = None, download_archive: Optional[str] = None, info_file: Optional[str] = None, audio_plan: Optional[AudioPlan] = None) -> List[str]:
+        """Builds the yt-dlp command line for the subprocess engine.
+
+        With info_file, yt-dlp loads that extracted info JSON instead of extracting the URL again.
+        audio_plan (default: the plan without source info) decides how audio_only reaches MP3.
+        bandwidth (KiB/s) is passed as is; the aggregate limit is applied by download_result.
+        """
+        output_template = file_template or "%(uploader)s - %(id)s.%(ext)s"
+        output_path = os.path.abspath(os.path.join(output_dir, output_template))
+
+        source = ["--load-info-json", info_file] if info_file else [url]
+        # --continue/--part: a rerun resumes the .part file left by a stopped or failed one, whatever the user's yt-dlp config says
+        cmd = self.ytdlp_cmd + source + ["-o", output_path, "--ignore-errors", "--retries", str(self.retries), "--continue", "--part", "--newline"] + PROGRESS_TEMPLATE_ARGS
+
+        if self.ffmpeg_path:
+            cmd.extend(["--ffmpeg-location", self.ffmpeg_path])
+
+        if proxy or self.proxy:
+            cmd.extend(["--proxy", proxy or self.proxy])
+        if user_agent or self.user_agent:
+            cmd.extend(["--user-agent", user_agent or self.user_agent])
+        if bandwidth:
+            cmd.extend(["--limit-rate", f"{bandwidth}K"])
+        if not playlist:
+            cmd.append("--no-playlist")
+
+        cmd.extend(self._format_args(quality, audio_only, audio_plan))
+
+        if cookie_file and os.path.exists(cookie_file):
+            cmd.extend(["--cookies", cookie_file])
+        if download_archive and os.path.exists(download_archive):
+            cmd.extend(["--download-archive", download_archive])
+        return cmd
+
+    def build_params(self, output_dir: str, quality: str = "best", audio_only: bool = False, playlist: bool = False, cookie_file: Optional[str] = None, proxy: Optional[str] = None, file_template: Optional[str] = None, user_agent: Optional[str] = None, bandwidth: Optional[str] = None, download_archive: Optional[str] = None, audio_plan: Optional[AudioPlan] = None) -> Dict[str, Any]:
+        """Builds the YoutubeDL params for the in-process engine, mirroring build_command."""
+        output_template = file_template or "%(uploader)s - %(id)s.%(ext)s"
+        params: Dict[str, Any] = {
+            "outtmpl": {"default": os.path.abspath(os.path.join(output_dir, output_template))},
+            "ignoreerrors": True,
+            "retries": self.retries,
+            "noplaylist": not playlist,
+            "continuedl": True,
+            "nopart": False,
+        }
+        if self.ffmpeg_path:
+            params["ffmpeg_location"] = self.ffmpeg_path
+        if proxy or self.proxy:
+            params["proxy"] = proxy or self.proxy
+        if user_agent or self.user_agent:
+            params["http_headers"] = {"User-Agent": user_agent or self.user_agent}
+        if bandwidth:
+            params["ratelimit"] = float(bandwidth) * 1024
+
+        if audio_only:
+            plan = audio_plan or self.ffmpeg.audio_plan()
+            params["format"] = plan.format
+            params["postprocessors"] = [{"key": "FFmpegExtractAudio", "preferredcodec": plan.codec, "preferredquality": "192"}]
+        else:
+            params["format"] = self._format_args(quality, audio_only)[1]
+
+        if cookie_file and os.path.exists(cookie_file):
+            params["cookiefile"] = cookie_file
+        if download_archive and os.path.exists(download_archive):
+            params["download_archive"] = download_archive
+        elif self.archive is not None:
+            # yt-dlp treats a non-path archive as a set, so playlist entries are checked and recorded in the index
+            params["download_archive"] = self.archive
+        return params
+
+    def download(self, url: str, output_dir: str, quality: str = "best", audio_only: bool = False, playlist: bool = False, cookie_file: Optional[str] = None, progress_callback: Optional[Callable[[str], None]] = None, proxy: Optional[str] = None, file_template: Optional[str] = None, user_agent: Optional[str] = None, bandwidth: Optional[str] = None, plugin_dir: Optional[str] = None, download_archive: Optional[str] = None, progress_hook: Optional[Callable[[ProgressEvent], Optional[bool]]] = None) -> Tuple[bool, Optional[str]]:
+        """Downloads a URL and returns (success, final file path). See download_result for the details."""
+        result = self.download_result(url, output_dir, quality, audio_only, playlist, cookie_file, progress_callback, proxy, file_template, user_agent, bandwidth, plugin_dir, download_archive, progress_hook)
+        return result.success, result.path
+
+    def download_result(self, url: str, output_dir: str, quality: str = "best", audio_only: bool = False, playlist: bool = False, cookie_file: Optional[str] = None, progress_callback: Optional[Callable[[str], None]] = None, proxy: Optional[str] = None, file_template: Optional[str] = None, user_agent: Optional[str] = None, bandwidth: Optional[str] = None, plugin_dir: Optional[str] = None, download_archive: Optional[str] = None, progress_hook: Optional[Callable[[ProgressEvent], Optional[bool]]] = None, postprocess: bool = True) -> DownloadResult:
+        """Downloads a URL, classifying the failure if it does not succeed.
+
+        progress_callback receives yt-dlp log lines; progress_hook receives parsed ProgressEvent objects.
+        Without a progress_hook, events are passed to progress_callback as formatted text. Returning
+        False from either callback cancels the download. bandwidth (KiB/s) caps this download on top
+        of its share of the aggregate limit. With postprocess=False, the post-process script and
+        plugins are left to the caller (batch downloads queue them with submit_postprocess).
+        """
         last_file = None
+        lease = None
+        on_line, errors = self._capture_errors(progress_callback)
         try:
+            archived, archive_entry = self._check_archive(url, playlist)
+            if archived:
+                on_line(f"[download] {url} has already been recorded in the archive")
+                return DownloadResult(url, True, skipped=True)
             os.makedirs(output_dir, exist_ok=True)
-            output_template = file_template or "%(uploader)s - %(id)s.%(ext)s"
-            output_path = os.path.abspath(os.path.join(output_dir, output_template))
-            
-            cmd = self.ytdlp_cmd + [url, "-o", output_path, "--ignore-errors", "--retries", "3", "--newline"]
-            
-            if self.ffmpeg_path:
-                cmd.extend(["--ffmpeg-location", self.ffmpeg_path])
-
-            if proxy or self.proxy:
-                cmd.extend(["--proxy", proxy or self.proxy])
-            if user_agent or self.user_agent:
-                cmd.extend(["--user-agent", user_agent or self.user_agent])
-            if bandwidth or self.bandwidth:
-                cmd.extend(["--limit-rate", f"{bandwidth or self.bandwidth}K"])
-            if not playlist:
-                cmd.append("--no-playlist")
-
-            ffmpeg_available = self.ffmpeg_path is not None
-            if audio_only:
-                cmd.extend(["--extract-audio", "--audio-format", "mp3", "--audio-quality", "192K"])
+            segmented = self._use_segmented(url, audio_only, playlist, proxy)
+            # A yt-dlp subprocess can't be re-rated once started, so it gets a fixed share
+            lease = self.governor.acquire(parse_rate(bandwidth), adjustable=segmented or self.engine == ENGINE_INPROCESS)
+            if segmented:
+                result = self._download_segmented(url, output_dir, archive_entry, on_line, self._event_handler(url, progress_callback, progress_hook), errors, lease)
+                if postprocess and result.success:
+                    self._after_download(result.path, self._plugin_metadata(url, result.path))
+                return result
+            # A fresh probe of this URL (e.g. from detect_formats) saves a second extraction
+            variant = self._info_variant(cookie_file, proxy, user_agent)
+            info_file = None if playlist else self.info_cache.path_for(url, variant)
+            options = dict(quality=quality, audio_only=audio_only, playlist=playlist, cookie_file=cookie_file, proxy=proxy,
+                           file_template=file_template, user_agent=user_agent, download_archive=download_archive,
+                           audio_plan=self._audio_plan(url, info_file, on_line) if audio_only else None)
+            on_event = self._event_handler(url, progress_callback, progress_hook)
+            if self.engine == ENGINE_INPROCESS:
+                success, last_file, cancelled = self.inprocess.download(url, self.build_params(output_dir, **options), on_line, on_event, info_file, lease)
+                if cancelled:
+                    return DownloadResult(url, False, last_file, FAILURE_CANCELLED)
             else:
-                if ffmpeg_available:
-                    if quality == "worst":
-                        cmd.extend(["-f", "worst"])
-                    elif quality != "best":
-                        height = quality.replace('p', '')
-                        cmd.extend(["-f", f"bestvideo[height<={height}]+bestaudio/best[height<={height}]"])
-                    else:
-                        cmd.extend(["-f", "best"])
-                else:
-                    if quality == "worst":
-                        cmd.extend(["-f", "worst[acodec!=none][vcodec!=none]/worst"])
-                    elif quality != "best":
-                        height = quality.replace('p', '')
-                        cmd.extend(["-f", f"best[height<={height}][acodec!=none][vcodec!=none]/best[height<={height}]"])
-                    else:
-                        cmd.extend(["-f", "best[acodec!=none][vcodec!=none]/best"])
-            
-            if cookie_file and os.path.exists(cookie_file):
-                cmd.extend(["--cookies", cookie_file])
-            if download_archive and os.path.exists(download_archive):
-                cmd.extend(["--download-archive", download_archive])
-                
-            if progress_callback:
-                progress_callback(f"yt-dlp command: {' '.join(cmd)}")
+                cmd = self.build_command(url, output_dir, info_file=info_file, bandwidth=self._rate_arg(lease), **options)
+                success, last_file = self._download_subprocess(cmd, on_line, on_event)
+                if success is None:
+                    return DownloadResult(url, False, last_file, FAILURE_CANCELLED)
+
+            if success:
+                self._record_archive(url, archive_entry, playlist)
+                if postprocess:
+                    self._after_download(last_file, self._plugin_metadata(url, last_file, info_file))
+                return DownloadResult(url, True, last_file, info_file=info_file)
+            if info_file:
+                # The cached stream URLs may have expired; the next attempt extracts afresh
+                self.info_cache.discard(url, variant)
+            return self._failure_result(url, last_file, errors)
 
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, creationflags=self.CREATE_NO_WINDOW, bufsize=1)
-            
-            while True:
-                line = process.stdout.readline()
-                if not line and process.poll() is not None:
-                    break
-                line = line.strip()
-                if line:
-                    if progress_callback and not progress_callback(line):
-                        process.terminate()
-                        try:
-                            process.wait(timeout=5)
-                        except subprocess.TimeoutExpired:
-                            process.kill()
-                        return False, last_file
-                            
-                    if '[download] Destination:' in line:
-                        last_file = line.split('Destination: ', 1)[1]
-                    elif '[Merger] Merging formats into "' in line:
-                        last_file = line.split('[Merger] Merging formats into "', 1)[1].rstrip('"')
-                    elif '[ExtractAudio] Destination:' in line:
-                        last_file = line.split('[ExtractAudio] Destination: ', 1)[1]
-                    elif 'has already been downloaded' in line:
-                        last_file = line.split('[download] ', 1)[1].split(' has already')[0]
-                        
-            success = (process.returncode == 0)
-            if success and last_file and os.path.exists(last_file):
-                if self.postprocess_script:
-                    self.run_postprocess(last_file)
-                if self.plugin_dir:
-                    self.run_plugin_dir(last_file)
-                    
-            return success, last_file
-        
         except Exception as e:
             if progress_callback:
                 progress_callback(f"Unexpected error: {str(e)}")
-            return False, last_file
-
-    def batch_download(self, urls: List[str], output_dir: str, quality: str, audio_only: bool, playlist: bool, cookie_file: Optional[str], parallel: int, progress_callback: Optional[Callable[[str], None]] = None) -> Dict[str, bool]:
-        results = {}
-        with ThreadPoolExecutor(max_workers=min(parallel, 8)) as executor:
-            future_to_url = {executor.submit(self.download, url, output_dir, quality, audio_only, playlist, cookie_file, lambda msg, u=url: progress_callback(f"[{u}] {msg}") if progress_callback else None): url for url in urls}
-            for future in as_completed(future_to_url):
-                url = future_to_url[future]
+            errors.append(str(e))
+            return self._failure_result(url, last_file, errors)
+        finally:
+            if lease is not None:
+                lease.release()
+
+    def _audio_plan(self, url: str, info_file: Optional[str], on_line: Callable[[str], Optional[bool]]) -> AudioPlan:
+        """Plans the MP3 extraction, using the cached info (when there is one) to avoid a needless transcode."""
+        plan = self.ffmpeg.audio_plan(info=self.info_cache.load(info_file) if info_file else None)
+        if plan.copy:
+            on_line(f"[audio] No transcode: {plan.reason}")
+        return plan
+
+    @staticmethod
+    def _rate_arg(lease: Lease) -> Optional[str]:
+        """The lease's rate as a yt-dlp --limit-rate value in KiB/s."""
+        return str(max(1, round(lease.rate / 1024))) if lease.rate else None
+
+    def _use_segmented(self, url: str, audio_only: bool, playlist: bool, proxy: Optional[str]) -> bool:
+        # Conversion and proxies are left to yt-dlp
+        return (self.segmented.connections > 1 and is_direct_media_url(url) and not (audio_only or playlist)
+                and not (proxy or self.proxy))
+
+    def _download_segmented(self, url: str, output_dir: str, archive_entry: Optional[str], on_line: Callable[[str], Optional[bool]], on_event: Callable[[ProgressEvent], Optional[bool]], errors: Deque[str], lease: Optional[Lease] = None) -> DownloadResult:
+        on_line(f"[segmented] Downloading {url} over up to {self.segmented.connections} connections")
+        if lease is not None:
+            report = on_event
+
+            def on_event(event: ProgressEvent):
+                lease.observe(event.speed)
+                return report(event)
+        started = []
+
+        def on_start(dest: str, resumed: int):
+            # Logged before the transfer, where yt-dlp logs it
+            started.append(dest)
+            on_line(f"[download] Destination: {dest}")
+            if resumed:
+                on_line(f"[segmented] Resuming from {format_bytes(resumed)} saved by an earlier partial download")
+
+        try:
+            direct = self.segmented.download(url, output_dir, on_event, throttle=lease.throttle if lease is not None else None, on_start=on_start)
+        except SegmentedDownloadCancelled:
+            return DownloadResult(url, False, failure=FAILURE_CANCELLED)
+        except SegmentedDownloadError as e:
+            on_line(f"ERROR: {e}")
+            return self._failure_result(url, None, errors)
+        if not started:
+            on_line(f"[download] {direct.path} has already been downloaded")
+        self._record_archive(url, archive_entry, False)
+        return DownloadResult(url, True, direct.path, resumed_bytes=direct.resumed_bytes)
+
+    def _check_archive(self, url: str, playlist: bool) -> Tuple[bool, Optional[str]]:
+        """Looks a URL up in the archive before anything is spawned. Returns (already downloaded, archive entry)."""
+        if self.archive is None or playlist:
+            return False, None
+        if self.archive.contains_url(url):
+            return True, None
+        # Direct file links only ever match the generic extractor, which has no archive IDs
+        if is_direct_media_url(url):
+            return False, None
+        if self._can_match_ids is None:
+            self._can_match_ids = ytdlp_importable()
+        # A subprocess-engine CLI doesn't otherwise import yt_dlp; only pay for it once the archive
+        # holds IDs (e.g. imported from a yt-dlp text archive) that the URL could match
+        entry = None
+        if self._can_match_ids and (self.engine == ENGINE_INPROCESS or self.inprocess.warmed or self.archive.has_entries()):
+            try:
+                entry = self.inprocess.archive_id(url)
+            except Exception as e:
+                self.logger.debug(f"Could not derive an archive ID for {url}: {e}")
+        return bool(entry and entry in self.archive), entry
+
+    def _record_archive(self, url: str, entry: Optional[str], playlist: bool):
+        # A playlist URL stays downloadable so new entries are picked up; its videos are recorded by yt-dlp (in-process)
+        if self.archive is not None and not playlist:
+            self.archive.add_url(url, entry)
+
+    def _capture_errors(self, progress_callback: Optional[Callable[[str], None]]) -> Tuple[Callable[[str], Optional[bool]], Deque[str]]:
+        """Wraps a line callback so the last error/warning lines are kept for failure classification."""
+        errors: Deque[str] = deque(maxlen=20)
+
+        def on_line(line: str):
+            if 'ERROR' in line or 'WARNING' in line:
+                errors.append(line)
+            return progress_callback(line) if progress_callback else True
+        return on_line, errors
+
+    def _failure_result(self, url: str, last_file: Optional[str], errors: Deque[str]) -> DownloadResult:
+        error = next((line for line in reversed(errors) if 'ERROR' in line), errors[-1] if errors else None)
+        return DownloadResult(url, False, last_file, classify_failure(errors), error)
+
+    def _download_subprocess(self, cmd: List[str], progress_callback: Optional[Callable[[str], None]] = None, on_event: Optional[Callable[[ProgressEvent], Optional[bool]]] = None) -> Tuple[Optional[bool], Optional[str]]:
+        """Runs yt-dlp as a child process. Returns (None, last_file) if cancelled."""
+        last_file = None
+        if progress_callback:
+            progress_callback(f"yt-dlp command: {' '.join(cmd)}")
+
+        try:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, creationflags=self.CREATE_NO_WINDOW, bufsize=1)
+        except OSError:
+            cmd = self._rediscover_ytdlp(cmd)
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, creationflags=self.CREATE_NO_WINDOW, bufsize=1)
+
+        for line in process.stdout:
+            keep_going, filepath = self._handle_output_line(line, progress_callback, on_event)
+            last_file = filepath or last_file
+            if keep_going is False:
+                process.terminate()
                 try:
-                    success, _ = future.result()
-                    results[url] = success
-                except Exception as e:
-                    if progress_callback:
-                        progress_callback(f"Failed to process {url}: {str(e)}")
-                    results[url] = False
-        return results
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                return None, last_file
+
+        process.wait()
+        return process.returncode == 0, last_file
+
+    def _rediscover_ytdlp(self, cmd: List[str]) -> List[str]:
+        """Called when the (possibly cached) yt-dlp command failed to start: finds yt-dlp again and rebuilds cmd."""
+        stale = self.ytdlp_cmd
+        self.tools.forget(stale)
+        self.ytdlp_cmd = self.find_ytdlp()
+        self.logger.info(f"yt-dlp moved; now using {' '.join(self.ytdlp_cmd)}")
+        return self.ytdlp_cmd + cmd[len(stale):]
+
+    def _event_handler(self, url: str, progress_callback: Optional[Callable[[str], None]], progress_hook: Optional[Callable[[ProgressEvent], Optional[bool]]]) -> Callable[[ProgressEvent], Optional[bool]]:
+        """Tags events with their URL and routes them to progress_hook, or to progress_callback as text."""
+        def on_event(event: ProgressEvent):
+            event.url = url
+            self.ffmpeg.observe(event)
+            if progress_hook:
+                return progress_hook(event)
+            if progress_callback:
+                return progress_callback(str(event))
+        return on_event
+
+    def _handle_output_line(self, line: str, progress_callback: Optional[Callable[[str], None]], on_event: Optional[Callable[[ProgressEvent], Optional[bool]]]) -> Tuple[Optional[bool], Optional[str]]:
+        """Dispatches one line of yt-dlp output. Returns (callback result, final file path if the line reported one)."""
+        line = line.strip()
+        if not line:
+            return True, None
+        event = ProgressEvent.from_line(line)
+        if event is None:
+            return (progress_callback(line) if progress_callback else True), None
+        filepath = event.filepath if event.phase in (PHASE_FINISHED, PHASE_POSTPROCESSED) else None
+        return (on_event(event) if on_event else True), filepath
+
+    def _after_download(self, last_file: Optional[str], metadata: Optional[Dict[str, Any]] = None):
+        """Runs the post-process script and plugins on a successfully downloaded file."""
+        if last_file and os.path.exists(last_file):
+            if self.postprocess_script:
+                self.run_postprocess(last_file)
+            if self.plugin_dir:
+                self.run_plugin_dir(last_file, metadata)
+
+    def _plugin_metadata(self, url: str, path: Optional[str], info_file: Optional[str] = None) -> Dict[str, Any]:
+        """What plugins get besides the path: the source URL and, if it was probed, its info JSON file."""
+        return {"url": url, "path": path, "info_file": info_file}
+
+    def _info_variant(self, cookie_file: Optional[str] = None, proxy: Optional[str] = None, user_agent: Optional[str] = None) -> str:
+        """The info cache variant for these settings: cookies, proxy and user agent can change what extraction returns."""
+        cookies = None
+        if cookie_file and os.path.exists(cookie_file):
+            # Edited or refreshed cookies are a new variant as well
+            stat = os.stat(cookie_file)
+            cookies = [os.path.realpath(cookie_file), stat.st_mtime_ns, stat.st_size]
+        return json.dumps([cookies, proxy or self.proxy or None, user_agent or self.user_agent or None])
+
+    def batch_download(self, urls: Iterable[str], output_dir: str, quality: str, audio_only: bool, playlist: bool, cookie_file: Optional[str], parallel: int, progress_callback: Optional[Callable[[str], None]] = None, progress_hook: Optional[Callable[[ProgressEvent], Optional[bool]]] = None, per_host_limit: Optional[int] = None, host_interval: float = 0.0, retry_policy: Optional[RetryPolicy] = None) -> Dict[str, bool]:
+        return {result.url: result.success for result in self.iter_batch_download(urls, output_dir, quality, audio_only, playlist, cookie_file, parallel, progress_callback, progress_hook, per_host_limit, host_interval, retry_policy)}
+
+    def iter_batch_download(self, urls: Iterable[str], output_dir: str, quality: str, audio_only: bool, playlist: bool, cookie_file: Optional[str], parallel: int, progress_callback: Optional[Callable[[str], None]] = None, progress_hook: Optional[Callable[[ProgressEvent], Optional[bool]]] = None, per_host_limit: Optional[int] = None, host_interval: float = 0.0, retry_policy: Optional[RetryPolicy] = None) -> Iterator[DownloadResult]:
+        """Downloads URLs from any iterable, yielding a DownloadResult as each one finishes.
+
+        URLs are pulled from the iterable only as worker slots free up, so a generator
+        over a huge batch file is never materialised in memory. per_host_limit and
+        host_interval (seconds between starts) throttle each host independently.
+        Transient failures are retried according to retry_policy (default: self.retry_policy).
+        """
+        run = lambda url: self._download_batch_item(url, output_dir, quality, audio_only, playlist, cookie_file, progress_callback, progress_hook)
+        for _, result in self._run_batch(urls, run, parallel, per_host_limit, host_interval, retry_policy, progress_callback):
+            yield result
+
+    async def abatch_download(self, urls: Union[Iterable[str], AsyncIterable[str]], output_dir: str, quality: str, audio_only: bool, playlist: bool, cookie_file: Optional[str], parallel: int, progress_callback: Optional[Callable[[str], None]] = None, progress_hook: Optional[Callable[[ProgressEvent], Optional[bool]]] = None, timeout: Optional[float] = None) -> Dict[str, bool]:
+        """Async counterpart of batch_download, supervising up to `parallel` downloads on the running event loop."""
+        from .async_downloader import AsyncDownloader  # asyncio costs ~35 ms to import; only async callers pay it
+        runner = AsyncDownloader(self, concurrency=parallel, timeout=timeout)
+        try:
+            return {result.url: result.success async for result in runner.iter_batch_download(urls, output_dir, quality, audio_only, playlist, cookie_file, progress_callback, progress_hook)}
+        finally:
+            runner.close()
 
-    def detect_formats(self, url: str) -> List[str]:
+    def download_jobs(self, store: JobStore, output_dir: str, quality: str, audio_only: bool, playlist: bool, cookie_file: Optional[str], parallel: int, progress_callback: Optional[Callable[[str], None]] = None, progress_hook: Optional[Callable[[ProgressEvent], Optional[bool]]] = None, per_host_limit: Optional[int] = None, host_interval: float = 0.0, retry_policy: Optional[RetryPolicy] = None) -> Iterator[DownloadResult]:
+        """Runs the queued jobs of a JobStore, yielding a DownloadResult as each one finishes.
+
+        Jobs are claimed a few at a time and every outcome is written back to the store,
+        so an interrupted batch resumes from the first unfinished URL.
+        """
+        run = lambda job: self._download_batch_item(job[1], output_dir, quality, audio_only, playlist, cookie_file, progress_callback, progress_hook)
+        on_retry = lambda job, result: store.note_retry(job[0], result.failure, result.error)
+        jobs = store.iter_claimed(chunk_size=max(1, parallel) * 2)
+        for (job_id, _), result in self._run_batch(jobs, run, parallel, per_host_limit, host_interval, retry_policy, progress_callback, key=lambda job: job[1], on_retry=on_retry):
+            if result.success:
+                store.mark_done(job_id, result.path)
+            else:
+                store.mark_failed(job_id, result.error, result.path, result.failure)
+            yield result
+
+    def _run_batch(self, items: Iterable[Any], run_item: Callable[[Any], DownloadResult], parallel: int, per_host_limit: Optional[int], host_interval: float, retry_policy: Optional[RetryPolicy], progress_callback: Optional[Callable[[str], None]], key: Callable[[Any], str] = lambda item: item, on_retry: Optional[Callable[[Any, DownloadResult], None]] = None) -> Iterator[Tuple[Any, DownloadResult]]:
+        """Shared batch loop: schedules items onto a thread pool and yields (item, final result).
+
+        Items come from a HostScheduler, which pulls them lazily from the source. Failed
+        items that the retry policy accepts are requeued there with their backoff delay,
+        so waiting for a retry never occupies a worker thread. Finished downloads are
+        post-processed on the separate post-processing pool while the download worker
+        moves on; an item is yielded once both stages are done.
+        """
+        workers = max(1, parallel)
+        retry_policy = retry_policy or self.retry_policy
+        self.governor.expect(workers)
+        limited = bool(per_host_limit or host_interval)
+        # With host limits, only submit into idle threads so spacing is measured from real start times
+        window = workers if limited else workers * 2
+        scheduler = HostScheduler(items, per_host_limit if limited else None, host_interval, lookahead=1000 if limited else window, key=key)
+        attempts: Dict[str, int] = {}
+        resumed = 0
+        # Bounds the post-processing queue so a slow plugin eventually holds back new downloads
+        backlog = self.postprocess_workers * 4
+
+        def run(item):
+            try:
+                return run_item(item)
+            finally:
+                scheduler.release(item)
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pending: Dict[Future, Any] = {}
+                postprocessing: Dict[Future, Tuple[Any, DownloadResult]] = {}
+                while True:
+                    delay = None
+                    while len(pending) < window and len(postprocessing) < backlog:
+                        item, delay = scheduler.poll()
+                        if item is NOTHING_READY:
+                            break
+                        pending[executor.submit(run, item)] = item
+                    if not pending and not postprocessing:
+                        if scheduler.drained():
+                            if resumed and progress_callback:
+                                progress_callback(f"Resuming partial downloads saved {format_bytes(resumed)}")
+                            return
+                        # Only delayed retries or host spacing remain; sleep until the next one is due
+                        time.sleep(delay if delay is not None else 0.1)
+                        continue
+                    done, _ = wait(list(pending) + list(postprocessing), timeout=delay, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future in postprocessing:
+                            item, result = postprocessing.pop(future)
+                            if future.exception() is not None:
+                                self.logger.error(f"Post-processing {result.path} failed: {future.exception()}")
+                            yield item, result
+                            continue
+                        item = pending.pop(future)
+                        url = key(item)
+                        result = self._batch_item_result(url, future, progress_callback)
+                        result.attempts = attempts.pop(url, 0) + 1
+                        resumed += result.resumed_bytes
+                        if retry_policy.should_retry(result.failure, result.attempts):
+                            backoff = retry_policy.delay(result.failure, result.attempts)
+                            attempts[url] = result.attempts
+                            scheduler.requeue(item, backoff)
+                            if progress_callback:
+                                progress_callback(f"[{url}] Attempt {result.attempts} failed ({result.failure}); retrying in {backoff:.1f} s")
+                            if on_retry:
+                                on_retry(item, result)
+                            continue
+                        if self._needs_postprocess(result):
+                            postprocessing[self.submit_postprocess(result.path, self._plugin_metadata(result.url, result.path, result.info_file))] = (item, result)
+                            continue
+                        yield item, result
+        finally:
+            self.governor.expect(1)
+
+    def _download_batch_item(self, url: str, output_dir: str, quality: str, audio_only: bool, playlist: bool, cookie_file: Optional[str], progress_callback: Optional[Callable[[str], None]], progress_hook: Optional[Callable[[ProgressEvent], Optional[bool]]]) -> DownloadResult:
+        prefixed = (lambda msg: progress_callback(f"[{url}] {msg}")) if progress_callback else None
+        # The scheduler may have pulled this URL well before a worker got to it; the caller can still drop it here
+        if prefixed is not None and prefixed("Starting download") is False:
+            return DownloadResult(url, False, failure=FAILURE_CANCELLED)
+        return self.download_result(url, output_dir, quality, audio_only, playlist, cookie_file, prefixed, progress_hook=progress_hook, postprocess=False)
+
+    def _batch_item_result(self, url: str, future: Future, progress_callback: Optional[Callable[[str], None]]) -> DownloadResult:
+        try:
+            return future.result()
+        except Exception as e:
+            if progress_callback:
+                progress_callback(f"Failed to process {url}: {str(e)}")
+            return DownloadResult(url, False, failure=classify_failure([str(e)]), error=str(e))
+
+    def detect_formats(self, url: str, cookie_file: Optional[str] = None) -> List[str]:
         if not url or not is_valid_url(url):
             return []
+        info = self.probe(url, cookie_file) or {}
+        formats = info.get("formats")
+        if formats is None:
+            # Direct links and some extractors return a single format at the top level
+            return [info["format_id"]] if info.get("format_id") else []
+        return [f["format_id"] for f in formats if f.get("format_id")][:20]
+
+    def probe(self, url: str, cookie_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Extracts (or loads from the info cache) the metadata of a single video without downloading it.
+
+        Pass the cookie file the download will use: the cached info is reused for it, so a
+        cookie-gated URL must be extracted with the same cookies.
+        """
+        variant = self._info_variant(cookie_file)
+        info = self.info_cache.get(url, variant)
+        if info is not None:
+            return info
         try:
-            cmd = self.ytdlp_cmd + [url, "--list-formats", "--no-download"]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30, creationflags=self.CREATE_NO_WINDOW)
-            formats = []
-            if result.returncode == 0:
-                for line in result.stdout.splitlines():
-                    if line.strip() and not line.startswith('[') and '|' in line:
-                        parts = line.split()
-                        if len(parts) > 0 and parts[0] not in ['format', 'code', 'ID']:
-                            formats.append(parts[0])
-            return formats[:20]
+            if self.engine == ENGINE_INPROCESS:
+                params = self.build_params(".", cookie_file=cookie_file)
+                # An archived video would otherwise be skipped without returning any info
+                params.pop("download_archive", None)
+                info = self.inprocess.extract_info(url, params)
+            else:
+                cmd = self.ytdlp_cmd + [url, "--dump-single-json", "--no-playlist"]
+                if self.proxy:
+                    cmd.extend(["--proxy", self.proxy])
+                if self.user_agent:
+                    cmd.extend(["--user-agent", self.user_agent])
+                if cookie_file and os.path.exists(cookie_file):
+                    cmd.extend(["--cookies", cookie_file])
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30, creationflags=self.CREATE_NO_WINDOW)
+                info = json.loads(result.stdout) if result.returncode == 0 else None
         except Exception:
-            return []
+            return None
+        if info:
+            self.info_cache.put(url, info, variant)
+        return info
 
     def validate_cookie_file(self, path: str) -> bool:
         if not os.path.exists(path):
@@ -267,17 +737,10 @@ class VideoDownloader:
 
     def check_dependencies(self) -> Dict[str, str]:
         status = {"yt-dlp": "Not found", "ffmpeg": "Not found"}
-        try:
-            subprocess.run(self.ytdlp_cmd + ["--version"], capture_output=True, check=True, creationflags=self.CREATE_NO_WINDOW)
+        if self.tools.works(self.ytdlp_cmd):
             status["yt-dlp"] = "Installed"
-        except Exception:
-            pass
-        
+
         if self.ffmpeg_path:
-            try:
-                subprocess.run([self.ffmpeg_path, "-version"], capture_output=True, check=True, creationflags=self.CREATE_NO_WINDOW)
-                status["ffmpeg"] = "Installed"
-            except Exception:
-                status["ffmpeg"] = "Found but seems broken"
-                
+            status["ffmpeg"] = "Installed" if self.ffmpeg.available else "Found but seems broken"
+
         return status 
\ No newline at end of file
@@ -0,0 +1,201 @@
+import importlib.util
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Callable, Dict, Any, Tuple
+from urllib.parse import urlsplit
+
+from .bandwidth import Lease
+from .progress import ProgressEvent, PHASE_FINISHED, PHASE_POSTPROCESSED
+
+ENGINE_SUBPROCESS = "subprocess"
+ENGINE_INPROCESS = "inprocess"
+ENGINES = (ENGINE_SUBPROCESS, ENGINE_INPROCESS)
+
+
+def ytdlp_importable() -> bool:
+    """Returns True if the yt_dlp package can be imported in this interpreter."""
+    return importlib.util.find_spec("yt_dlp") is not None
+
+
+class _CallbackLogger:
+    """Routes yt-dlp log output to the engine's current line callback."""
+    def __init__(self, engine: "InProcessEngine"):
+        self.engine = engine
+
+    def debug(self, msg: str):
+        # yt-dlp sends regular info messages through debug() as well, prefixed with '[debug] ' only when verbose
+        if not msg.startswith('[debug] '):
+            self.engine._emit(msg)
+
+    def info(self, msg: str):
+        self.engine._emit(msg)
+
+    def warning(self, msg: str):
+        self.engine._emit(f"WARNING: {msg}")
+
+    def error(self, msg: str):
+        self.engine._emit(msg)
+
+
+class InProcessEngine:
+    """Drives yt_dlp.YoutubeDL inside the current process.
+
+    The extractor registry is imported once and each worker thread keeps its own
+    YoutubeDL instance per option set, so initialised extractors are reused
+    across downloads instead of being rebuilt by a fresh interpreter per URL.
+    Each thread keeps at most `max_instances` option sets (least recently used
+    first out, closed on eviction), as output directory, format, cookies and
+    rate limit all make a new one.
+    """
+    def __init__(self, logger: Optional[logging.Logger] = None, max_instances: int = 4):
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_instances = max(1, max_instances)
+        self._local = threading.local()
+        self._warm_lock = threading.Lock()
+        self._yt_dlp = None
+        self._extractors = []
+        # host -> extractor that last matched there (None: only the generic extractor does)
+        self._host_extractors: "OrderedDict[str, Any]" = OrderedDict()
+        self._max_hosts = 256
+
+    def warm(self):
+        """Imports yt_dlp and its extractor registry (only once per process)."""
+        if self._yt_dlp is not None:
+            return self._yt_dlp
+        with self._warm_lock:
+            if self._yt_dlp is None:
+                import yt_dlp
+                # Force the (lazy) extractor list to load now rather than on the first download
+                self._extractors = list(yt_dlp.extractor.gen_extractor_classes())
+                self._yt_dlp = yt_dlp
+        return self._yt_dlp
+
+    @property
+    def warmed(self) -> bool:
+        return self._yt_dlp is not None
+
+    def archive_id(self, url: str) -> Optional[str]:
+        """Returns the yt-dlp archive entry ("<extractor> <id>") for a URL without extracting it.
+
+        None if only the generic extractor matches or the ID isn't part of the URL. The extractor
+        that matched is remembered per host, so later URLs from the same site skip the full scan
+        (and hosts only the generic extractor handles are answered straight away).
+        """
+        yt_dlp = self.warm()
+        host = (urlsplit(url).hostname or "").lower()
+        if host.startswith("www."):
+            host = host[4:]
+        with self._warm_lock:
+            known = host in self._host_extractors
+            ie = self._host_extractors.get(host)
+            if known:
+                self._host_extractors.move_to_end(host)
+        if known and ie is None:
+            return None
+        if ie is None or not ie.suitable(url):
+            ie = next((candidate for candidate in self._extractors if candidate.suitable(url)), None)
+            if ie is not None and ie.ie_key() == "Generic":
+                ie = None
+            with self._warm_lock:
+                self._host_extractors[host] = ie
+                self._host_extractors.move_to_end(host)
+                if len(self._host_extractors) > self._max_hosts:
+                    self._host_extractors.popitem(last=False)
+        if ie is None:
+            return None
+        video_id = ie.get_temp_id(url)
+        return yt_dlp.utils.make_archive_id(ie, video_id) if video_id else None
+
+    def _emit(self, line: str):
+        callback = getattr(self._local, 'callback', None)
+        if callback and line and callback(line) is False:
+            self._local.cancelled = True
+
+    def _emit_event(self, event: ProgressEvent):
+        if event.phase in (PHASE_FINISHED, PHASE_POSTPROCESSED) and event.filepath:
+            self._local.last_file = event.filepath
+        event_callback = getattr(self._local, 'event_callback', None)
+        if event_callback and event_callback(event) is False:
+            self._local.cancelled = True
+        if getattr(self._local, 'cancelled', False):
+            raise self._yt_dlp.utils.DownloadCancelled()
+
+    def _progress_hook(self, status: Dict[str, Any]):
+        lease = getattr(self._local, 'lease', None)
+        if lease is not None:
+            lease.observe(status.get('speed'))
+            # The downloader re-reads params['ratelimit'] for every block, so a rebalanced share applies at once
+            self._local.ydl.params['ratelimit'] = lease.rate
+        self._emit_event(ProgressEvent.from_download_status(status))
+
+    def _postprocessor_hook(self, status: Dict[str, Any]):
+        self._emit_event(ProgressEvent.from_postprocess_status(status, status.get('info_dict', {}).get('filepath')))
+
+    def _get_ydl(self, params: Dict[str, Any]):
+        """Returns this thread's YoutubeDL for the given params, creating it on first use."""
+        yt_dlp = self.warm()
+        instances = getattr(self._local, 'instances', None)
+        if instances is None:
+            instances = self._local.instances = OrderedDict()
+        key = repr(sorted(params.items()))
+        ydl = instances.get(key)
+        if ydl is not None:
+            instances.move_to_end(key)
+            return ydl
+        while len(instances) >= self.max_instances:
+            _, evicted = instances.popitem(last=False)
+            try:
+                evicted.close()
+            except Exception as e:
+                self.logger.debug(f"Closing a cached YoutubeDL failed: {e}")
+        opts = dict(params, logger=_CallbackLogger(self), noprogress=True,
+                    progress_hooks=[self._progress_hook], postprocessor_hooks=[self._postprocessor_hook])
+        ydl = instances[key] = yt_dlp.YoutubeDL(opts)
+        return ydl
+
+    def download(self, url: str, params: Dict[str, Any], line_callback: Optional[Callable[[str], Any]] = None, event_callback: Optional[Callable[[ProgressEvent], Any]] = None, info_file: Optional[str] = None, lease: Optional[Lease] = None) -> Tuple[bool, Optional[str], bool]:
+        """Downloads a single URL. Returns (success, last_file, cancelled).
+
+        With info_file, the previously extracted info JSON is used instead of running the extractor again.
+        With a bandwidth lease, the rate limit follows the lease's share while the download runs.
+        Either callback returning False cancels the download.
+        """
+        ydl = self._get_ydl(params)
+        if lease is not None:
+            ydl.params['ratelimit'] = lease.rate
+        self._local.ydl = ydl
+        self._local.lease = lease
+        self._local.callback = line_callback
+        self._local.event_callback = event_callback
+        self._local.cancelled = False
+        self._local.last_file = None
+        try:
+            # The return code is sticky on a reused instance, so clear the previous download's failure
+            ydl._download_retcode = 0
+            retcode = ydl.download_with_info_file(info_file) if info_file else ydl.download([url])
+            return retcode == 0 and not self._local.cancelled, self._local.last_file, self._local.cancelled
+        except self._yt_dlp.utils.DownloadCancelled:
+            return False, self._local.last_file, True
+        except self._yt_dlp.utils.DownloadError as e:
+            self._emit(f"ERROR: {e}")
+            return False, self._local.last_file, False
+        finally:
+            if lease is not None:
+                # Keep the cached instance matching the params it is cached under
+                ydl.params['ratelimit'] = params.get('ratelimit')
+            self._local.lease = None
+            self._local.callback = None
+            self._local.event_callback = None
+
+    def extract_info(self, url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Extracts metadata for a URL without downloading it."""
+        ydl = self._get_ydl(dict(params, skip_download=True))
+        self._local.callback = None
+        self._local.event_callback = None
+        self._local.cancelled = False
+        try:
+            info = ydl.extract_info(url, download=False)
+            return ydl.sanitize_info(info) if info else None
+        except self._yt_dlp.utils.DownloadError:
+            return None
@@ -0,0 +1,190 @@
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, FrozenSet, Tuple, Deque
+
+from .progress import ProgressEvent, PHASE_POSTPROCESSING, PHASE_POSTPROCESSED
+from .tools import ToolCache
+
+# Target audio codec -> ffmpeg encoders able to produce it, preferred first
+AUDIO_ENCODERS: Dict[str, Tuple[str, ...]] = {
+    "mp3": ("libmp3lame", "mp3_mf", "mp3"),
+    "aac": ("aac", "libfdk_aac", "aac_mf"),
+    "m4a": ("aac", "libfdk_aac", "aac_mf"),
+    "opus": ("libopus", "opus"),
+    "vorbis": ("libvorbis", "vorbis"),
+    "flac": ("flac",),
+    "wav": ("pcm_s16le",),
+}
+
+
+def canonical_acodec(acodec: Optional[str]) -> Optional[str]:
+    """Maps a yt-dlp acodec string ('mp4a.40.2', 'opus', 'mp3') to the codec name used by --audio-format."""
+    if not acodec or acodec == "none":
+        return None
+    acodec = acodec.lower()
+    if acodec.startswith("mp4a") or acodec == "aac":
+        return "aac"
+    return acodec.split(".")[0]
+
+
+def _listed_names(output: str) -> FrozenSet[str]:
+    """Parses the `ffmpeg -encoders` / `-muxers` tables: flag column, name column, description after a '--' rule."""
+    names = set()
+    started = False
+    for line in output.splitlines():
+        if not started:
+            started = line.strip().startswith("--")
+            continue
+        parts = line.split()
+        if len(parts) >= 2:
+            names.update(parts[1].split(","))
+    return frozenset(names)
+
+
+@dataclass
+class FFmpegCapabilities:
+    """What the configured ffmpeg build can encode and write."""
+    path: str
+    version: str
+    encoders: FrozenSet[str]
+    muxers: FrozenSet[str]
+
+    def can_encode(self, codec: str) -> bool:
+        return any(encoder in self.encoders for encoder in AUDIO_ENCODERS.get(codec, (codec,)))
+
+    def can_mux(self, container: str) -> bool:
+        return container in self.muxers
+
+
+@dataclass
+class AudioPlan:
+    """How an audio-only download gets to its target codec, decided before yt-dlp starts.
+
+    copy=True means no transcode: either a source stream already in `codec` is
+    selected (yt-dlp then leaves the file as is), or codec is 'best' and the
+    source codec is kept.
+    """
+    codec: str
+    copy: bool
+    format: str
+    reason: str
+
+
+@dataclass
+class PostprocessTiming:
+    url: Optional[str]
+    postprocessor: str
+    filepath: Optional[str]
+    seconds: float
+
+
+class FFmpegManager:
+    """Probes an ffmpeg build once and plans and times the work yt-dlp gives it.
+
+    The version, encoder and muxer lists come from ToolCache, so they are
+    read from disk on every start after the first and re-probed only when
+    the ffmpeg binary changes. `available` needs only the version; the
+    encoder and muxer lists are loaded the first time an audio plan needs them. observe() times every post-processor step
+    (merges, audio extraction, fixups) from the progress events of either
+    engine; see stats() and the per-step log lines.
+    """
+    def __init__(self, path: Optional[str], tools: ToolCache, logger: Optional[logging.Logger] = None, history: int = 100):
+        self.path = path
+        self.tools = tools
+        self.logger = logger or logging.getLogger(__name__)
+        self.timings: Deque[PostprocessTiming] = deque(maxlen=history)
+        self._version: Optional[str] = None
+        self._version_probed = False
+        self._capabilities: Optional[FFmpegCapabilities] = None
+        self._probed = False
+        self._started: Dict[Tuple[Optional[str], str], float] = {}
+        self._totals: Dict[str, List[float]] = {}  # postprocessor -> [count, seconds, slowest]
+        self._lock = threading.Lock()
+
+    def version(self) -> Optional[str]:
+        """Returns the build's version line, or None if there is no working ffmpeg. Probed at most once per instance."""
+        with self._lock:
+            if self._version_probed:
+                return self._version
+        version = self.tools.version([self.path], "-version") if self.path else None
+        with self._lock:
+            self._version, self._version_probed = version, True
+        return version
+
+    def capabilities(self) -> Optional[FFmpegCapabilities]:
+        """Returns the build's capabilities, or None if there is no working ffmpeg. Probed at most once per instance.
+
+        Only the audio plan needs the encoder and muxer lists, so they are read on first use
+        rather than with the version probe.
+        """
+        with self._lock:
+            if self._probed:
+                return self._capabilities
+        capabilities = None
+        version = self.version()
+        if version is not None:
+            cmd = [self.path]
+            encoders = self.tools.output(cmd, ["-hide_banner", "-encoders"]) or ""
+            muxers = self.tools.output(cmd, ["-hide_banner", "-muxers"]) or ""
+            capabilities = FFmpegCapabilities(self.path, version, _listed_names(encoders), _listed_names(muxers))
+        with self._lock:
+            self._capabilities, self._probed = capabilities, True
+        return capabilities
+
+    @property
+    def available(self) -> bool:
+        return self.version() is not None
+
+    def audio_plan(self, codec: str = "mp3", quality_kbps: int = 192, info: Optional[Dict[str, Any]] = None) -> AudioPlan:
+        """Decides between selecting a matching source stream, transcoding, or keeping the source codec.
+
+        With extracted info, an audio-only format already in `codec` is picked
+        when its bitrate is at least min(quality_kbps, best available), so no
+        transcode happens. Without a matching stream the audio is transcoded,
+        unless the ffmpeg build can't encode `codec`; then the source codec is kept.
+        """
+        audio = [f for f in (info or {}).get("formats") or []
+                 if f.get("format_id") and f.get("vcodec") == "none" and canonical_acodec(f.get("acodec"))]
+        if audio:
+            bitrate = lambda f: f.get("abr") or f.get("tbr") or 0
+            best = max(bitrate(f) for f in audio)
+            matching = [f for f in audio if canonical_acodec(f.get("acodec")) == codec]
+            if matching:
+                chosen = max(matching, key=bitrate)
+                if bitrate(chosen) >= min(quality_kbps, best):
+                    return AudioPlan(codec, True, f"{chosen['format_id']}/bestaudio/best",
+                                     f"source stream {chosen['format_id']} is already {codec}")
+        capabilities = self.capabilities()
+        if capabilities is not None and not capabilities.can_encode(codec):
+            return AudioPlan("best", True, "bestaudio/best", f"{self.path} has no {codec} encoder; keeping the source codec")
+        return AudioPlan(codec, False, "bestaudio/best", f"transcoding to {codec}")
+
+    def observe(self, event: ProgressEvent):
+        """Times post-processor steps from progress events; call it with every event of a download."""
+        if event.phase not in (PHASE_POSTPROCESSING, PHASE_POSTPROCESSED) or not event.postprocessor:
+            return
+        key = (event.url, event.postprocessor)
+        now = time.perf_counter()
+        with self._lock:
+            if event.phase == PHASE_POSTPROCESSING:
+                self._started.setdefault(key, now)
+                return
+            started = self._started.pop(key, None)
+            if started is None:
+                return
+            seconds = now - started
+            self.timings.append(PostprocessTiming(event.url, event.postprocessor, event.filepath, seconds))
+            totals = self._totals.setdefault(event.postprocessor, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+        self.logger.info(f"[{event.postprocessor}] took {seconds:.2f} s: {event.filepath}")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Returns {postprocessor: {"count", "seconds", "mean_s", "max_s"}} for every step timed so far."""
+        with self._lock:
+            return {name: {"count": count, "seconds": seconds, "mean_s": seconds / count if count else 0.0, "max_s": slowest}
+                    for name, (count, seconds, slowest) in self._totals.items()}
@@ -1,12 +1,13 @@
 import datetime
 import os
-import re
 import sys
 import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, scrolledtext
 import webbrowser
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, Any, List, Optional
 
 try:
     from ttkthemes import ThemedTk
@@ -20,13 +21,49 @@ try:
 except ImportError:
     HAS_NOTIFICATIONS = False
 
+from .archive import DownloadArchive
 from .settings import Settings
 from .downloader import VideoDownloader
 from .i18n import get_translator
-from .utils import ToolTip, is_valid_url
+from .logbuffer import LogBuffer
+from .progress import ProgressPump, PHASE_DOWNLOADING, PHASE_FINISHED, PHASE_POSTPROCESSING, PHASE_POSTPROCESSED, PHASE_ERROR
+from .utils import PathCache, ToolTip, is_valid_url
+from .widgets import LogView, JobTable, HistoryView
 
 APP_NAME = "Moaz Video Downloader"
 APP_VERSION = "1.0"
+# The UI is refreshed from worker output at most this often
+FRAME_MS = 33
+# Files listed on the recent downloads tab
+RECENT_DOWNLOADS = 15
+
+@dataclass
+class GuiJob:
+    """One download shown in the job table. Pausing stops it; resuming runs it again and yt-dlp continues the .part file."""
+    id: str
+    url: str
+    options: Dict[str, Any] = field(default_factory=dict)
+    running: bool = False
+    cancel_requested: bool = False
+    pause_requested: bool = False
+    batch: Optional["BatchRun"] = None
+
+@dataclass
+class BatchRun:
+    """A batch tab run: its jobs by URL and the counts behind the aggregate progress bar."""
+    jobs: Dict[str, GuiJob]
+    succeeded: int = 0
+    failed: int = 0
+    stopped: int = 0  # cancelled or paused; a resumed job leaves the batch
+    percents: Dict[str, float] = field(default_factory=dict)  # job id -> percent of the jobs in progress
+
+    @property
+    def finished(self) -> int:
+        return self.succeeded + self.failed + self.stopped
+
+    @property
+    def percent(self) -> float:
+        return (self.finished * 100 + sum(self.percents.values())) / max(1, len(self.jobs))
 
 class DownloaderGUI:
     """Tkinter-based GUI for the downloader, with post-processing plugin support."""
@@ -56,6 +93,7 @@ class DownloaderGUI:
         self.apply_theme()
         self.check_dependencies()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.root.after(FRAME_MS, self._on_frame)
         
         try:
             if self.icon_path and os.path.exists(self.icon_path):
@@ -90,11 +128,21 @@ class DownloaderGUI:
         self.plugin_dir_var = tk.StringVar(value=self.settings.data.get('plugin_dir', ''))
         self.skip_downloaded_var = tk.BooleanVar(value=self.settings.data.get('skip_downloaded', True))
         
-        self.log_lines = []
+        # Worker threads append here directly; _on_frame moves new lines into the log widget
+        # Progress events are coalesced per download and applied once per frame
+        self.progress_pump = ProgressPump()
+        self.log = LogBuffer(self.settings.data.get('log_max_lines', 5000), self.settings.data.get('log_file') or None)
         self.recent_urls = self.settings.data.get('recent_urls', [])
         self.recent_batch_files = self.settings.data.get('recent_batch_files', [])
-        self.download_threads = []
-        self.cancel_requested = False
+        # Downloads that are running or paused, by job id; finished ones stay in the table only
+        self.jobs: Dict[str, GuiJob] = {}
+        self._job_counter = 0
+        self.batch: Optional[BatchRun] = None
+        # Existence of recent download files, checked off the main loop
+        self.path_cache = PathCache()
+        self._recent_generation = 0
+        self._recent_pending = False
+        self._history_filter_after = None
         
         self.language_var = tk.StringVar(value=self.language)
         self.language_short_names = ['En', 'Es', 'Fr', 'De', 'It', 'Pt', 'Ru', 'Zh', 'Ja', 'Ar']
@@ -174,17 +222,29 @@ class DownloaderGUI:
         self.download_btn.pack(side=tk.LEFT, padx=5)
         self.cancel_btn = ttk.Button(self.button_frame, text=self.t('cancel'), command=self.cancel_download, state=tk.DISABLED)
         self.cancel_btn.pack(side=tk.LEFT, padx=5)
+        self.pause_btn = ttk.Button(self.button_frame, text=self.t('pause'), command=self.pause_downloads, state=tk.DISABLED)
+        self.pause_btn.pack(side=tk.LEFT, padx=5)
+        self.resume_btn = ttk.Button(self.button_frame, text=self.t('resume'), command=self.resume_downloads, state=tk.DISABLED)
+        self.resume_btn.pack(side=tk.LEFT, padx=5)
+        self.clear_finished_btn = ttk.Button(self.button_frame, text=self.t('clear_finished'), command=self.clear_finished_jobs)
+        self.clear_finished_btn.pack(side=tk.LEFT, padx=5)
 
         self.status_label = ttk.Label(self.download_bg_frame, text=self.t('status'))
         self.status_label.grid(row=8, column=0, sticky=tk.W, pady=5, padx=5)
         ttk.Label(self.download_bg_frame, textvariable=self.progress_text, foreground="blue").grid(row=8, column=1, sticky=tk.W, pady=5, padx=5)
         
-        self.progress_canvas = tk.Canvas(self.download_bg_frame, height=20, width=300, highlightthickness=0, bd=0)
-        self.progress_canvas.grid(row=9, column=1, columnspan=3, sticky=tk.W, pady=5, padx=5)
-        self.draw_progress_bar(0)
+        headings = {'title': self.t('job_title'), 'status': self.t('job_status'), 'progress': self.t('job_progress'),
+                    'speed': self.t('job_speed'), 'eta': self.t('job_eta')}
+        self.job_table = JobTable(self.download_bg_frame, headings, height=8)
+        self.job_table.frame.grid(row=9, column=0, columnspan=4, sticky=tk.EW, pady=5, padx=5)
+        self.job_table.tree.bind('<<TreeviewSelect>>', lambda event: self._update_job_buttons())
+        self.phase_labels = {PHASE_DOWNLOADING: self.t('downloading'), PHASE_FINISHED: self.t('post_processing'),
+                             PHASE_POSTPROCESSING: self.t('post_processing'), PHASE_POSTPROCESSED: self.t('post_processing'),
+                             PHASE_ERROR: self.t('failed')}
         
         self.output_text = scrolledtext.ScrolledText(self.download_bg_frame, height=8, width=80, wrap=tk.WORD)
         self.output_text.grid(row=11, column=0, columnspan=4, sticky=tk.EW, pady=5, padx=5)
+        self.log_view = LogView(self.output_text, self.log)
 
     def _setup_batch_tab(self):
         batch_frame = ttk.Frame(self.nb, padding=10)
@@ -212,6 +272,11 @@ class DownloaderGUI:
         self.batch_download_btn = ttk.Button(batch_frame, text=self.t('batch_download'), command=self.start_batch_download)
         self.batch_download_btn.grid(row=4, column=0, columnspan=3, pady=10)
 
+        self.batch_progress = ttk.Progressbar(batch_frame, orient=tk.HORIZONTAL, mode='determinate', maximum=100)
+        self.batch_progress.grid(row=5, column=0, columnspan=3, sticky=tk.EW, padx=5)
+        self.batch_status = tk.StringVar(value="")
+        ttk.Label(batch_frame, textvariable=self.batch_status).grid(row=6, column=0, columnspan=3, sticky=tk.W, padx=5, pady=5)
+
     def _setup_settings_tab(self):
         self.settings_frame = ttk.Frame(self.nb, padding=10)
         self.nb.add(self.settings_frame, text=self.t('settings'))
@@ -261,13 +326,32 @@ class DownloaderGUI:
     def _setup_history_tab(self):
         history_frame = ttk.Frame(self.nb, padding=10)
         self.nb.add(history_frame, text=self.t('history'))
-        history_frame.grid_rowconfigure(0, weight=1)
+        history_frame.grid_rowconfigure(1, weight=1)
         history_frame.grid_columnconfigure(0, weight=1)
-        self.history_text = scrolledtext.ScrolledText(history_frame, height=20, width=100, wrap=tk.WORD, state=tk.DISABLED)
-        self.history_text.grid(row=0, column=0, sticky="nsew")
+        filter_frame = ttk.Frame(history_frame)
+        filter_frame.grid(row=0, column=0, sticky="ew", pady=(0, 5))
+        filter_frame.grid_columnconfigure(1, weight=1)
+        ttk.Label(filter_frame, text=self.t('search')).grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
+        self.history_search_var = tk.StringVar()
+        self.history_search_var.trace_add('write', lambda *args: self._schedule_history_filter())
+        ttk.Entry(filter_frame, textvariable=self.history_search_var).grid(row=0, column=1, sticky="ew")
+        self.history_status_map = {self.t('history_any_status'): None, self.t('success'): 'Success',
+                                   self.t('history_failed'): 'Failed', self.t('cancelled'): 'Cancelled'}
+        self.history_status_var = tk.StringVar(value=self.t('history_any_status'))
+        status_combo = ttk.Combobox(filter_frame, textvariable=self.history_status_var, values=list(self.history_status_map), state="readonly", width=12)
+        status_combo.grid(row=0, column=2, padx=5)
+        status_combo.bind('<<ComboboxSelected>>', lambda event: self.filter_history())
+        self.history_date_map = {self.t('history_any_date'): None, self.t('today'): 0, self.t('last_7_days'): 7, self.t('last_30_days'): 30}
+        self.history_date_var = tk.StringVar(value=self.t('history_any_date'))
+        date_combo = ttk.Combobox(filter_frame, textvariable=self.history_date_var, values=list(self.history_date_map), state="readonly", width=12)
+        date_combo.grid(row=0, column=3)
+        date_combo.bind('<<ComboboxSelected>>', lambda event: self.filter_history())
+        self.history_view = HistoryView(history_frame, self.settings.history,
+                                        {'time': self.t('history_time'), 'status': self.t('history_status'), 'url': self.t('history_url')})
+        self.history_view.frame.grid(row=1, column=0, sticky="nsew")
         self.clear_history_btn = ttk.Button(history_frame, text=self.t('clear_history'), command=self.clear_history)
-        self.clear_history_btn.grid(row=1, column=0, pady=5)
-        self.update_history()
+        self.clear_history_btn.grid(row=2, column=0, pady=5)
+        self.filter_history()
 
     def _setup_recent_tab(self):
         recent_frame = ttk.Frame(self.nb, padding=10)
@@ -307,7 +391,7 @@ class DownloaderGUI:
         ToolTip(self.download_btn, self.t('tooltip_download'))
         ToolTip(self.cancel_btn, self.t('tooltip_cancel'))
         ToolTip(self.output_text, self.t('tooltip_log'))
-        ToolTip(self.progress_canvas, self.t('tooltip_progress'))
+        ToolTip(self.job_table.tree, self.t('tooltip_progress'))
         ToolTip(self.recent_combo, self.t('tooltip_recent'))
         ToolTip(self.batch_text, self.t('tooltip_batch_urls'))
         ToolTip(self.batch_download_btn, self.t('tooltip_batch_download'))
@@ -362,17 +446,24 @@ class DownloaderGUI:
         self.settings.data['file_template'] = self.file_template_var.get()
         self.settings.data['playlist'] = self.playlist_var.get()
         self.settings.data['skip_downloaded'] = self.skip_downloaded_var.get()
+        if not self.skip_downloaded_var.get():
+            self.downloader.set_archive(None)
+        elif self.downloader.archive is None:
+            self.downloader.set_archive(DownloadArchive.open_default())
 
         # Network
         self.settings.data['proxy'] = self.proxy_var.get()
         self.settings.data['user_agent'] = self.user_agent_var.get()
         self.settings.data['cookie_file'] = self.cookie_file_var.get()
         self.settings.data['bandwidth'] = self.bandwidth_var.get()
+        # Applies to downloads already running as well
+        self.downloader.set_bandwidth(self.bandwidth_var.get())
         
         # Advanced
         self.settings.data['plugin_dir'] = self.plugin_dir_var.get()
+        self.downloader.set_plugin_dir(self.plugin_dir_var.get() or None)
 
-        self.settings.save()
+        self.settings.save(immediate=True)
         messagebox.showinfo(self.t('success'), self.t('settings_saved'))
 
     def refresh_ui(self):
@@ -398,35 +489,47 @@ class DownloaderGUI:
             messagebox.showerror(self.t('error'), self.t('output_dir_missing'))
             return
         
-        self.cancel_requested = False
-        self.download_btn.config(state=tk.DISABLED)
-        self.cancel_btn.config(state=tk.NORMAL)
-        self.output_text.delete(1.0, tk.END)
         self.log_message(f"Starting download for: {url}")
+        self._job_counter += 1
+        job = GuiJob(f"job{self._job_counter}", url, dict(
+            output_dir=output_dir,
+            quality=self.quality_value_map.get(self.single_quality_var.get(), 'best'),
+            audio_only=self.audio_only_var.get(),
+            playlist=self.playlist_var.get(),
+            cookie_file=self.cookie_file_var.get(),
+        ))
+        self.job_table.add(job.id, url, self.t('downloading'))
+        self._run_job(job)
+
+    def _run_job(self, job: GuiJob):
+        """Runs a job's download on its own thread; progress goes through the pump, completion through on_download_complete."""
+        self.jobs[job.id] = job
+        job.running, job.pause_requested = True, False
+        self.job_table.set(job.id, status=self.t('downloading'))
 
         def progress_callback(msg):
-            if self.cancel_requested:
+            if job.cancel_requested or job.pause_requested:
                 return False
-            self.root.after(0, self.parse_progress, msg)
+            self.log_message(msg)
+            return True
+
+        def progress_hook(event):
+            if job.cancel_requested or job.pause_requested:
+                return False
+            self.progress_pump.post(job.id, event)
             return True
 
         def download_thread_func():
-            success, final_path = self.downloader.download(
-                url=url,
-                output_dir=output_dir,
-                quality=self.quality_value_map.get(self.single_quality_var.get(), 'best'),
-                audio_only=self.audio_only_var.get(),
-                playlist=self.playlist_var.get(),
-                cookie_file=self.cookie_file_var.get(),
-                progress_callback=progress_callback
-            )
-            self.root.after(0, self.on_download_complete, success, url, final_path)
+            success, final_path = self.downloader.download(url=job.url, progress_callback=progress_callback, progress_hook=progress_hook, **job.options)
+            self.root.after(0, self.on_download_complete, job, success, final_path)
 
         thread = threading.Thread(target=download_thread_func, daemon=True)
         thread.start()
+        self._update_job_buttons()
 
     def start_batch_download(self):
-        urls = [line.strip() for line in self.batch_text.get(1.0, tk.END).strip().split('\n') if is_valid_url(line.strip())]
+        # dict.fromkeys drops repeated URLs, which would otherwise share one job's progress
+        urls = list(dict.fromkeys(line.strip() for line in self.batch_text.get(1.0, tk.END).strip().split('\n') if is_valid_url(line.strip())))
         if not urls:
             messagebox.showerror(self.t('error'), self.t('no_valid_urls'))
             return
@@ -436,37 +539,168 @@ class DownloaderGUI:
             messagebox.showerror(self.t('error'), self.t('output_dir_missing'))
             return
         
-        self.log_message(f"Starting batch download of {len(urls)} URLs...")
-        # Simplified batch download logic for now
+        parallel = max(1, int(self.parallel_var.get()))
+        self.settings.data['parallel'] = parallel
+        self.log_message(f"Starting batch download of {len(urls)} URLs, {parallel} at a time...")
+        options = dict(output_dir=output_dir, quality=self.quality_value_map.get(self.batch_quality_var.get(), 'best'),
+                       audio_only=self.audio_only_var.get(), playlist=self.playlist_var.get(), cookie_file=self.cookie_file_var.get())
+        batch = self.batch = BatchRun({})
         for url in urls:
-            # This should be parallelized properly
-            self.url_var.set(url)
-            self.start_download()
-            
-    def on_download_complete(self, success, url, final_path):
-        if self.cancel_requested:
+            self._job_counter += 1
+            job = GuiJob(f"job{self._job_counter}", url, options, running=True, batch=batch)
+            batch.jobs[url] = job
+            self.jobs[job.id] = job
+            self.job_table.add(job.id, url, self.t('queued'))
+        self.batch_download_btn.config(state=tk.DISABLED)
+        self._update_job_buttons()
+        self._update_batch_progress()
+
+        def queued_urls():
+            # Stopped jobs the downloader hasn't pulled yet are skipped here. With per-host limits it pulls
+            # ahead of free worker slots, so progress_callback also refuses them when a worker starts them.
+            for job in list(batch.jobs.values()):
+                if job.cancel_requested or job.pause_requested:
+                    self.root.after(0, self.on_download_complete, job, False, None)
+                else:
+                    yield job.url
+
+        def progress_callback(msg):
+            self.log_message(msg)
+            # Batch lines are prefixed with "[url] "
+            job = batch.jobs.get(msg[1:].partition("] ")[0]) if msg.startswith("[") else None
+            return job is None or not (job.cancel_requested or job.pause_requested)
+
+        def progress_hook(event):
+            job = batch.jobs.get(event.url)
+            if job is None:
+                return True
+            if job.cancel_requested or job.pause_requested:
+                return False
+            self.progress_pump.post(job.id, event)
+            return True
+
+        def batch_thread_func():
+            try:
+                for result in self.downloader.iter_batch_download(
+                        queued_urls(), parallel=parallel, progress_callback=progress_callback, progress_hook=progress_hook,
+                        per_host_limit=self.settings.data.get('per_host_limit'), host_interval=self.settings.data.get('host_interval', 0.0),
+                        **options):
+                    self.root.after(0, self.on_download_complete, batch.jobs[result.url], result.success, result.path)
+            finally:
+                self.root.after(0, self.on_batch_complete, batch)
+
+        # One thread feeds the downloader's worker pool; no thread per URL
+        threading.Thread(target=batch_thread_func, daemon=True).start()
+
+    def on_batch_complete(self, batch: BatchRun):
+        self.apply_progress()
+        for job in batch.jobs.values():
+            if job.batch is batch:
+                # The batch thread stopped early (an unexpected error); nothing else will finish these
+                self.on_download_complete(job, False, None)
+        self.log_message(f"Batch finished: {batch.succeeded} succeeded, {batch.failed} failed, {batch.stopped} stopped.")
+        if self.enable_notifications_var.get() and HAS_NOTIFICATIONS:
+            notification.notify(title=self.t('title'), message=self.t('batch_completed'), app_name=APP_NAME)
+        self.batch_download_btn.config(state=tk.NORMAL)
+        self._update_batch_progress()
+
+    def _update_batch_progress(self):
+        batch = self.batch
+        if batch is None:
+            return
+        text = self.t('batch_status').format(finished=batch.finished, total=len(batch.jobs), failed=batch.failed, percent=f"{batch.percent:.0f}")
+        if text != self.batch_status.get():
+            self.batch_progress['value'] = batch.percent
+            self.batch_status.set(text)
+
+    def on_download_complete(self, job, success, final_path):
+        # Progress still waiting for the next frame would otherwise land after the completion
+        self.apply_progress()
+        job.running = False
+        batch, job.batch = job.batch, None
+        if batch is not None:
+            batch.percents.pop(job.id, None)
+            if job.cancel_requested or (job.pause_requested and not success):
+                batch.stopped += 1
+            elif success:
+                batch.succeeded += 1
+            else:
+                batch.failed += 1
+        if job.pause_requested and not job.cancel_requested and not success:
+            self.job_table.set(job.id, status=self.t('paused'), speed="", eta="")
+            self.log_message(f"Download paused: {job.url}")
+            self._update_job_buttons()
+            return
+        url = job.url
+        # A batch notifies once when it finishes, not once per URL
+        notify = batch is None and self.enable_notifications_var.get() and HAS_NOTIFICATIONS
+        if job.cancel_requested:
             status = 'Cancelled'
+            self.job_table.set(job.id, status=self.t('cancelled'), speed="", eta="")
             self.log_message("Download cancelled.")
         elif success:
             status = 'Success'
+            self.job_table.set(job.id, status=self.t('done'), progress="100%", speed="", eta="")
             self.log_message(f"Download completed: {final_path}")
-            if self.enable_notifications_var.get() and HAS_NOTIFICATIONS:
+            if notify:
                 notification.notify(title=self.t('title'), message=self.t('notification_success'), app_name=APP_NAME)
         else:
             status = 'Failed'
+            self.job_table.set(job.id, status=self.t('failed'), speed="", eta="")
             self.log_message("Download failed.")
-            if self.enable_notifications_var.get() and HAS_NOTIFICATIONS:
+            if notify:
                 notification.notify(title=self.t('title'), message=self.t('notification_fail'), app_name=APP_NAME)
 
-        self.settings.add_history({'time': datetime.datetime.now().isoformat(), 'url': url, 'status': status, 'path': final_path})
-        self.update_history()
-        self.update_recent_downloads()
-
-        self.download_btn.config(state=tk.NORMAL)
-        self.cancel_btn.config(state=tk.DISABLED)
+        self.jobs.pop(job.id, None)
+        entry = {'time': datetime.datetime.now().isoformat(), 'url': url, 'status': status, 'path': final_path}
+        self.settings.add_history(entry)
+        self.history_view.add(entry)
+        if success and final_path:
+            self._add_recent_download(final_path)
+        self._update_job_buttons()
+
+    def _selected_jobs(self) -> List[GuiJob]:
+        """The selected unfinished jobs, or all of them when nothing in the table is selected."""
+        selected = self.job_table.selection()
+        return [self.jobs[job_id] for job_id in selected if job_id in self.jobs] if selected else list(self.jobs.values())
+
+    def _update_job_buttons(self):
+        jobs = self._selected_jobs()
+        running = any(job.running for job in jobs)
+        self.cancel_btn.config(state=tk.NORMAL if jobs else tk.DISABLED)
+        self.pause_btn.config(state=tk.NORMAL if running else tk.DISABLED)
+        self.resume_btn.config(state=tk.NORMAL if any(not job.running for job in jobs) else tk.DISABLED)
+        active = sum(job.running for job in self.jobs.values())
+        self.progress_text.set(f"{self.t('downloading')} ({active})" if active else self.t('ready'))
+
+    def cancel_download(self):
+        for job in self._selected_jobs():
+            job.cancel_requested = True
+            if job.running:
+                self.job_table.set(job.id, status=self.t('cancelling'))
+            else:
+                # Paused: nothing is running that would report the cancellation
+                self.on_download_complete(job, False, None)
+        self._update_job_buttons()
+
+    def pause_downloads(self):
+        for job in self._selected_jobs():
+            if job.running:
+                job.pause_requested = True
+                self.job_table.set(job.id, status=self.t('pausing'))
+
+    def resume_downloads(self):
+        for job in self._selected_jobs():
+            if not job.running:
+                self.log_message(f"Resuming download for: {job.url}")
+                self._run_job(job)
+
+    def clear_finished_jobs(self):
+        for job_id in self.job_table.jobs():
+            if job_id not in self.jobs:
+                self.job_table.remove(job_id)
 
     # All other helper methods...
-    def cancel_download(self): self.cancel_requested = True
     def browse_dir(self):
         directory = filedialog.askdirectory(initialdir=self.output_dir_var.get())
         if directory: self.output_dir_var.set(directory)
@@ -483,26 +717,59 @@ class DownloaderGUI:
     def detect_formats(self):
         url = self.url_var.get().strip()
         if not is_valid_url(url): return
-        formats = self.downloader.detect_formats(url)
+        formats = self.downloader.detect_formats(url, self.cookie_file_var.get() or None)
         messagebox.showinfo(self.t('detected_formats'), '\n'.join(formats) if formats else self.t('no_formats_detected'))
 
-    def update_history(self):
-        self.history_text.config(state=tk.NORMAL)
-        self.history_text.delete(1.0, tk.END)
-        for entry in self.settings.data.get('download_history', []):
-            self.history_text.insert(tk.END, f"{entry.get('time', '')} | {entry.get('status', '')} | {entry.get('url', '')}\n")
-        self.history_text.config(state=tk.DISABLED)
+    def _schedule_history_filter(self):
+        # Wait for a pause in typing before querying the store
+        if self._history_filter_after is not None:
+            self.root.after_cancel(self._history_filter_after)
+        self._history_filter_after = self.root.after(300, self.filter_history)
+
+    def filter_history(self):
+        self._history_filter_after = None
+        days = self.history_date_map.get(self.history_date_var.get())
+        since = None
+        if days is not None:
+            start = datetime.datetime.combine(datetime.date.today(), datetime.time()) - datetime.timedelta(days=days)
+            since = start.isoformat()
+        self.history_view.reload(search=self.history_search_var.get().strip(),
+                                 status=self.history_status_map.get(self.history_status_var.get()), since=since)
 
     def clear_history(self):
-        self.settings.data['download_history'] = []
-        self.settings.save()
-        self.update_history()
+        self.settings.history.clear()
+        self.history_view.clear()
+        self.path_cache.forget()
+        self.update_recent_downloads()
     
     def update_recent_downloads(self):
+        """Reloads the recent downloads list; the store query and file checks run on a worker thread."""
+        self._recent_generation += 1
+        self._recent_pending = True
+        generation = self._recent_generation
+        paths = lambda: [entry['path'] for entry in self.settings.history.query(limit=RECENT_DOWNLOADS) if entry.get('path')]
+        self.path_cache.check_async(paths, lambda result: self.root.after(0, self._show_recent_downloads, generation, result))
+
+    def _show_recent_downloads(self, generation: int, exists: Dict[str, bool]):
+        if generation != self._recent_generation:
+            return  # a newer reload is on its way
+        self._recent_pending = False
         self.recent_listbox.delete(0, tk.END)
-        for entry in self.settings.data.get('download_history', [])[:15]:
-            if entry.get('path') and os.path.exists(entry['path']):
-                self.recent_listbox.insert(tk.END, entry['path'])
+        for path, found in exists.items():
+            if found:
+                self.recent_listbox.insert(tk.END, path)
+
+    def _add_recent_download(self, path: str):
+        # The download just wrote the file, so there is nothing to check
+        self.path_cache.mark(path, True)
+        if self._recent_pending:
+            self.update_recent_downloads()
+            return
+        listed = self.recent_listbox.get(0, tk.END)
+        if path in listed:
+            self.recent_listbox.delete(listed.index(path))
+        self.recent_listbox.insert(0, path)
+        self.recent_listbox.delete(RECENT_DOWNLOADS, tk.END)
 
     def remove_recent_downloads(self):
         selected_indices = self.recent_listbox.curselection()
@@ -540,30 +807,34 @@ class DownloaderGUI:
         state = 'disabled' if self.audio_only_var.get() else 'readonly'
         self.quality_combo.config(state=state)
 
-    def parse_progress(self, line):
-        match = re.search(r'\[download\]\s+([\d\.]+)% of', line)
-        if match:
-            percent = float(match.group(1))
-            self.update_progress_bar(percent)
-        self.log_message(line)
-
-    def update_progress_bar(self, percent):
-        self.draw_progress_bar(percent)
-
-    def draw_progress_bar(self, percent):
-        self.progress_canvas.delete('all')
-        width = self.progress_canvas.winfo_width() or 300
-        height = self.progress_canvas.winfo_height() or 20
-        fill_w = width * percent / 100
-        self.progress_canvas.create_rectangle(0, 0, fill_w, height, fill="green", outline="")
-        self.progress_canvas.create_text(width/2, height/2, text=f"{int(percent)}%", fill="white" if percent > 10 else "black")
-    
+    def on_progress_event(self, job_id, event):
+        self.job_table.show_event(job_id, event, self.phase_labels)
+        job = self.jobs.get(job_id)
+        if job is not None and job.batch is not None and event.percent is not None:
+            job.batch.percents[job_id] = event.percent
+        if event.phase != PHASE_DOWNLOADING:
+            # Percentages live in the table; the log keeps the milestones
+            self.log_message(str(event))
+
+    def apply_progress(self):
+        """Applies the latest pending progress of each download; called every frame."""
+        for job_id, event in self.progress_pump.drain().items():
+            self.on_progress_event(job_id, event)
+        self.job_table.refresh()
+        self._update_batch_progress()
+
     def log_message(self, msg):
-        self.output_text.insert(tk.END, msg + '\n')
-        self.output_text.see(tk.END)
+        """Queues a line for the log view; safe to call from any thread."""
+        self.log.append(msg)
+
+    def _on_frame(self):
+        self.apply_progress()
+        self.log_view.flush()
+        self.root.after(FRAME_MS, self._on_frame)
 
     def on_closing(self):
         self.save_settings()
+        self.log.close()
         self.root.destroy()
 
     def run(self):
@@ -0,0 +1,210 @@
+import atexit
+import datetime
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Tuple, Union
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    time TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT,
+    path TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_history_time ON history (time);
+CREATE INDEX IF NOT EXISTS idx_history_url ON history (url, time);
+CREATE INDEX IF NOT EXISTS idx_history_status ON history (status, time);
+"""
+
+_COLUMNS = ("time", "url", "status", "path")
+
+
+class HistoryStore:
+    """Append-only download history in SQLite.
+
+    add() only queues the entry; a background thread writes queued entries in one
+    transaction every `flush_interval` seconds (or once `batch_size` are waiting),
+    so parallel batches don't serialize on a write per finished URL. Queries flush
+    first, so they always see everything added so far. Retention is unbounded
+    until compact() is called.
+    """
+    def __init__(self, path: Union[str, Path], flush_interval: float = 0.5, batch_size: int = 500):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[Any, ...]] = []
+        self._wakeup = threading.Condition(threading.Lock())
+        self._closed = False
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    @staticmethod
+    def _row(entry: Dict[str, Any]) -> Tuple[Any, ...]:
+        extra = {key: value for key, value in entry.items() if key not in _COLUMNS}
+        return (entry.get("time") or datetime.datetime.now().isoformat(), entry.get("url") or "",
+                entry.get("status"), entry.get("path"), json.dumps(extra) if extra else None)
+
+    @staticmethod
+    def _entry(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        entry_id, time, url, status, path, extra = row
+        entry = {"id": entry_id, "time": time, "url": url, "status": status, "path": path}
+        if extra:
+            entry.update(json.loads(extra))
+        return entry
+
+    def add(self, entry: Dict[str, Any]):
+        """Queues a history entry (keys: time, url, status, path, plus any extra fields)."""
+        with self._wakeup:
+            self._pending.append(self._row(entry))
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.notify()
+
+    def add_many(self, entries: Iterable[Dict[str, Any]]):
+        rows = [self._row(entry) for entry in entries]
+        with self._lock:
+            self._conn.executemany("INSERT INTO history (time, url, status, path, extra) VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def flush(self):
+        """Writes all queued entries now."""
+        with self._wakeup:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return
+        try:
+            with self._lock:
+                self._conn.executemany("INSERT INTO history (time, url, status, path, extra) VALUES (?, ?, ?, ?, ?)", rows)
+                self._conn.commit()
+        except sqlite3.Error:
+            # Keep the entries for the next flush (e.g. while another process holds a write lock)
+            with self._wakeup:
+                self._pending[:0] = rows
+            raise
+
+    def _write_loop(self):
+        while True:
+            with self._wakeup:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._wakeup.wait(self.flush_interval)
+                closed = self._closed
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass
+            if closed:
+                return
+
+    def close(self):
+        with self._wakeup:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        self._writer.join()
+        with self._lock:
+            self._conn.close()
+        atexit.unregister(self.close)
+
+    def _where(self, url: Optional[str], status: Optional[str], since: Optional[str], until: Optional[str], search: Optional[str],
+               before: Optional[Tuple[str, int]] = None) -> Tuple[str, List[Any]]:
+        clauses, args = [], []
+        if url is not None:
+            clauses.append("url = ?")
+            args.append(url)
+        if status is not None:
+            clauses.append("status = ?")
+            args.append(status)
+        if since is not None:
+            clauses.append("time >= ?")
+            args.append(since)
+        if until is not None:
+            clauses.append("time < ?")
+            args.append(until)
+        if search:
+            # A plain substring match: % and _ in the term are literal
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            clauses.append("(url LIKE ? ESCAPE '\\' OR path LIKE ? ESCAPE '\\')")
+            args.extend([f"%{escaped}%"] * 2)
+        if before is not None:
+            # Same as time < t OR (time = t AND id < i), written so the time index can bound the scan
+            clauses.append("time <= ? AND (time < ? OR id < ?)")
+            args.extend([before[0], before[0], before[1]])
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def query(self, limit: int = 100, offset: int = 0, url: Optional[str] = None, status: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None, search: Optional[str] = None,
+              before: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        """Returns entries newest first. since/until are ISO timestamps; search matches URL or path.
+
+        For paging, pass the (time, id) of the last entry of the previous page as
+        `before` rather than an offset: the page is then a range scan of the time
+        index, and entries added in the meantime don't shift it.
+        """
+        self.flush()
+        where, args = self._where(url, status, since, until, search, before)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id, time, url, status, path, extra FROM history{where} ORDER BY time DESC, id DESC LIMIT ? OFFSET ?",
+                                      args + [limit, offset]).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def count(self, url: Optional[str] = None, status: Optional[str] = None, since: Optional[str] = None,
+              until: Optional[str] = None, search: Optional[str] = None) -> int:
+        self.flush()
+        where, args = self._where(url, status, since, until, search)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM history{where}", args).fetchone()[0]
+
+    def clear(self):
+        with self._wakeup:
+            self._pending = []
+        with self._lock:
+            self._conn.execute("DELETE FROM history")
+            self._conn.commit()
+
+    def compact(self, keep_days: Optional[float] = None, max_entries: Optional[int] = None) -> int:
+        """Deletes entries older than keep_days and/or beyond the newest max_entries, then reclaims space.
+
+        Returns the number of entries removed.
+        """
+        self.flush()
+        removed = 0
+        with self._lock:
+            if keep_days is not None:
+                cutoff = (datetime.datetime.now() - datetime.timedelta(days=keep_days)).isoformat()
+                removed += self._conn.execute("DELETE FROM history WHERE time < ?", (cutoff,)).rowcount
+            if max_entries is not None:
+                removed += self._conn.execute("DELETE FROM history WHERE id NOT IN (SELECT id FROM history ORDER BY time DESC, id DESC LIMIT ?)",
+                                              (max_entries,)).rowcount
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+        return removed
+
+
+def entry_matches(entry: Dict[str, Any], url: Optional[str] = None, status: Optional[str] = None, since: Optional[str] = None,
+                  until: Optional[str] = None, search: Optional[str] = None) -> bool:
+    """Whether an entry passes the same filters as HistoryStore.query(), without asking the store."""
+    time = entry.get("time") or ""
+    if url is not None and entry.get("url") != url:
+        return False
+    if status is not None and entry.get("status") != status:
+        return False
+    if since is not None and time < since:
+        return False
+    if until is not None and time >= until:
+        return False
+    if search:
+        # LIKE is case-insensitive for ASCII
+        needle = search.lower()
+        return needle in (entry.get("url") or "").lower() or needle in (entry.get("path") or "").lower()
+    return True
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, Union
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_CACHE_DIR = Path.home() / ".video_downloader_cache" / "info"
+
+# Query parameters that never change what a URL points to
+_TRACKING_PARAMS = frozenset({"fbclid", "gclid", "si", "feature"})
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for cache keys: lowercase host, no fragment, sorted query without tracking params."""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    netloc = f"{host}:{parts.port}" if parts.port else host
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if key not in _TRACKING_PARAMS and not key.startswith("utm_"))
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path.rstrip("/") or "/", urlencode(query), ""))
+
+
+class InfoCache:
+    """On-disk cache of extracted yt-dlp info JSON, keyed by normalized URL and variant.
+
+    Each entry is a file named after the SHA-256 of the URL, so a format probe
+    and the download that follows share one extraction: the subprocess engine
+    reads the file with --load-info-json and the in-process engine loads it
+    directly. Entries expire after `ttl` seconds (stream URLs inside the info go
+    stale) and the least recently used ones are evicted beyond `max_bytes`.
+
+    `variant` separates extractions of one URL that can differ, e.g. with
+    other cookies, proxy or user agent (age- or region-gated formats); the
+    caller decides what goes into it.
+    """
+    def __init__(self, directory: Union[str, Path] = DEFAULT_CACHE_DIR, ttl: float = 1800.0, max_bytes: int = 100 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_bytes > 0
+
+    def _path(self, url: str, variant: str = "") -> Path:
+        key = normalize_url(url) + ("\n" + variant if variant else "")
+        return self.directory / (hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def path_for(self, url: str, variant: str = "") -> Optional[str]:
+        """Returns the info file for a URL if a fresh entry exists, marking it as recently used."""
+        if not self.enabled:
+            return None
+        path = self._path(url, variant)
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        now = time.time()
+        if now - stat.st_mtime > self.ttl:
+            self.discard(url, variant)
+            return None
+        # mtime records when the entry was written (TTL); atime records the last use (LRU)
+        os.utime(path, (now, stat.st_mtime))
+        return str(path)
+
+    def get(self, url: str, variant: str = "") -> Optional[Dict[str, Any]]:
+        path = self.path_for(url, variant)
+        if path is None:
+            return None
+        info = self.load(path)
+        if info is None:
+            self.discard(url, variant)
+        return info
+
+    @staticmethod
+    def load(path: str) -> Optional[Dict[str, Any]]:
+        """Reads an info file returned by path_for(); None if it is gone or unreadable."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, info: Dict[str, Any], variant: str = "") -> Optional[str]:
+        """Stores sanitized info for a URL and returns the file path."""
+        if not self.enabled or not info:
+            return None
+        path = self._path(url, variant)
+        data = json.dumps(info).encode("utf-8")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            try:
+                previous = path.stat().st_size
+            except OSError:
+                previous = 0
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return None
+        with self._lock:
+            if self._size is not None:
+                self._size += len(data) - previous
+        self._evict()
+        return str(path)
+
+    def discard(self, url: str, variant: str = ""):
+        path = self._path(url, variant)
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size -= size
+
+    def clear(self):
+        for path in self.directory.glob("*.json"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        with self._lock:
+            self._size = 0
+
+    def _evict(self):
+        with self._lock:
+            if self._size is not None and self._size <= self.max_bytes:
+                return
+            entries = []
+            for path in self.directory.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            expired_before = time.time() - self.ttl
+            for atime, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.max_bytes and atime >= expired_before:
+                    break
+                try:
+                    path.unlink()
+                    total -= size
+                except OSError:
+                    pass
+            self._size = total
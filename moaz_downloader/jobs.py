@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import threading
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Optional, Iterable, Iterator, List, Tuple, Dict, Union
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    output_path TEXT,
+    error TEXT,
+    failure TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class JobStore:
+    """Durable queue of batch download jobs backed by SQLite in WAL mode.
+
+    Every URL is one row, so a batch can be resumed after a crash and
+    enqueuing works in fixed-size chunks without holding the batch in memory.
+    """
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "failure" not in columns:
+            # Stores created before failures were classified
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN failure TEXT")
+        self._conn.commit()
+
+    @classmethod
+    def for_batch_file(cls, batch_file: Union[str, Path]) -> "JobStore":
+        """Opens the job store that sits next to a batch file (e.g. 'urls.txt.jobs.db')."""
+        return cls(f"{batch_file}.jobs.db")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "JobStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def enqueue(self, urls: Iterable[str], chunk_size: int = 10000) -> int:
+        """Adds URLs that are not already in the store. Returns the number of new jobs."""
+        added = 0
+        iterator = iter(urls)
+        while True:
+            now = time.time()
+            chunk = [(url, now) for url in islice(iterator, chunk_size)]
+            if not chunk:
+                return added
+            with self._lock:
+                before = self._conn.total_changes
+                self._conn.executemany("INSERT OR IGNORE INTO jobs (url, updated_at) VALUES (?, ?)", chunk)
+                self._conn.commit()
+                added += self._conn.total_changes - before
+
+    def enqueue_file(self, batch_file: Union[str, Path], urls: Iterable[str]) -> int:
+        """Enqueues URLs read from batch_file unless that exact file version was already ingested."""
+        stat = os.stat(batch_file)
+        fingerprint = f"{os.path.abspath(batch_file)}:{stat.st_size}:{stat.st_mtime_ns}"
+        if self.get_meta("ingested") == fingerprint:
+            return 0
+        added = self.enqueue(urls)
+        self.set_meta("ingested", fingerprint)
+        return added
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+    def recover(self) -> int:
+        """Requeues jobs left 'running' by a process that died. Returns how many were reset."""
+        with self._lock:
+            cursor = self._conn.execute("UPDATE jobs SET state = ? WHERE state = ?", (JOB_QUEUED, JOB_RUNNING))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def requeue_failed(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("UPDATE jobs SET state = ?, error = NULL, failure = NULL WHERE state = ?", (JOB_QUEUED, JOB_FAILED))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def claim(self, limit: int) -> List[Tuple[int, str]]:
+        """Marks up to `limit` queued jobs as running and returns them as (id, url)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, url FROM jobs WHERE state = ? ORDER BY id LIMIT ?", (JOB_QUEUED, limit)).fetchall()
+            if rows:
+                self._conn.executemany("UPDATE jobs SET state = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                                       [(JOB_RUNNING, time.time(), job_id) for job_id, _ in rows])
+                self._conn.commit()
+        return rows
+
+    def iter_claimed(self, chunk_size: int = 100) -> Iterator[Tuple[int, str]]:
+        """Yields queued jobs one at a time, claiming them from the store in chunks."""
+        while True:
+            rows = self.claim(chunk_size)
+            if not rows:
+                return
+            yield from rows
+
+    def mark_done(self, job_id: int, output_path: Optional[str] = None):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET state = ?, output_path = ?, error = NULL, failure = NULL, updated_at = ? WHERE id = ?",
+                               (JOB_DONE, output_path, time.time(), job_id))
+            self._conn.commit()
+
+    def mark_failed(self, job_id: int, error: Optional[str] = None, output_path: Optional[str] = None, failure: Optional[str] = None):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET state = ?, output_path = ?, error = ?, failure = ?, updated_at = ? WHERE id = ?",
+                               (JOB_FAILED, output_path, error, failure, time.time(), job_id))
+            self._conn.commit()
+
+    def note_retry(self, job_id: int, failure: Optional[str] = None, error: Optional[str] = None):
+        """Records a failed attempt of a job that stays running while it waits to be retried."""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET attempts = attempts + 1, failure = ?, error = ?, updated_at = ? WHERE id = ?",
+                               (failure, error, time.time(), job_id))
+            self._conn.commit()
+
+    def failure_counts(self) -> Dict[str, int]:
+        """Number of failed jobs per failure class."""
+        with self._lock:
+            rows = self._conn.execute("SELECT COALESCE(failure, 'unknown'), COUNT(*) FROM jobs WHERE state = ? GROUP BY 1", (JOB_FAILED,)).fetchall()
+        return dict(rows)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_DONE: 0, JOB_FAILED: 0}
+        counts.update(dict(rows))
+        return counts
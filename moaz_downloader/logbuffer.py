@@ -0,0 +1,68 @@
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Optional, List, Tuple, Deque, TextIO, Union
+
+
+class LogBuffer:
+    """Thread-safe, bounded log that any thread appends to and the UI drains in batches.
+
+    The newest `max_lines` lines are kept in a ring buffer (see lines()), and
+    the lines not yet shown wait in a second ring of the same size. If more
+    than `max_lines` arrive between two drains, only the newest are shown and
+    the rest are reported as dropped. With spill_path, every line is also
+    appended to that file, so the full log survives the trimming.
+    """
+    def __init__(self, max_lines: int = 5000, spill_path: Union[str, Path, None] = None):
+        self.max_lines = max(1, max_lines)
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.total = 0
+        self._retained: Deque[str] = deque(maxlen=self.max_lines)
+        self._pending: Deque[str] = deque(maxlen=self.max_lines)
+        self._arrived = 0  # lines appended since the last drain, including ones pushed out of _pending
+        self._spill: Optional[TextIO] = None
+        self._lock = threading.Lock()
+
+    def append(self, line: str):
+        with self._lock:
+            self.total += 1
+            self._arrived += 1
+            self._retained.append(line)
+            self._pending.append(line)
+            if self.spill_path is not None:
+                if self._spill is None:
+                    try:
+                        self._spill = open(self.spill_path, "a", encoding="utf-8")
+                    except OSError:
+                        self.spill_path = None  # unwritable; keep logging to the view only
+                        return
+                self._spill.write(line + "\n")
+
+    def drain(self) -> Tuple[List[str], int]:
+        """Returns (lines appended since the last drain, count of older ones that were dropped unseen)."""
+        with self._lock:
+            lines = list(self._pending)
+            dropped = self._arrived - len(lines)
+            self._pending.clear()
+            self._arrived = 0
+            if self._spill is not None:
+                self._spill.flush()
+        return lines, dropped
+
+    def lines(self) -> List[str]:
+        """Returns the retained lines, oldest first."""
+        with self._lock:
+            return list(self._retained)
+
+    def clear(self):
+        """Forgets retained and pending lines; the spill file keeps everything."""
+        with self._lock:
+            self._retained.clear()
+            self._pending.clear()
+            self._arrived = 0
+
+    def close(self):
+        with self._lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
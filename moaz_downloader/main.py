@@ -3,36 +3,16 @@ import logging
 import os
 import sys
 from pathlib import Path
-import tkinter as tk
-from tkinter import messagebox
 
 # --- Path Hack ---
 # This allows the script to be run directly, without needing to be installed as a package.
 # It adjusts the Python path to include the parent directory, making the `moaz_downloader` package visible.
-try:
-    # If running as a script, add the parent directory to the path
-    # to allow relative imports.
-    if __name__ == "__main__" and __package__ is None:
-        sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
-        # Now we can import from our package
-        from moaz_downloader.gui import DownloaderGUI
-        from moaz_downloader.settings import Settings
-        from moaz_downloader.downloader import VideoDownloader
-        import moaz_downloader.cli as cli
-    # If frozen by PyInstaller, the path is handled differently.
-    elif getattr(sys, 'frozen', False):
-        # This is the standard structure for a PyInstaller bundle with our package
-        from moaz_downloader.gui import DownloaderGUI
-        from moaz_downloader.settings import Settings
-        from moaz_downloader.downloader import VideoDownloader
-        import moaz_downloader.cli as cli
-    # Otherwise, assume it's being run as a module
-    else:
-        from .gui import DownloaderGUI
-        from .settings import Settings
-        from .downloader import VideoDownloader
-        from . import cli
-except ImportError as e:
+# Package modules are imported inside cli()/gui() below, so `--cli` never loads tkinter or the GUI,
+# and each mode only pays for the modules it uses.
+if __name__ == "__main__" and not __package__:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def _import_failed(e):
     # Provide a helpful message if imports fail
     print(f"Error: Failed to import necessary modules. {e}")
     print("Please ensure you are running from the correct directory or have the package installed.")
@@ -47,12 +27,27 @@ def find_asset(filename):
     # relative to this script's location.
     return os.path.join(os.path.dirname(__file__), 'assets', filename)
 
-def main():
-    """Main entry point for the application."""
-    parser = argparse.ArgumentParser(description="Moaz Video Downloader")
-    parser.add_argument("--cli", action="store_true", help="Run in command-line interface mode.")
-    # Capture all other arguments to pass to the CLI if needed
-    args, unknown = parser.parse_known_args()
+def run_cli(argv):
+    """Runs the command-line interface, which builds its own Settings and VideoDownloader."""
+    try:
+        from moaz_downloader import cli
+    except ImportError as e:
+        _import_failed(e)
+    sys.argv = [sys.argv[0]] + argv
+    cli.main()
+
+def run_gui():
+    """Builds the downloader from the saved settings and launches the GUI."""
+    try:
+        import tkinter as tk
+        from tkinter import messagebox
+        from moaz_downloader.gui import DownloaderGUI
+        from moaz_downloader.settings import Settings
+        from moaz_downloader.downloader import VideoDownloader
+        from moaz_downloader.info_cache import InfoCache
+        from moaz_downloader.archive import DownloadArchive
+    except ImportError as e:
+        _import_failed(e)
 
     # Instantiate core components
     settings = Settings()
@@ -66,33 +61,55 @@ def main():
     downloader = VideoDownloader(
         logger=logging.getLogger(__name__),
         ffmpeg_path=ffmpeg_path,
+        postprocess_script=settings.data.get('postprocess_script') or None,
+        plugin_dir=settings.data.get('plugin_dir') or None,
+        bandwidth=settings.data.get('bandwidth'),
+        engine=settings.data.get('engine', 'subprocess'),
+        info_cache=InfoCache(ttl=settings.data.get('info_cache_ttl', 1800), max_bytes=settings.data.get('info_cache_size_mb', 100) * 1024 * 1024),
         # ... other downloader settings from 'settings' instance
     )
+    downloader.set_connections(settings.data.get('connections', 4))
+    if settings.data.get('plugin_isolation'):
+        downloader.set_plugin_isolation(True)
+    if settings.data.get('postprocess_workers'):
+        downloader.set_postprocess_workers(settings.data.get('postprocess_workers'))
+    downloader.set_bandwidth_schedule(settings.data.get('bandwidth_schedule', []))
+    if settings.data.get('skip_downloaded', True):
+        downloader.set_archive(DownloadArchive.open_default())
+
+    icon_path = find_asset('icon.ico')
+    if not os.path.exists(icon_path):
+        icon_path = None
+    
+    # Setup basic logging for the GUI
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    try:
+        app = DownloaderGUI(settings=settings, downloader=downloader, icon_path=icon_path, ffmpeg_path=ffmpeg_path)
+        app.run()
+    except Exception as e:
+        logging.error(f"Failed to launch GUI: {e}", exc_info=True)
+        # Fallback to a simple Tkinter error message if the GUI fails catastrophically
+        root = tk.Tk()
+        root.withdraw()
+        messagebox.showerror("Fatal Error", f"A critical error occurred: {e}")
+        sys.exit(1)
+
+def main():
+    """Main entry point for the application."""
+    # No automatic -h here: with --cli, help belongs to the CLI's own parser
+    parser = argparse.ArgumentParser(description="Moaz Video Downloader", add_help=False)
+    parser.add_argument("--cli", action="store_true", help="Run in command-line interface mode.")
+    # Capture all other arguments to pass to the CLI if needed
+    args, unknown = parser.parse_known_args()
 
     if args.cli:
-        # Re-parse arguments for the CLI module
-        # This is a bit of a workaround to allow both GUI and CLI flags.
-        sys.argv = [sys.argv[0]] + unknown
-        cli.main()
+        # Decided before anything else is imported or constructed: the CLI reads its own flags and settings
+        run_cli(unknown)
     else:
-        # Launch the GUI
-        icon_path = find_asset('icon.ico')
-        if not os.path.exists(icon_path):
-            icon_path = None
-        
-        # Setup basic logging for the GUI
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-        try:
-            app = DownloaderGUI(settings=settings, downloader=downloader, icon_path=icon_path, ffmpeg_path=ffmpeg_path)
-            app.run()
-        except Exception as e:
-            logging.error(f"Failed to launch GUI: {e}", exc_info=True)
-            # Fallback to a simple Tkinter error message if the GUI fails catastrophically
-            root = tk.Tk()
-            root.withdraw()
-            messagebox.showerror("Fatal Error", f"A critical error occurred: {e}")
-            sys.exit(1)
+        parser.add_argument("-h", "--help", action="help", help="Show this help message and exit.")
+        parser.parse_known_args()
+        run_gui()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
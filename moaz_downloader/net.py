@@ -0,0 +1,123 @@
+import importlib.util
+import threading
+from dataclasses import dataclass
+from typing import Optional, Dict, Any
+
+
+def http2_available() -> bool:
+    """Returns True if httpx and h2 are installed, which HTTPSession(http2=True) needs."""
+    return importlib.util.find_spec("httpx") is not None and importlib.util.find_spec("h2") is not None
+
+
+@dataclass
+class PoolStats:
+    """Connection counters of an HTTPSession. reuse_rate is the share of requests that skipped a new connection (and its DNS lookup and TLS handshake)."""
+    requests: int = 0
+    connections_opened: int = 0
+    connections_reused: int = 0
+    http2_requests: int = 0
+
+    @property
+    def reuse_rate(self) -> float:
+        sent = self.connections_opened + self.connections_reused
+        return self.connections_reused / sent if sent else 0.0
+
+    def __str__(self):
+        return (f"{self.requests} HTTP requests over {self.connections_opened} connections "
+                f"({self.reuse_rate:.0%} reused)")
+
+
+class HTTPSession:
+    """Shared keep-alive HTTP client: a requests.Session with a connection pool per host.
+
+    Up to `max_per_host` idle connections per host are kept for the next request,
+    so repeat requests skip the DNS lookup and the TCP and TLS handshakes; the
+    segmented downloader's probe and range requests share the same pool. The
+    Session (and requests itself) is created on first use. With http2=True and
+    httpx[http2] installed, request() goes over HTTP/2 instead; streamed
+    requests (get(stream=True)) stay on the HTTP/1.1 pool.
+    """
+    def __init__(self, max_per_host: int = 8, timeout: float = 30.0, headers: Optional[Dict[str, str]] = None,
+                 max_hosts: int = 10, http2: bool = False):
+        self.max_per_host = max_per_host
+        self.max_hosts = max_hosts
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+        self._session = None
+        self._http2_requests = 0
+        self._lock = threading.Lock()
+        self._http2 = None
+        if http2 and http2_available():
+            import httpx
+            self._http2 = httpx.Client(http2=True, timeout=timeout, headers=self.headers)
+
+    @property
+    def session(self):
+        """The underlying requests.Session."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    session = requests.Session()
+                    session.headers.update(self.headers)
+                    self._mount(session)
+                    self._session = session
+        return self._session
+
+    def _mount(self, session):
+        from requests.adapters import HTTPAdapter
+        for prefix in ("http://", "https://"):
+            session.mount(prefix, HTTPAdapter(pool_connections=self.max_hosts, pool_maxsize=self.max_per_host))
+
+    def set_max_per_host(self, max_per_host: int):
+        """Resizes the per-host pool, e.g. to fit more parallel connections; idle connections are dropped."""
+        with self._lock:
+            if max_per_host == self.max_per_host:
+                return
+            self.max_per_host = max_per_host
+            session = self._session
+        if session is not None:
+            for adapter in session.adapters.values():
+                adapter.close()
+            self._mount(session)
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None, stream: bool = False):
+        """Sends a GET over the pool, following redirects. With stream=True the caller reads (or closes) the body."""
+        return self.session.get(url, headers=headers, timeout=timeout or self.timeout, stream=stream)
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, body: Optional[bytes] = None,
+                timeout: Optional[float] = None):
+        """Sends a request, follows redirects and returns the fully read response (requests or httpx)."""
+        if self._http2 is not None:
+            response = self._http2.request(method, url, headers=headers, content=body, timeout=timeout or self.timeout, follow_redirects=True)
+            with self._lock:
+                self._http2_requests += response.http_version == "HTTP/2"
+            return response
+        return self.session.request(method, url, headers=headers, data=body, timeout=timeout or self.timeout)
+
+    def get_json(self, url: str, timeout: Optional[float] = None) -> Any:
+        response = self.request("GET", url, headers={"Accept": "application/json"}, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def stats(self) -> PoolStats:
+        """Counts from the connection pools currently held (one per host, up to max_hosts) plus HTTP/2 requests."""
+        stats = PoolStats(http2_requests=self._http2_requests)
+        session = self._session
+        if session is not None:
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        stats.requests += pool.num_requests
+                        stats.connections_opened += pool.num_connections
+        stats.connections_reused = max(0, stats.requests - stats.connections_opened)
+        stats.requests += stats.http2_requests
+        return stats
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+        if self._http2 is not None:
+            self._http2.close()
@@ -0,0 +1,152 @@
+import json
+import threading
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Hashable
+
+PHASE_DOWNLOADING = "downloading"
+PHASE_FINISHED = "finished"
+PHASE_POSTPROCESSING = "postprocessing"
+PHASE_POSTPROCESSED = "postprocessed"
+PHASE_ERROR = "error"
+
+PROGRESS_PREFIX = "[moaz-progress] "
+POSTPROCESS_PREFIX = "[moaz-postprocess] "
+
+# Passed to the yt-dlp subprocess so progress arrives as one JSON object per line
+PROGRESS_TEMPLATE_ARGS: List[str] = [
+    "--progress-template", f"download:{PROGRESS_PREFIX}%(progress)j",
+    "--progress-template", f'postprocess:{POSTPROCESS_PREFIX}{{"progress": %(progress)j, "filepath": %(info.filepath)j}}',
+]
+
+
+def format_bytes(num: Optional[float]) -> str:
+    """Formats a byte count the way yt-dlp does (e.g. '10.00MiB')."""
+    if num is None:
+        return "Unknown"
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(num) < 1024:
+            return f"{num:.2f}{unit}"
+        num /= 1024
+    return f"{num:.2f}TiB"
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "Unknown"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+
+@dataclass
+class ProgressEvent:
+    """A single pre-parsed progress update from either download engine."""
+    phase: str
+    downloaded_bytes: Optional[int] = None
+    total_bytes: Optional[int] = None
+    speed: Optional[float] = None
+    eta: Optional[float] = None
+    filepath: Optional[str] = None
+    postprocessor: Optional[str] = None
+    url: Optional[str] = None
+
+    @property
+    def percent(self) -> Optional[float]:
+        if self.phase in (PHASE_FINISHED, PHASE_POSTPROCESSING, PHASE_POSTPROCESSED):
+            return 100.0
+        if self.downloaded_bytes is None or not self.total_bytes:
+            return None
+        return min(100.0, self.downloaded_bytes * 100.0 / self.total_bytes)
+
+    @classmethod
+    def from_download_status(cls, status: Dict[str, Any]) -> "ProgressEvent":
+        """Builds an event from a yt-dlp progress hook dict."""
+        phase = {"downloading": PHASE_DOWNLOADING, "finished": PHASE_FINISHED}.get(status.get("status"), PHASE_ERROR)
+        return cls(
+            phase=phase,
+            downloaded_bytes=status.get("downloaded_bytes"),
+            total_bytes=status.get("total_bytes") or status.get("total_bytes_estimate"),
+            speed=status.get("speed"),
+            eta=status.get("eta"),
+            filepath=status.get("filename"),
+        )
+
+    @classmethod
+    def from_postprocess_status(cls, status: Dict[str, Any], filepath: Optional[str]) -> "ProgressEvent":
+        """Builds an event from a yt-dlp postprocessor hook dict."""
+        phase = PHASE_POSTPROCESSED if status.get("status") == "finished" else PHASE_POSTPROCESSING
+        return cls(phase=phase, postprocessor=status.get("postprocessor"), filepath=filepath)
+
+    @classmethod
+    def from_line(cls, line: str) -> Optional["ProgressEvent"]:
+        """Parses a line produced by PROGRESS_TEMPLATE_ARGS; returns None for ordinary log lines."""
+        try:
+            if line.startswith(PROGRESS_PREFIX):
+                return cls.from_download_status(json.loads(line[len(PROGRESS_PREFIX):]))
+            if line.startswith(POSTPROCESS_PREFIX):
+                data = json.loads(line[len(POSTPROCESS_PREFIX):])
+                return cls.from_postprocess_status(data.get("progress") or {}, data.get("filepath"))
+        except ValueError:
+            pass
+        return None
+
+    def __str__(self) -> str:
+        if self.phase == PHASE_DOWNLOADING:
+            percent = self.percent
+            percent_str = f"{percent:5.1f}%" if percent is not None else "  ?.?%"
+            return (f"[download] {percent_str} of {format_bytes(self.total_bytes)} "
+                    f"at {format_bytes(self.speed)}/s ETA {format_eta(self.eta)}")
+        if self.phase == PHASE_FINISHED:
+            return f"[download] 100% of {format_bytes(self.total_bytes)}: {self.filepath}"
+        if self.phase == PHASE_POSTPROCESSING:
+            return f"[{self.postprocessor}] started: {self.filepath}"
+        if self.phase == PHASE_POSTPROCESSED:
+            return f"[{self.postprocessor}] finished: {self.filepath}"
+        return f"[download] error: {self.filepath}"
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of one URL, including the failure class when it did not succeed.
+
+    resumed_bytes counts data reused from an earlier interrupted attempt instead of being downloaded again.
+    info_file is the cached info JSON the download was made from, if any.
+    """
+    url: str
+    success: bool
+    path: Optional[str] = None
+    failure: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 1
+    skipped: bool = False
+    resumed_bytes: int = 0
+    info_file: Optional[str] = None
+
+
+class ProgressPump:
+    """Hands progress from worker threads to a UI thread at the UI's pace.
+
+    post() may be called from any thread for every event; it only replaces the
+    job's pending state. The UI calls drain() once per frame and gets the
+    latest event of each job that changed since the previous frame, so its
+    work grows with the frame rate and the number of active jobs, not with how
+    much yt-dlp prints.
+    """
+    def __init__(self):
+        self.posted = 0
+        self.coalesced = 0  # events overwritten before a frame showed them
+        self._pending: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def post(self, job: Hashable, event: Any):
+        with self._lock:
+            self.posted += 1
+            if job in self._pending:
+                self.coalesced += 1
+            self._pending[job] = event
+
+    def drain(self) -> Dict[Hashable, Any]:
+        """Returns {job: latest event} for the jobs updated since the last drain, in order of their first update."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
@@ -0,0 +1,67 @@
+import errno
+import random
+from typing import Optional, Iterable, FrozenSet
+
+FAILURE_NETWORK = "network"
+FAILURE_RATE_LIMITED = "rate_limited"
+FAILURE_FORBIDDEN = "forbidden"
+FAILURE_GEO_BLOCKED = "geo_blocked"
+FAILURE_EXTRACTOR = "extractor"
+FAILURE_NOT_FOUND = "not_found"
+FAILURE_CLIENT_ERROR = "client_error"  # any other HTTP 4xx
+FAILURE_DISK_FULL = "disk_full"
+FAILURE_CANCELLED = "cancelled"
+FAILURE_UNKNOWN = "unknown"
+
+# Failures worth retrying later; the rest won't change by trying again
+TRANSIENT_FAILURES: FrozenSet[str] = frozenset({FAILURE_NETWORK, FAILURE_RATE_LIMITED, FAILURE_FORBIDDEN})
+
+# Checked in order, so more specific causes win over generic network wording
+_FAILURE_MARKERS = (
+    (FAILURE_DISK_FULL, ("no space left on device", f"[errno {errno.ENOSPC}]", "disk full", "[winerror 112]")),
+    (FAILURE_GEO_BLOCKED, ("not available in your country", "geo restrict", "geo-restrict", "not available from your location",
+                           "not made this video available in your country")),
+    (FAILURE_RATE_LIMITED, ("http error 429", "too many requests")),
+    (FAILURE_FORBIDDEN, ("http error 403", "403 forbidden", "403: forbidden")),
+    (FAILURE_NOT_FOUND, ("http error 404", "http error 410")),
+    (FAILURE_CLIENT_ERROR, ("http error 4",)),
+    (FAILURE_NETWORK, ("timed out", "connection reset", "connection refused", "connection aborted", "network is unreachable",
+                       "temporary failure in name resolution", "name or service not known", "getaddrinfo failed",
+                       "remote end closed connection", "incompleteread", "urlopen error", "transporterror",
+                       "http error 5", "unable to download webpage", "unable to download video data")),
+    (FAILURE_EXTRACTOR, ("unsupported url", "unable to extract", "extractorerror", "video unavailable", "private video",
+                         "this video has been removed", "requested format is not available", "sign in to confirm")),
+)
+
+
+def classify_failure(lines: Iterable[str]) -> str:
+    """Classifies a failed download from the error/warning lines the engine printed."""
+    text = "\n".join(lines).lower()
+    for failure, markers in _FAILURE_MARKERS:
+        if any(marker in text for marker in markers):
+            return failure
+    return FAILURE_UNKNOWN
+
+
+class RetryPolicy:
+    """Decides whether a failed URL is retried and how long it waits first.
+
+    Delays grow exponentially per attempt (base_delay * 2**(attempt-1), capped at
+    max_delay) and are spread by +/- `jitter` so retries against one host don't
+    arrive in lockstep. HTTP 429 responses back off four times longer.
+    """
+    def __init__(self, max_attempts: int = 3, base_delay: float = 2.0, max_delay: float = 300.0, jitter: float = 0.5, retry_on: FrozenSet[str] = TRANSIENT_FAILURES):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retry_on = retry_on
+
+    def should_retry(self, failure: Optional[str], attempt: int) -> bool:
+        return failure in self.retry_on and attempt < self.max_attempts
+
+    def delay(self, failure: Optional[str], attempt: int) -> float:
+        """Seconds to wait before attempt number `attempt + 1`."""
+        base = self.base_delay * (4 if failure == FAILURE_RATE_LIMITED else 1)
+        delay = min(self.max_delay, base * 2 ** (attempt - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
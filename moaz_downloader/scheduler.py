@@ -0,0 +1,115 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Optional, Iterable, Callable, Dict, Deque, Any, List, Tuple
+from urllib.parse import urlsplit
+
+# Returned by poll() when no item can start yet
+NOTHING_READY = object()
+
+
+def host_of(url: str) -> str:
+    """Returns the host a URL is grouped under for politeness limits."""
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class HostScheduler:
+    """Hands out queued items so that no host exceeds its concurrency or request rate.
+
+    Items are buffered per host (at most `lookahead` at a time, pulled lazily from
+    the source) and dispatched round-robin across hosts, so a slow or rate-limited
+    site only ever ties up its own `max_per_host` slots while other hosts keep going.
+    Items can be requeued with a delay (e.g. retry backoff); they wait here rather
+    than in a worker. Call release() when a dispatched item finishes.
+    """
+    def __init__(self, items: Iterable[Any], max_per_host: Optional[int] = 2, min_interval: float = 0.0, lookahead: int = 10000, key: Callable[[Any], str] = lambda item: item, clock: Callable[[], float] = time.monotonic):
+        self.max_per_host = max(1, max_per_host) if max_per_host else None
+        self.min_interval = max(0.0, min_interval)
+        self.lookahead = max(1, lookahead)
+        self.key = key
+        self.clock = clock
+        self._source = iter(items)
+        self._exhausted = False
+        self._pending: Dict[str, Deque[Any]] = {}
+        self._hosts: Deque[str] = deque()
+        self._buffered = 0
+        self._delayed: List[Tuple[float, int, Any]] = []
+        self._sequence = itertools.count()
+        self._active: Dict[str, int] = {}
+        self._last_start: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, item: Any):
+        host = host_of(self.key(item))
+        if host not in self._pending:
+            self._pending[host] = deque()
+            self._hosts.append(host)
+        self._pending[host].append(item)
+        self._buffered += 1
+
+    def _fill(self, now: float):
+        while self._delayed and self._delayed[0][0] <= now:
+            self._add(heapq.heappop(self._delayed)[2])
+        while not self._exhausted and self._buffered < self.lookahead:
+            try:
+                item = next(self._source)
+            except StopIteration:
+                self._exhausted = True
+                return
+            self._add(item)
+
+    def poll(self) -> Tuple[Any, Optional[float]]:
+        """Returns (item, None) if an item may start now.
+
+        Otherwise returns (NOTHING_READY, seconds) where seconds is how long until a
+        host's spacing or a delayed item allows progress, or None if only a
+        release() can unblock it (or nothing is left).
+        """
+        with self._lock:
+            now = self.clock()
+            self._fill(now)
+            wait_for: Optional[float] = self._delayed[0][0] - now if self._delayed else None
+            for _ in range(len(self._hosts)):
+                host = self._hosts[0]
+                self._hosts.rotate(-1)
+                if self.max_per_host and self._active.get(host, 0) >= self.max_per_host:
+                    continue
+                remaining = self._last_start.get(host, float('-inf')) + self.min_interval - now
+                if remaining > 0:
+                    wait_for = remaining if wait_for is None else min(wait_for, remaining)
+                    continue
+                queue = self._pending[host]
+                item = queue.popleft()
+                if not queue:
+                    del self._pending[host]
+                    self._hosts.remove(host)
+                self._buffered -= 1
+                self._active[host] = self._active.get(host, 0) + 1
+                if self.min_interval:
+                    self._last_start[host] = now
+                return item, None
+            return NOTHING_READY, wait_for
+
+    def drained(self) -> bool:
+        """True once the source is exhausted and nothing is buffered or delayed."""
+        with self._lock:
+            self._fill(self.clock())
+            return self._exhausted and not self._pending and not self._delayed
+
+    def requeue(self, item: Any, delay: float = 0.0):
+        """Puts an item back in the queue, eligible again after `delay` seconds."""
+        with self._lock:
+            heapq.heappush(self._delayed, (self.clock() + delay, next(self._sequence), item))
+
+    def release(self, item: Any):
+        """Marks an item dispatched earlier as finished, freeing its host slot."""
+        host = host_of(self.key(item))
+        with self._lock:
+            active = self._active.get(host, 0) - 1
+            if active > 0:
+                self._active[host] = active
+            else:
+                self._active.pop(host, None)
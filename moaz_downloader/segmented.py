@@ -0,0 +1,388 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Callable, Dict, List, Tuple, Deque, Any
+from urllib.parse import urlsplit, unquote
+
+from .net import HTTPSession
+from .progress import ProgressEvent, PHASE_DOWNLOADING, PHASE_FINISHED
+
+MIB = 1024 * 1024
+
+# URLs whose path ends in one of these are fetched directly rather than extracted
+DIRECT_MEDIA_EXTENSIONS = frozenset({
+    ".mp4", ".m4v", ".webm", ".mkv", ".mov", ".avi", ".flv", ".ts",
+    ".mp3", ".m4a", ".aac", ".ogg", ".oga", ".opus", ".wav", ".flac",
+})
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+_DISPOSITION_NAME = re.compile(r"filename\*?=(?:UTF-8'')?\"?([^\";]+)\"?", re.IGNORECASE)
+
+
+def is_direct_media_url(url: str) -> bool:
+    """True if the URL points straight at a media file (by extension), not at a page to extract."""
+    parts = urlsplit(url)
+    return parts.scheme in ("http", "https") and os.path.splitext(unquote(parts.path))[1].lower() in DIRECT_MEDIA_EXTENSIONS
+
+
+class SegmentedDownloadError(Exception):
+    pass
+
+
+class SegmentedDownloadCancelled(SegmentedDownloadError):
+    pass
+
+
+@dataclass
+class RemoteFile:
+    """What a probe request learned about a direct download."""
+    url: str
+    size: Optional[int]
+    accept_ranges: bool
+    filename: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def _filename_from(url: str, disposition: Optional[str]) -> str:
+    match = _DISPOSITION_NAME.search(disposition or "")
+    name = unquote(match.group(1)) if match else os.path.basename(unquote(urlsplit(url).path))
+    # Never let a server-supplied name escape the output directory
+    name = os.path.basename(name.replace("\\", "/")).strip()
+    return name or "download"
+
+
+@dataclass
+class DirectDownload:
+    """Outcome of a segmented download."""
+    path: str
+    size: int
+    resumed_bytes: int = 0
+
+
+class SegmentManifest:
+    """Tracks which byte ranges of a '.part' file are already on disk.
+
+    Stored as JSON next to the part file and rewritten atomically whenever a range
+    completes, so a cancelled or crashed download continues from there. The
+    validators (ETag / Last-Modified) make sure the remote file is still the one
+    the finished ranges came from.
+    """
+    def __init__(self, path: str, url: str, size: int, etag: Optional[str] = None, last_modified: Optional[str] = None, completed: Optional[List[List[int]]] = None):
+        self.path = path
+        self.url = url
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.completed: List[List[int]] = completed or []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SegmentManifest"]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(path, data["url"], int(data["size"]), data.get("etag"), data.get("last_modified"),
+                       [[int(start), int(end)] for start, end in data.get("completed", [])])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def matches(self, remote: "RemoteFile") -> bool:
+        """True if the remote file is unchanged since the completed ranges were written."""
+        if self.size != remote.size:
+            return False
+        if self.etag and remote.etag:
+            return self.etag == remote.etag
+        if self.last_modified and remote.last_modified:
+            return self.last_modified == remote.last_modified
+        if not (self.etag or self.last_modified or remote.etag or remote.last_modified):
+            # Servers without validators: trust the same URL and size, as yt-dlp does for its .part files
+            return self.url == remote.url
+        return False
+
+    @property
+    def completed_bytes(self) -> int:
+        with self._lock:
+            return sum(end - start + 1 for start, end in self.completed)
+
+    def add(self, start: int, end: int):
+        """Marks start..end (inclusive) as written and saves the manifest."""
+        if end < start:
+            return
+        with self._lock:
+            merged: List[List[int]] = []
+            for range_start, range_end in sorted(self.completed + [[start, end]]):
+                if merged and range_start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], range_end)
+                else:
+                    merged.append([range_start, range_end])
+            self.completed = merged
+            self._save()
+
+    def missing(self, segment_size: int) -> List[Tuple[int, int]]:
+        """The ranges still to fetch, split into pieces of at most segment_size bytes."""
+        with self._lock:
+            gaps, position = [], 0
+            for start, end in self.completed:
+                if start > position:
+                    gaps.append((position, start - 1))
+                position = max(position, end + 1)
+            if position < self.size:
+                gaps.append((position, self.size - 1))
+        return [(start, min(start + segment_size, end + 1) - 1)
+                for gap_start, end in gaps for start in range(gap_start, end + 1, segment_size)]
+
+    def _save(self):
+        data: Dict[str, Any] = {"url": self.url, "size": self.size, "etag": self.etag,
+                                "last_modified": self.last_modified, "completed": self.completed}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class _Progress:
+    """Aggregates bytes written by all connections and reports them at most every `interval` seconds.
+
+    A throttle callable, if given, is called with every byte count and may block to slow the connections down.
+    """
+    def __init__(self, total: Optional[int], filepath: str, hook: Optional[Callable[[ProgressEvent], Optional[bool]]], done: int = 0, interval: float = 0.2, throttle: Optional[Callable[[int], None]] = None):
+        self.total = total
+        self.filepath = filepath
+        self.hook = hook
+        self.throttle = throttle
+        self.interval = interval
+        self.downloaded = done
+        self.cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._start_bytes = done
+        self._last_report = 0.0
+
+    def add(self, count: int):
+        if self.throttle:
+            self.throttle(count)
+        with self._lock:
+            self.downloaded += count
+            now = time.monotonic()
+            if not self.hook or now - self._last_report < self.interval:
+                return
+            self._last_report = now
+            elapsed = now - self._start
+            speed = (self.downloaded - self._start_bytes) / elapsed if elapsed > 0 else None
+            eta = (self.total - self.downloaded) / speed if speed and self.total else None
+            event = ProgressEvent(PHASE_DOWNLOADING, self.downloaded, self.total, speed, eta, self.filepath)
+        if self.hook(event) is False:
+            self.cancelled.set()
+
+    def finish(self):
+        if self.hook:
+            self.hook(ProgressEvent(PHASE_FINISHED, self.downloaded, self.total or self.downloaded, filepath=self.filepath))
+
+
+class SegmentedDownloader:
+    """Downloads a direct media URL over several HTTP connections at once.
+
+    The file is split into `segment_size` byte ranges that `connections` worker
+    threads fetch with Range requests, each keeping its own keep-alive
+    connection and writing into a preallocated '.part' file at the range's
+    offset. Finished ranges are recorded in a SegmentManifest ('.part.json'),
+    so an interrupted download resumes with only the missing ranges. The part
+    file is renamed into place only after its size matches the server's.
+    Servers without range support get a single plain stream. Requests go
+    through an HTTPSession, whose keep-alive pool hands the probe's connection
+    to the first worker and keeps idle ones for the next download from the
+    same host.
+    """
+    def __init__(self, connections: int = 4, segment_size: int = 4 * MIB, timeout: float = 30.0, retries: int = 3, headers: Optional[Dict[str, str]] = None, session: Optional[HTTPSession] = None):
+        self.connections = max(1, connections)
+        self.segment_size = max(64 * 1024, segment_size)
+        self.timeout = timeout
+        self.retries = max(1, retries)
+        self.headers = dict(headers or {})
+        self.session = session or HTTPSession(max_per_host=self.connections, timeout=timeout)
+
+    def _get(self, url: str, byte_range: Optional[Tuple[int, Optional[int]]] = None):
+        # Byte offsets must be those of the file itself, not of a compressed transfer
+        headers = dict(self.headers, **{"Accept-Encoding": "identity"})
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+        return self.session.get(url, headers, self.timeout, stream=True)
+
+    def probe(self, url: str) -> RemoteFile:
+        """Follows redirects and asks for the first byte to learn the size and range support."""
+        response = None
+        try:
+            response = self._get(url, (0, 0))
+            if response.status_code not in (200, 206):
+                raise SegmentedDownloadError(f"HTTP Error {response.status_code}: {response.reason}")
+            url = response.url
+            headers = response.headers
+            size = None
+            match = _CONTENT_RANGE.match(headers.get("Content-Range") or "")
+            if response.status_code == 206 and match and match.group(3) != "*":
+                size = int(match.group(3))
+            elif response.status_code == 200 and headers.get("Content-Length"):
+                size = int(headers["Content-Length"])
+            return RemoteFile(url, size, response.status_code == 206 and size is not None,
+                              _filename_from(url, headers.get("Content-Disposition")),
+                              headers.get("ETag"), headers.get("Last-Modified"))
+        except OSError as e:
+            raise SegmentedDownloadError(f"Unable to download video data: {e}") from e
+        finally:
+            if response is not None:
+                if response.status_code != 200:
+                    # The one-byte range (or error page) is cheap to drain, and the connection goes back to the pool
+                    response.content
+                # A 200 reply carries the whole body; closing drops the connection instead of reading it
+                response.close()
+
+    def download(self, url: str, output_dir: str, progress_hook: Optional[Callable[[ProgressEvent], Optional[bool]]] = None, filename: Optional[str] = None, throttle: Optional[Callable[[int], None]] = None, on_start: Optional[Callable[[str, int], None]] = None) -> DirectDownload:
+        """Downloads url into output_dir, resuming a previous partial download of it if possible.
+
+        progress_hook receives ProgressEvents; returning False cancels (SegmentedDownloadCancelled)
+        and leaves the part file and manifest for the next attempt. throttle is called with the size
+        of every chunk read (from all connections) and may block to limit the overall rate.
+        on_start is called with the destination and the bytes already on disk just before the
+        transfer begins (not at all if the file is already complete).
+        """
+        remote = self.probe(url)
+        dest = os.path.join(output_dir, filename or remote.filename)
+        if remote.size is not None and os.path.isfile(dest) and os.path.getsize(dest) == remote.size:
+            _Progress(remote.size, dest, progress_hook, remote.size).finish()
+            return DirectDownload(dest, remote.size)
+        part = dest + ".part"
+        os.makedirs(output_dir, exist_ok=True)
+
+        if not remote.accept_ranges:
+            progress = _Progress(remote.size, dest, progress_hook, throttle=throttle)
+            if on_start:
+                on_start(dest, 0)
+            self._fetch_stream(remote.url, part, progress)
+            return self._finish(dest, part, remote.size, progress, 0)
+
+        manifest = SegmentManifest.load(part + ".json")
+        if manifest is None or not manifest.matches(remote) or not os.path.isfile(part):
+            manifest = SegmentManifest(part + ".json", remote.url, remote.size, remote.etag, remote.last_modified)
+            with open(part, "wb") as f:
+                f.truncate(remote.size)
+            manifest.save()
+        resumed = manifest.completed_bytes
+        progress = _Progress(remote.size, dest, progress_hook, resumed, throttle=throttle)
+        if on_start:
+            on_start(dest, resumed)
+        self._fetch_ranges(remote.url, part, manifest.missing(self.segment_size), progress, manifest)
+        result = self._finish(dest, part, remote.size, progress, resumed)
+        manifest.remove()
+        return result
+
+    def _finish(self, dest: str, part: str, size: Optional[int], progress: _Progress, resumed: int) -> DirectDownload:
+        actual = os.path.getsize(part)
+        expected = size if size is not None else progress.downloaded
+        if actual != expected or progress.downloaded != expected:
+            raise SegmentedDownloadError(f"Size mismatch for {dest}: expected {expected} bytes, wrote {progress.downloaded}, file has {actual}")
+        os.replace(part, dest)
+        progress.finish()
+        return DirectDownload(dest, expected, resumed)
+
+    def _fetch_ranges(self, url: str, part: str, ranges: List[Tuple[int, int]], progress: _Progress, manifest: SegmentManifest):
+        queue: Deque[Tuple[int, int]] = deque(ranges)
+        lock = threading.Lock()
+        errors: List[Exception] = []
+
+        def worker():
+            with open(part, "r+b") as f:
+                while not progress.cancelled.is_set():
+                    with lock:
+                        if not queue:
+                            break
+                        start, end = queue.popleft()
+                    try:
+                        self._fetch_range(url, f, start, end, progress, manifest)
+                    except Exception as e:
+                        errors.append(e)
+                        progress.cancelled.set()
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(min(self.connections, len(ranges)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0] if isinstance(errors[0], SegmentedDownloadError) else SegmentedDownloadError(str(errors[0]))
+        if progress.cancelled.is_set():
+            raise SegmentedDownloadCancelled("Download cancelled")
+
+    def _fetch_range(self, url: str, f, start: int, end: int, progress: _Progress, manifest: SegmentManifest):
+        """Writes bytes start..end (inclusive) at their offset, reconnecting and resuming on errors.
+
+        Whatever was written is recorded in the manifest, even if the range is abandoned half-way.
+        A fully read range response hands its connection back to the session's pool.
+        """
+        position = start
+        try:
+            for attempt in range(self.retries):
+                response = None
+                try:
+                    response = self._get(url, (position, end))
+                    match = _CONTENT_RANGE.match(response.headers.get("Content-Range") or "")
+                    if response.status_code != 206 or not match or int(match.group(1)) != position:
+                        raise SegmentedDownloadError(f"HTTP Error {response.status_code}: server ignored range {position}-{end}")
+                    f.seek(position)
+                    for chunk in response.iter_content(64 * 1024):
+                        if progress.cancelled.is_set():
+                            return
+                        chunk = chunk[:end - position + 1]
+                        f.write(chunk)
+                        position += len(chunk)
+                        progress.add(len(chunk))
+                        if position > end:
+                            break
+                    if position > end:
+                        return
+                    raise OSError(f"connection closed with {end - position + 1} bytes of the range left")
+                except OSError as e:
+                    if attempt == self.retries - 1:
+                        raise SegmentedDownloadError(f"Unable to download video data: {e!r} at byte {position}") from e
+                finally:
+                    if response is not None:
+                        # A no-op once the body is fully read; otherwise the rest is abandoned with the connection
+                        response.close()
+        finally:
+            if position > start:
+                # Make sure the bytes are on disk before the manifest claims them
+                f.flush()
+                manifest.add(start, position - 1)
+
+    def _fetch_stream(self, url: str, part: str, progress: _Progress):
+        response = None
+        try:
+            response = self._get(url)
+            if response.status_code != 200:
+                raise SegmentedDownloadError(f"HTTP Error {response.status_code}: {response.reason}")
+            with open(part, "wb") as f:
+                for chunk in response.iter_content(256 * 1024):
+                    if progress.cancelled.is_set():
+                        raise SegmentedDownloadCancelled("Download cancelled")
+                    f.write(chunk)
+                    progress.add(len(chunk))
+        except OSError as e:
+            raise SegmentedDownloadError(f"Unable to download video data: {e!r}") from e
+        finally:
+            if response is not None:
+                response.close()
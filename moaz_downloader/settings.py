@@ -1,11 +1,30 @@
+import atexit
 import json
+import os
+import tempfile
+import threading
 from pathlib import Path
 from typing import Optional, Any, Dict
 
+from .history import HistoryStore
+
 class Settings:
-    """Handles loading and saving user settings."""
-    def __init__(self, path: Optional[Path] = None):
+    """Handles loading and saving user settings.
+
+    save() is debounced: mutations within `save_delay` seconds are written
+    together by a timer thread. Writes are serialized by a lock and go through a
+    temp file, fsync and an atomic rename, so the file on disk is always either
+    the previous or the new complete version.
+    """
+    def __init__(self, path: Optional[Path] = None, save_delay: float = 0.5):
         self.path = path or Path.home() / ".video_downloader_settings.json"
+        self.save_delay = save_delay
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self._version = 0
+        self._written_version = 0
         self.data: Dict[str, Any] = {
             "language": "en",
             "theme": "light",
@@ -21,14 +40,27 @@ class Settings:
             "proxy": "",
             "enable_notifications": True,
             "log_level": "INFO",
+            "log_max_lines": 5000,
+            "log_file": "",  # when set, the GUI log is also appended here in full
             "file_template": "%(uploader)s - %(id)s.%(ext)s",
             "user_agent": "",
             "bandwidth": "",
+            "bandwidth_schedule": [],
             "plugin_dir": "",
-            "download_history": [],
+            "plugin_isolation": False,
             "skip_downloaded": True,
+            "engine": "subprocess",
+            "per_host_limit": None,  # None = no per-host cap
+            "host_interval": 0.0,
+            "max_attempts": 3,
+            "connections": 4,  # direct media links; 1 leaves them to yt-dlp
+            "postprocess_workers": 0,  # 0 = half the CPU cores
+            "info_cache_ttl": 1800,
+            "info_cache_size_mb": 100,
         }
+        self._history: Optional[HistoryStore] = None
         self.load()
+        atexit.register(self.flush)
 
     def load(self):
         if self.path.exists():
@@ -37,33 +69,102 @@ class Settings:
                     self.data.update(json.load(f))
             except Exception as e:
                 print(f"Failed to load settings: {e}")
+                try:
+                    # Keep the unreadable file for inspection instead of overwriting it on the next save
+                    os.replace(self.path, self.path.with_name(self.path.name + ".corrupt"))
+                except OSError:
+                    pass
+        if 'download_history' in self.data:
+            # Settings files written before history moved to its own store
+            self.history.add_many(reversed(self.data.pop('download_history') or []))
+            self.save()
 
-    def save(self):
+    @property
+    def history(self) -> HistoryStore:
+        """The download history store, kept next to the settings file."""
+        if self._history is None:
+            with self._lock:
+                if self._history is None:
+                    self._history = HistoryStore(self.path.with_name(self.path.stem + "_history.db"))
+        return self._history
+
+    def save(self, immediate: bool = False):
+        """Schedules a write of the settings, or writes them now if immediate is set."""
+        if immediate or self.save_delay <= 0:
+            with self._lock:
+                self._dirty = True
+            self.flush()
+            return
+        with self._lock:
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.save_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Writes pending changes to disk, if there are any."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            content = json.dumps(self.data, indent=2)
+            self._version += 1
+            version = self._version
+        with self._write_lock:
+            # A concurrent flush may already have written a newer snapshot
+            if version < self._written_version:
+                return
+            try:
+                self._write(content)
+                self._written_version = version
+            except Exception as e:
+                print(f"Failed to save settings: {e}")
+
+    def _write(self, content: str):
+        directory = self.path.parent
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=self.path.name, suffix=".tmp")
         try:
-            with open(self.path, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2)
-        except Exception as e:
-            print(f"Failed to save settings: {e}")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
 
     def add_recent_url(self, url: str):
-        if url and url not in self.data['recent_urls']:
-            self.data['recent_urls'] = ([url] + self.data['recent_urls'])[:10]
-            self.save()
+        with self._lock:
+            if url and url not in self.data['recent_urls']:
+                self.data['recent_urls'] = ([url] + self.data['recent_urls'])[:10]
+                self.save()
 
     def add_recent_batch_file(self, path: str):
-        if path and path not in self.data['recent_batch_files']:
-            self.data['recent_batch_files'] = ([path] + self.data['recent_batch_files'])[:5]
-            self.save()
+        with self._lock:
+            if path and path not in self.data['recent_batch_files']:
+                self.data['recent_batch_files'] = ([path] + self.data['recent_batch_files'])[:5]
+                self.save()
 
     def add_history(self, entry: dict):
-        self.data['download_history'] = ([entry] + self.data['download_history'])[:100]
-        self.save()
+        self.history.add(entry)
 
     def export_settings(self, export_path: str):
+        with self._lock:
+            content = json.dumps(self.data, indent=2)
         with open(export_path, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2)
+            f.write(content)
 
     def import_settings(self, import_path: str):
         with open(import_path, 'r', encoding='utf-8') as f:
-            self.data.update(json.load(f))
-        self.save() 
\ No newline at end of file
+            imported = json.load(f)
+        with self._lock:
+            self.data.update(imported)
+        self.save(immediate=True) 
\ No newline at end of file
@@ -0,0 +1,125 @@
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Union
+
+DEFAULT_TOOL_CACHE = Path.home() / ".video_downloader_tools.json"
+# Re-run a cached tool after this long even if nothing on disk changed
+MAX_AGE = 7 * 24 * 3600
+
+
+def fingerprint(cmd: List[str]) -> Optional[List[Any]]:
+    """Identifies what a command would run: the resolved executable's path, size and mtime.
+
+    For `<this interpreter> -m <module>` the module's files are included as well, since
+    upgrading the package leaves the interpreter untouched. None if the executable isn't found.
+    """
+    exe = shutil.which(cmd[0])
+    if exe is None:
+        return None
+    exe = os.path.realpath(exe)
+    try:
+        stat = os.stat(exe)
+    except OSError:
+        return None
+    parts: List[Any] = [exe, stat.st_size, stat.st_mtime]
+    if len(cmd) >= 3 and cmd[1] == "-m" and exe == os.path.realpath(sys.executable):
+        try:
+            spec = importlib.util.find_spec(cmd[2])
+        except (ImportError, ValueError):
+            spec = None
+        if spec is None or not spec.origin:
+            return None
+        # version.py is rewritten by every yt-dlp release
+        marker = os.path.join(os.path.dirname(spec.origin), "version.py")
+        marker = marker if os.path.exists(marker) else spec.origin
+        parts += [marker, os.stat(marker).st_mtime]
+    return parts
+
+
+class ToolCache:
+    """Remembers which external tools work, and what they print, across runs.
+
+    Each entry is keyed by the command line and stores the fingerprint it was
+    checked against. A lookup only stats files; the tool is run again when
+    its fingerprint changed, the entry is older than `max_age`, or a caller
+    reports the command as broken with forget().
+    """
+    def __init__(self, path: Union[str, Path, None] = None, max_age: float = MAX_AGE, creationflags: int = 0):
+        self.path = Path(path) if path else DEFAULT_TOOL_CACHE
+        self.max_age = max_age
+        self.creationflags = creationflags
+        self.runs = 0  # subprocesses spawned by this instance, for benchmarks and tests
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(tmp, self.path)
+        except OSError:
+            # A read-only home only costs the next start a few --version runs
+            pass
+
+    @staticmethod
+    def _key(cmd: List[str], args: List[str]) -> str:
+        return json.dumps(cmd + args)
+
+    def output(self, cmd: List[str], args: List[str]) -> Optional[str]:
+        """Returns the stdout of `cmd args`, or None if the command doesn't work.
+
+        Cached results are returned without running anything while the fingerprint matches.
+        """
+        key = self._key(cmd, args)
+        current = fingerprint(cmd)
+        if current is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.get("fingerprint") == current and time.time() - entry.get("checked", 0) < self.max_age:
+                return entry.get("output") if entry.get("ok") else None
+        self.runs += 1
+        try:
+            result = subprocess.run(cmd + args, capture_output=True, text=True, timeout=60, creationflags=self.creationflags)
+            ok = result.returncode == 0
+            output = result.stdout if ok else None
+        except (OSError, subprocess.SubprocessError):
+            ok, output = False, None
+        with self._lock:
+            self._entries[key] = {"fingerprint": current, "checked": time.time(), "ok": ok, "output": output}
+            self._save()
+        return output
+
+    def version(self, cmd: List[str], version_arg: str = "--version") -> Optional[str]:
+        """Returns the first line `cmd version_arg` prints, or None if the command doesn't work."""
+        output = self.output(cmd, [version_arg])
+        return None if output is None else (output.strip().splitlines() or [""])[0]
+
+    def works(self, cmd: List[str], version_arg: str = "--version") -> bool:
+        return self.version(cmd, version_arg) is not None
+
+    def forget(self, cmd: List[str]):
+        """Drops every cached result for a command that turned out not to work."""
+        with self._lock:
+            stale = [key for key in self._entries if json.loads(key)[:len(cmd)] == cmd]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._save()
@@ -1,16 +1,84 @@
+import os
 import re
-import tkinter as tk
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+URL_PATTERN = re.compile(
+    r'^https?://'
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'
+    r'localhost|'
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'
+    r'(?::\d+)?'
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
 
 def is_valid_url(url: str) -> bool:
     """Basic URL validation."""
-    url_pattern = re.compile(
-        r'^https?://'
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'
-        r'localhost|'
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'
-        r'(?::\d+)?'
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-    return url_pattern.match(url) is not None
+    return URL_PATTERN.match(url) is not None
+
+def iter_urls(lines: TextIO, on_invalid: Optional[Callable[[int, str], None]] = None) -> Iterator[str]:
+    """Lazily yields valid URLs from an open batch file, one line at a time.
+
+    Blank lines and '#' comments are skipped; other invalid lines are reported
+    to on_invalid(line_number, line) and skipped.
+    """
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if is_valid_url(line):
+            yield line
+        elif on_invalid:
+            on_invalid(line_number, line)
+
+class PathCache:
+    """Remembers whether files exist, so lists of downloads don't stat every path on every refresh.
+
+    Results are reused for `ttl` seconds. check() stats only the paths that
+    aren't cached; check_async() does that on a worker thread and hands the
+    result to a callback there, so a UI has to marshal it to its own thread.
+    """
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self.stats = 0  # os.path.exists calls made
+        self._known: Dict[str, Tuple[bool, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Optional[bool]:
+        with self._lock:
+            known = self._known.get(path)
+        if known is None or time.monotonic() - known[1] > self.ttl:
+            return None
+        return known[0]
+
+    def mark(self, path: str, exists: bool):
+        """Records a result learned elsewhere, e.g. a download that just wrote the file."""
+        with self._lock:
+            self._known[path] = (exists, time.monotonic())
+
+    def forget(self, path: Optional[str] = None):
+        with self._lock:
+            if path is None:
+                self._known.clear()
+            else:
+                self._known.pop(path, None)
+
+    def check(self, paths: Iterable[str]) -> Dict[str, bool]:
+        result = {}
+        for path in paths:
+            exists = self.get(path)
+            if exists is None:
+                exists = os.path.exists(path)
+                self.stats += 1
+                self.mark(path, exists)
+            result[path] = exists
+        return result
+
+    def check_async(self, paths: Callable[[], Iterable[str]], callback: Callable[[Dict[str, bool]], None]) -> threading.Thread:
+        """Calls paths() and checks them on a worker thread, then calls callback(result) from that thread."""
+        thread = threading.Thread(target=lambda: callback(self.check(paths())), name="path-check", daemon=True)
+        thread.start()
+        return thread
 
 class ToolTip(object):
     def __init__(self, widget, text='widget info'):
@@ -47,6 +115,7 @@ class ToolTip(object):
             x = y = 0
         x += self.widget.winfo_rootx() + 25
         y += self.widget.winfo_rooty() + 20
+        import tkinter as tk  # deferred so the CLI can use this module without loading Tk
         self.tipwindow = tw = tk.Toplevel(self.widget)
         tw.wm_overrideredirect(True)
         tw.wm_geometry("+%d+%d" % (x, y))
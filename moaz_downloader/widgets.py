@@ -0,0 +1,197 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+from typing import Optional, Dict, List, Tuple, Any
+
+from .history import HistoryStore, entry_matches
+from .logbuffer import LogBuffer
+from .progress import ProgressEvent, format_bytes, format_eta, PHASE_DOWNLOADING, PHASE_FINISHED, PHASE_POSTPROCESSING, PHASE_POSTPROCESSED
+
+
+class LogView:
+    """Shows a LogBuffer in a Text widget with one insert per flush.
+
+    Call flush() once per frame from the Tk main loop. The widget holds at
+    most `max_lines` lines (default: the buffer's size); older ones are
+    deleted in a single range delete. The view only scrolls to the end if it
+    was already there, so reading back through the log isn't interrupted.
+    """
+    def __init__(self, text: tk.Text, buffer: LogBuffer, max_lines: Optional[int] = None):
+        self.text = text
+        self.buffer = buffer
+        self.max_lines = max_lines or buffer.max_lines
+        self._lines = 0
+
+    def flush(self):
+        lines, dropped = self.buffer.drain()
+        if not lines:
+            return
+        if dropped or len(lines) > self.max_lines:
+            # Leave room for the marker so it isn't trimmed straight away
+            keep = max(1, self.max_lines - 1)
+            dropped += max(0, len(lines) - keep)
+            lines = lines[-keep:]
+            where = f"; full log in {self.buffer.spill_path}" if self.buffer.spill_path else ""
+            lines.insert(0, f"[log] {dropped} line(s) skipped{where}")
+        at_end = self.text.yview()[1] >= 0.999
+        self.text.insert(tk.END, "\n".join(lines) + "\n")
+        self._lines += len(lines)
+        excess = self._lines - self.max_lines
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+            self._lines -= excess
+        if at_end:
+            self.text.see(tk.END)
+
+    def clear(self):
+        self.buffer.clear()
+        self.text.delete("1.0", tk.END)
+        self._lines = 0
+
+
+class JobTable:
+    """A Treeview with one row per download: title, status, progress, speed and ETA.
+
+    set() and show_event() only record what a row should say; refresh(),
+    called once per frame, writes the rows whose text differs from what is
+    displayed. Progress-only changes to a row are applied at most every
+    `row_interval` seconds, status changes immediately, so hundreds of active
+    rows cost a bounded number of Treeview calls per second.
+    """
+    COLUMNS = ("title", "status", "progress", "speed", "eta")
+
+    def __init__(self, parent: tk.Widget, headings: Dict[str, str], height: int = 10, row_interval: float = 0.25):
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=self.COLUMNS, show="headings", height=height)
+        for column in self.COLUMNS:
+            self.tree.heading(column, text=headings.get(column, column))
+            self.tree.column(column, width=320 if column == "title" else 90, stretch=column == "title", anchor=tk.W if column in ("title", "status") else tk.E)
+        scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.row_interval = row_interval
+        self.updates = 0  # Treeview item() calls made by refresh()
+        self._shown: Dict[str, Tuple[str, ...]] = {}
+        self._wanted: Dict[str, Tuple[str, ...]] = {}
+        self._written: Dict[str, float] = {}
+
+    def add(self, job: str, title: str, status: str):
+        values = (title, status, "", "", "")
+        self.tree.insert("", tk.END, iid=job, values=values)
+        self._shown[job] = self._wanted[job] = values
+        self._written[job] = time.monotonic()
+
+    def set(self, job: str, status: Optional[str] = None, progress: Optional[str] = None, speed: Optional[str] = None, eta: Optional[str] = None):
+        """Records new text for a row; None leaves a column as it is."""
+        current = self._wanted.get(job)
+        if current is None:
+            return
+        updates = (None, status, progress, speed, eta)
+        self._wanted[job] = tuple(old if new is None else new for old, new in zip(current, updates))
+
+    def show_event(self, job: str, event: ProgressEvent, labels: Dict[str, str]):
+        """Records a progress event as row text; labels maps phases to translated status names."""
+        percent = event.percent
+        if event.phase == PHASE_DOWNLOADING:
+            self.set(job, labels.get(event.phase, event.phase), "" if percent is None else f"{percent:.0f}%",
+                     f"{format_bytes(event.speed)}/s" if event.speed else "", format_eta(event.eta) if event.eta is not None else "")
+        elif event.phase in (PHASE_FINISHED, PHASE_POSTPROCESSING, PHASE_POSTPROCESSED):
+            self.set(job, labels.get(event.phase, event.phase), "100%", "", "")
+        else:
+            self.set(job, labels.get(event.phase, event.phase))
+
+    def refresh(self):
+        now = time.monotonic()
+        for job, wanted in self._wanted.items():
+            shown = self._shown[job]
+            if wanted == shown:
+                continue
+            if wanted[1] == shown[1] and now - self._written[job] < self.row_interval:
+                continue
+            self.tree.item(job, values=wanted)
+            self._shown[job] = wanted
+            self._written[job] = now
+            self.updates += 1
+
+    def remove(self, job: str):
+        if self._wanted.pop(job, None) is not None:
+            del self._shown[job], self._written[job]
+            self.tree.delete(job)
+
+    def selection(self) -> List[str]:
+        return list(self.tree.selection())
+
+    def jobs(self) -> List[str]:
+        return list(self._wanted)
+
+
+class HistoryView:
+    """A Treeview of download history that pages in from a HistoryStore as it is scrolled.
+
+    reload() shows the first `page_size` entries matching the filters (the
+    keyword arguments of HistoryStore.query()); scrolling to the bottom loads
+    the next page after the oldest row shown. add() puts a just-finished
+    download on top without asking the store, so a completion costs one row
+    insert however long the history is.
+    """
+    COLUMNS = ("time", "status", "url")
+
+    def __init__(self, parent: tk.Widget, store: HistoryStore, headings: Dict[str, str], height: int = 20, page_size: int = 100):
+        self.store = store
+        self.page_size = page_size
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=self.COLUMNS, show="headings", height=height)
+        for column in self.COLUMNS:
+            self.tree.heading(column, text=headings.get(column, column))
+            self.tree.column(column, width=480 if column == "url" else 140, stretch=column == "url", anchor=tk.W)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.filters: Dict[str, Any] = {}
+        self.queries = 0  # pages fetched from the store
+        self._oldest: Optional[Tuple[str, int]] = None
+        self._exhausted = True
+        self._loading = False
+
+    @staticmethod
+    def _values(entry: Dict[str, Any]) -> Tuple[str, ...]:
+        return ((entry.get("time") or "")[:19].replace("T", " "), entry.get("status") or "", entry.get("url") or "")
+
+    def reload(self, **filters):
+        """Replaces the rows with the first page matching `filters`."""
+        self.filters = {key: value for key, value in filters.items() if value}
+        self.tree.delete(*self.tree.get_children())
+        self._oldest = None
+        self._exhausted = False
+        self.load_more()
+
+    def load_more(self):
+        self._loading = False
+        if self._exhausted:
+            return
+        entries = self.store.query(limit=self.page_size, before=self._oldest, **self.filters)
+        self.queries += 1
+        for entry in entries:
+            self.tree.insert("", tk.END, values=self._values(entry))
+        if entries:
+            self._oldest = (entries[-1]["time"], entries[-1]["id"])
+        self._exhausted = len(entries) < self.page_size
+
+    def _on_scroll(self, first: str, last: str):
+        self.scrollbar.set(first, last)
+        if float(last) >= 1.0 and not self._exhausted and not self._loading:
+            # Not from inside the scroll callback: inserting rows triggers another one
+            self._loading = True
+            self.tree.after_idle(self.load_more)
+
+    def add(self, entry: Dict[str, Any]):
+        """Shows a new entry on top if it passes the current filters."""
+        if entry_matches(entry, **self.filters):
+            self.tree.insert("", 0, values=self._values(entry))
+
+    def clear(self):
+        self.tree.delete(*self.tree.get_children())
+        self._oldest = None
+        self._exhausted = True
@@ -0,0 +1,45 @@
+import threading
+import time
+
+import pytest
+
+from moaz_downloader.downloader import VideoDownloader
+from moaz_downloader.engine import ENGINE_INPROCESS
+from moaz_downloader.progress import DownloadResult
+
+
+class FakeDownloader(VideoDownloader):
+    """Runs the real batch machinery over a download_result that only records its calls.
+
+    `outcomes` maps a URL to the failure classes of its successive attempts
+    (None = success); unknown URLs succeed at once.
+    """
+    def __init__(self, outcomes=None, delay=0.0):
+        super().__init__(engine=ENGINE_INPROCESS)
+        self.outcomes = {url: list(failures) for url, failures in (outcomes or {}).items()}
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self._calls_lock = threading.Lock()
+
+    def download_result(self, url, output_dir, *args, **kwargs):
+        with self._calls_lock:
+            self.calls.append(url)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            failures = self.outcomes.get(url)
+            failure = failures.pop(0) if failures else None
+        try:
+            time.sleep(self.delay)
+        finally:
+            with self._calls_lock:
+                self.running -= 1
+        if failure:
+            return DownloadResult(url, False, failure=failure, error=f"ERROR: {failure}")
+        return DownloadResult(url, True, path=f"{output_dir}/{url.rsplit('/', 1)[-1]}.mp4")
+
+
+@pytest.fixture
+def fake_downloader():
+    return FakeDownloader
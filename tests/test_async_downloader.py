@@ -0,0 +1,51 @@
+import asyncio
+
+from moaz_downloader.async_downloader import AsyncDownloader
+from moaz_downloader.retry import FAILURE_NETWORK
+
+OPTIONS = dict(quality="best", audio_only=False, playlist=False, cookie_file=None)
+
+
+def test_concurrency_is_bounded(fake_downloader, tmp_path):
+    downloader = fake_downloader(delay=0.01)
+    urls = [f"https://a.com/{i}" for i in range(30)]
+    results = asyncio.run(downloader.abatch_download(urls, str(tmp_path), parallel=4, **OPTIONS))
+    assert results == {url: True for url in urls}
+    assert 1 < downloader.max_running <= 4
+
+
+def test_async_url_source_is_pulled_lazily(fake_downloader, tmp_path):
+    downloader = fake_downloader()
+    pulled = []
+
+    async def urls():
+        for i in range(500):
+            pulled.append(i)
+            yield f"https://a.com/{i}"
+
+    async def first_result():
+        runner = AsyncDownloader(downloader, concurrency=2)
+        batch = runner.iter_batch_download(urls(), str(tmp_path), **OPTIONS)
+        try:
+            await batch.__anext__()
+            return len(pulled)
+        finally:
+            await batch.aclose()
+            runner.close()
+
+    # Workers plus the bounded URL queue, not the whole source
+    assert asyncio.run(first_result()) <= 8
+
+
+def test_timeout_counts_as_a_network_failure(fake_downloader, tmp_path):
+    downloader = fake_downloader(delay=0.5)
+
+    async def run():
+        runner = AsyncDownloader(downloader, concurrency=1, timeout=0.05)
+        try:
+            return await runner.download("https://a.com/slow", str(tmp_path), postprocess=False)
+        finally:
+            runner.close()
+
+    result = asyncio.run(run())
+    assert not result.success and result.failure == FAILURE_NETWORK
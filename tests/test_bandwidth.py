@@ -0,0 +1,82 @@
+import datetime
+
+import pytest
+
+from moaz_downloader.bandwidth import BandwidthGovernor, MIN_RATE, parse_rate, parse_schedule
+from moaz_downloader.cli import parse_bandwidth_schedule
+
+KIB = 1024
+
+
+def test_parse_rate():
+    assert parse_rate("500") == 500 * KIB
+    assert parse_rate(1.5) == 1.5 * KIB
+    assert parse_rate("") is None
+    assert parse_rate("0") is None
+    assert parse_rate(None) is None
+
+
+def test_parse_schedule_sorts_by_start_time():
+    assert parse_schedule([("23:00", ""), ("08:00", "500")]) == [(datetime.time(8, 0), 500 * KIB), (datetime.time(23, 0), None)]
+
+
+def test_cli_schedule_parsing():
+    assert parse_bandwidth_schedule("08:00=500, 23:00=") == [("08:00", "500"), ("23:00", "")]
+    for bad in ("08:00", "8h=500", "25:00=500", "08:00=fast", "08:00=-1"):
+        with pytest.raises(ValueError):
+            parse_bandwidth_schedule(bad)
+
+
+def test_limit_is_shared_equally():
+    governor = BandwidthGovernor(1000 * KIB)
+    leases = [governor.acquire() for _ in range(4)]
+    assert [lease.rate for lease in leases] == [250 * KIB] * 4
+    leases[0].release()
+    assert [lease.rate for lease in leases[1:]] == [pytest.approx(1000 * KIB / 3)] * 3
+
+
+def test_capped_lease_leaves_the_rest_to_others():
+    governor = BandwidthGovernor(1000 * KIB)
+    capped = governor.acquire(cap=100 * KIB)
+    other = governor.acquire()
+    assert capped.rate == 100 * KIB
+    assert other.rate == 900 * KIB
+
+
+def test_slow_transfer_hands_unused_budget_over():
+    governor = BandwidthGovernor(1000 * KIB, rebalance_interval=0, headroom=1.25)
+    slow, fast = governor.acquire(), governor.acquire()
+    slow.observe(80 * KIB)
+    assert slow.rate == 100 * KIB
+    assert fast.rate == 900 * KIB
+
+
+def test_fixed_leases_get_a_share_of_a_full_house():
+    governor = BandwidthGovernor(1000 * KIB)
+    governor.expect(4)
+    fixed = governor.acquire(adjustable=False)
+    flexible = governor.acquire()
+    assert fixed.rate == 250 * KIB
+    assert flexible.rate == 750 * KIB
+    governor.set_limit(2000 * KIB)
+    assert fixed.rate == 250 * KIB  # a running subprocess can't be re-rated
+    assert flexible.rate == 1750 * KIB
+
+
+def test_shares_never_drop_below_the_minimum():
+    governor = BandwidthGovernor(MIN_RATE)
+    leases = [governor.acquire() for _ in range(4)]
+    assert all(lease.rate == MIN_RATE for lease in leases)
+
+
+def test_schedule_overrides_the_static_limit():
+    clock = [datetime.datetime(2024, 1, 1, 12, 0)]
+    governor = BandwidthGovernor(1000 * KIB, now=lambda: clock[0])
+    governor.set_schedule(parse_schedule([("08:00", "500"), ("23:00", "")]))
+    assert governor.current_limit() == 500 * KIB
+    clock[0] = datetime.datetime(2024, 1, 1, 23, 30)
+    assert governor.current_limit() is None
+    clock[0] = datetime.datetime(2024, 1, 2, 6, 0)
+    assert governor.current_limit() is None  # still the previous evening's entry
+    lease = governor.acquire(cap=300 * KIB)
+    assert lease.rate == 300 * KIB
@@ -0,0 +1,64 @@
+from moaz_downloader.jobs import JobStore, JOB_DONE, JOB_FAILED
+from moaz_downloader.retry import RetryPolicy, FAILURE_NETWORK, FAILURE_NOT_FOUND
+from moaz_downloader.utils import iter_urls
+
+OPTIONS = dict(quality="best", audio_only=False, playlist=False, cookie_file=None)
+
+
+def test_iter_urls_skips_comments_and_reports_invalid_lines():
+    invalid = []
+    lines = ["# batch\n", "https://a.com/1\n", "\n", "not a url\n", "  https://b.com/2  \n"]
+    assert list(iter_urls(lines, lambda number, line: invalid.append((number, line)))) == ["https://a.com/1", "https://b.com/2"]
+    assert invalid == [(4, "not a url")]
+
+
+def test_batch_pulls_urls_only_as_workers_free_up(fake_downloader, tmp_path):
+    downloader = fake_downloader()
+    pulled = []
+
+    def urls():
+        for i in range(1000):
+            pulled.append(i)
+            yield f"https://a.com/{i}"
+
+    results = downloader.iter_batch_download(urls(), str(tmp_path), parallel=2, **OPTIONS)
+    next(results)
+    # Two workers keep a window of four submissions plus a small scheduler buffer
+    assert len(pulled) <= 10
+    assert sum(1 for _ in results) == 999
+    assert sorted(downloader.calls) == sorted(f"https://a.com/{i}" for i in range(1000))
+
+
+def test_parallel_bounds_concurrent_downloads(fake_downloader, tmp_path):
+    downloader = fake_downloader(delay=0.01)
+    urls = [f"https://host{i % 5}.com/{i}" for i in range(40)]
+    assert all(result.success for result in downloader.iter_batch_download(urls, str(tmp_path), parallel=3, **OPTIONS))
+    assert downloader.max_running <= 3
+
+
+def test_per_host_limit(fake_downloader, tmp_path):
+    downloader = fake_downloader(delay=0.01)
+    urls = [f"https://a.com/{i}" for i in range(12)]
+    list(downloader.iter_batch_download(urls, str(tmp_path), parallel=4, per_host_limit=1, **OPTIONS))
+    assert downloader.max_running == 1
+
+
+def test_transient_failures_are_retried(fake_downloader, tmp_path):
+    downloader = fake_downloader({"https://a.com/flaky": [FAILURE_NETWORK, FAILURE_NETWORK], "https://a.com/gone": [FAILURE_NOT_FOUND]})
+    policy = RetryPolicy(max_attempts=3, base_delay=0.0)
+    results = {result.url: result for result in downloader.iter_batch_download(
+        ["https://a.com/flaky", "https://a.com/gone"], str(tmp_path), parallel=2, retry_policy=policy, **OPTIONS)}
+    assert results["https://a.com/flaky"].success and results["https://a.com/flaky"].attempts == 3
+    assert not results["https://a.com/gone"].success and results["https://a.com/gone"].attempts == 1
+
+
+def test_download_jobs_records_outcomes(fake_downloader, tmp_path):
+    downloader = fake_downloader({"https://a.com/gone": [FAILURE_NOT_FOUND]})
+    with JobStore(tmp_path / "jobs.db") as store:
+        store.enqueue(["https://a.com/1", "https://a.com/gone", "https://b.com/2"])
+        results = list(downloader.download_jobs(store, str(tmp_path), parallel=2, **OPTIONS))
+        assert len(results) == 3
+        assert store.counts()[JOB_DONE] == 2 and store.counts()[JOB_FAILED] == 1
+        assert store.failure_counts() == {FAILURE_NOT_FOUND: 1}
+        # A rerun has nothing left to do
+        assert list(downloader.download_jobs(store, str(tmp_path), parallel=2, **OPTIONS)) == []
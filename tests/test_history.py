@@ -0,0 +1,64 @@
+from moaz_downloader.history import HistoryStore
+
+
+def make_store(tmp_path, entries):
+    store = HistoryStore(tmp_path / "history.db")
+    store.add_many(entries)
+    return store
+
+
+def test_keyset_pages_cover_every_entry_once(tmp_path):
+    # Several entries share a timestamp, so paging has to fall back to the id
+    entries = [{"time": f"2024-01-01T00:00:{i // 3:02d}", "url": f"https://a/{i}", "status": "Success"} for i in range(10)]
+    store = make_store(tmp_path, entries)
+    try:
+        pages, before = [], None
+        while True:
+            page = store.query(limit=4, before=before)
+            if not page:
+                break
+            pages.append([entry["url"] for entry in page])
+            before = (page[-1]["time"], page[-1]["id"])
+        assert [len(page) for page in pages] == [4, 4, 2]
+        seen = [url for page in pages for url in page]
+        assert sorted(seen) == sorted(entry["url"] for entry in entries)
+        assert seen[0] == "https://a/9"
+    finally:
+        store.close()
+
+
+def test_keyset_page_is_not_shifted_by_new_entries(tmp_path):
+    store = make_store(tmp_path, [{"time": f"2024-01-01T00:00:0{i}", "url": f"https://a/{i}"} for i in range(6)])
+    try:
+        first = store.query(limit=3)
+        store.add({"time": "2024-01-02T00:00:00", "url": "https://a/new"})
+        second = store.query(limit=3, before=(first[-1]["time"], first[-1]["id"]))
+        assert [entry["url"] for entry in second] == ["https://a/2", "https://a/1", "https://a/0"]
+    finally:
+        store.close()
+
+
+def test_search_treats_like_wildcards_literally(tmp_path):
+    store = make_store(tmp_path, [
+        {"url": "https://a/100%_done", "path": "/out/a.mp4"},
+        {"url": "https://a/100xydone", "path": "/out/b.mp4"},
+        {"url": "https://a/back\\slash", "path": "/out/c.mp4"},
+    ])
+    try:
+        assert [entry["url"] for entry in store.query(search="100%_")] == ["https://a/100%_done"]
+        assert store.count(search="%") == 1
+        assert store.count(search="_") == 1
+        assert store.count(search="\\") == 1
+        assert store.count(search="b.mp4") == 1
+    finally:
+        store.close()
+
+
+def test_queued_entries_are_visible_to_queries(tmp_path):
+    store = HistoryStore(tmp_path / "history.db", flush_interval=60)
+    try:
+        store.add({"url": "https://a/1", "status": "Success", "format": "mp4"})
+        entries = store.query(status="Success")
+        assert len(entries) == 1 and entries[0]["format"] == "mp4"
+    finally:
+        store.close()
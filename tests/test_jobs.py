@@ -0,0 +1,58 @@
+import os
+
+from moaz_downloader.jobs import JobStore, JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED
+
+
+def test_enqueue_skips_known_urls(tmp_path):
+    with JobStore(tmp_path / "jobs.db") as store:
+        assert store.enqueue(["https://a/1", "https://a/2", "https://a/1"], chunk_size=1) == 2
+        assert store.enqueue(["https://a/2", "https://a/3"]) == 1
+        assert store.counts()[JOB_QUEUED] == 3
+
+
+def test_claim_marks_jobs_running_in_order(tmp_path):
+    with JobStore(tmp_path / "jobs.db") as store:
+        store.enqueue(f"https://a/{i}" for i in range(5))
+        assert [url for _, url in store.claim(2)] == ["https://a/0", "https://a/1"]
+        assert [url for _, url in store.claim(10)] == ["https://a/2", "https://a/3", "https://a/4"]
+        assert store.claim(10) == []
+        assert store.counts()[JOB_RUNNING] == 5
+
+
+def test_finished_jobs_are_not_claimed_again(tmp_path):
+    with JobStore(tmp_path / "jobs.db") as store:
+        store.enqueue(["https://a/1", "https://a/2"])
+        (first, _), (second, _) = store.claim(2)
+        store.mark_done(first, "/out/1.mp4")
+        store.mark_failed(second, "HTTP Error 404", failure="not_found")
+        assert store.counts() == {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_DONE: 1, JOB_FAILED: 1}
+        assert store.failure_counts() == {"not_found": 1}
+        assert store.requeue_failed() == 1
+        assert [url for _, url in store.claim(10)] == ["https://a/2"]
+
+
+def test_recover_requeues_jobs_of_a_dead_process(tmp_path):
+    path = tmp_path / "jobs.db"
+    store = JobStore(path)
+    store.enqueue(["https://a/1", "https://a/2", "https://a/3"])
+    job_id, _ = store.claim(1)[0]
+    store.mark_done(job_id)
+    store.claim(1)
+    store.close()  # the process "dies" with https://a/2 still running
+
+    with JobStore(path) as store:
+        assert store.recover() == 1
+        assert [url for _, url in store.iter_claimed(chunk_size=1)] == ["https://a/2", "https://a/3"]
+
+
+def test_enqueue_file_ingests_each_file_version_once(tmp_path):
+    batch = tmp_path / "urls.txt"
+    batch.write_text("https://a/1\n")
+    with JobStore.for_batch_file(batch) as store:
+        assert store.path == tmp_path / "urls.txt.jobs.db"
+        assert store.enqueue_file(batch, ["https://a/1"]) == 1
+        assert store.enqueue_file(batch, ["https://a/1"]) == 0
+
+        batch.write_text("https://a/1\nhttps://a/2\n")
+        os.utime(batch, ns=(0, os.stat(batch).st_mtime_ns + 1_000_000))
+        assert store.enqueue_file(batch, ["https://a/1", "https://a/2"]) == 1
@@ -0,0 +1,50 @@
+import pytest
+
+from moaz_downloader.retry import (
+    RetryPolicy, classify_failure, FAILURE_NETWORK, FAILURE_RATE_LIMITED, FAILURE_FORBIDDEN, FAILURE_GEO_BLOCKED,
+    FAILURE_EXTRACTOR, FAILURE_NOT_FOUND, FAILURE_CLIENT_ERROR, FAILURE_DISK_FULL, FAILURE_UNKNOWN,
+)
+
+
+@pytest.mark.parametrize("line, failure", [
+    ("ERROR: Unable to download webpage: HTTP Error 429: Too Many Requests", FAILURE_RATE_LIMITED),
+    ("ERROR: unable to download video data: HTTP Error 403: Forbidden", FAILURE_FORBIDDEN),
+    ("ERROR: Unable to download webpage: HTTP Error 404: Not Found", FAILURE_NOT_FOUND),
+    ("ERROR: HTTP Error 410: Gone", FAILURE_NOT_FOUND),
+    ("ERROR: Unable to download webpage: HTTP Error 401: Unauthorized", FAILURE_CLIENT_ERROR),
+    ("ERROR: Unable to download webpage: HTTP Error 503: Service Unavailable", FAILURE_NETWORK),
+    ("ERROR: <urlopen error [Errno 111] Connection refused>", FAILURE_NETWORK),
+    ("ERROR: The uploader has not made this video available in your country", FAILURE_GEO_BLOCKED),
+    ("ERROR: [Errno 28] No space left on device", FAILURE_DISK_FULL),
+    ("ERROR: Unsupported URL: https://example.com/", FAILURE_EXTRACTOR),
+    ("ERROR: something nobody anticipated", FAILURE_UNKNOWN),
+])
+def test_classify_failure(line, failure):
+    assert classify_failure(["[download] 10%", line]) == failure
+
+
+def test_specific_causes_win_over_network_wording():
+    # yt-dlp wraps most HTTP errors in "Unable to download ...", which alone means a network failure
+    assert classify_failure(["ERROR: Unable to download video data: HTTP Error 403: Forbidden"]) == FAILURE_FORBIDDEN
+    assert classify_failure(["ERROR: Unable to download video data: [Errno 28] No space left on device"]) == FAILURE_DISK_FULL
+
+
+def test_only_transient_failures_are_retried():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry(FAILURE_NETWORK, 1)
+    assert policy.should_retry(FAILURE_RATE_LIMITED, 2)
+    assert not policy.should_retry(FAILURE_NETWORK, 3)
+    assert not policy.should_retry(FAILURE_NOT_FOUND, 1)
+    assert not policy.should_retry(FAILURE_EXTRACTOR, 1)
+    assert not policy.should_retry(None, 1)
+
+
+def test_delay_grows_exponentially_and_is_capped():
+    policy = RetryPolicy(base_delay=2.0, max_delay=10.0, jitter=0.0)
+    assert [policy.delay(FAILURE_NETWORK, attempt) for attempt in (1, 2, 3, 4)] == [2.0, 4.0, 8.0, 10.0]
+    assert policy.delay(FAILURE_RATE_LIMITED, 1) == 8.0
+
+
+def test_delay_jitter_stays_in_bounds():
+    policy = RetryPolicy(base_delay=4.0, jitter=0.5)
+    assert all(2.0 <= policy.delay(FAILURE_NETWORK, 1) <= 6.0 for _ in range(100))
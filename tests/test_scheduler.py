@@ -0,0 +1,76 @@
+from moaz_downloader.scheduler import HostScheduler, NOTHING_READY, host_of
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def drain_ready(scheduler):
+    started = []
+    while True:
+        item, _ = scheduler.poll()
+        if item is NOTHING_READY:
+            return started
+        started.append(item)
+
+
+def test_host_of_ignores_www_and_case():
+    assert host_of("https://WWW.Example.com/a") == host_of("http://example.com:80/b") == "example.com"
+
+
+def test_per_host_limit_keeps_other_hosts_going():
+    urls = ["https://a.com/1", "https://a.com/2", "https://a.com/3", "https://b.com/1"]
+    scheduler = HostScheduler(urls, max_per_host=2)
+    assert drain_ready(scheduler) == ["https://a.com/1", "https://b.com/1", "https://a.com/2"]
+    assert scheduler.poll() == (NOTHING_READY, None)
+
+    scheduler.release("https://a.com/1")
+    assert drain_ready(scheduler) == ["https://a.com/3"]
+    assert scheduler.drained()
+
+
+def test_no_per_host_limit():
+    urls = [f"https://a.com/{i}" for i in range(5)]
+    assert drain_ready(HostScheduler(urls, max_per_host=None)) == urls
+
+
+def test_min_interval_spaces_starts_per_host():
+    clock = FakeClock()
+    scheduler = HostScheduler(["https://a.com/1", "https://a.com/2", "https://b.com/1"], max_per_host=None, min_interval=5.0, clock=clock)
+    assert drain_ready(scheduler) == ["https://a.com/1", "https://b.com/1"]
+    assert scheduler.poll() == (NOTHING_READY, 5.0)
+    clock.now = 4.0
+    assert scheduler.poll() == (NOTHING_READY, 1.0)
+    clock.now = 5.0
+    assert drain_ready(scheduler) == ["https://a.com/2"]
+
+
+def test_requeue_with_delay_waits_in_the_scheduler():
+    clock = FakeClock()
+    scheduler = HostScheduler(["https://a.com/1"], max_per_host=1, clock=clock)
+    item, _ = scheduler.poll()
+    scheduler.release(item)
+    scheduler.requeue(item, delay=30.0)
+    assert not scheduler.drained()
+    assert scheduler.poll() == (NOTHING_READY, 30.0)
+    clock.now = 30.0
+    assert scheduler.poll() == ("https://a.com/1", None)
+    scheduler.release(item)
+    assert scheduler.drained()
+
+
+def test_lookahead_pulls_the_source_lazily():
+    pulled = []
+
+    def source():
+        for i in range(100):
+            pulled.append(i)
+            yield f"https://a.com/{i}"
+
+    scheduler = HostScheduler(source(), max_per_host=1, lookahead=3)
+    scheduler.poll()
+    assert len(pulled) == 3
@@ -0,0 +1,106 @@
+import hashlib
+import http.server
+import os
+import re
+import threading
+import time
+
+import pytest
+
+from moaz_downloader.segmented import RemoteFile, SegmentManifest, SegmentedDownloader, SegmentedDownloadCancelled, is_direct_media_url
+
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    """Serves `data` at any path, honouring Range requests."""
+    protocol_version = "HTTP/1.1"
+    data = b""
+    etag = '"v1"'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        size = len(self.data)
+        match = _RANGE.match(self.headers.get("Range", ""))
+        start, end = 0, size - 1
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else size - 1, size - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+        self.wfile.write(self.data[start:end + 1])
+
+
+@pytest.fixture
+def server():
+    RangeHandler.data = os.urandom(3 * 1024 * 1024 + 123)
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_is_direct_media_url():
+    assert is_direct_media_url("https://cdn.example.com/video/clip.MP4?token=1")
+    assert not is_direct_media_url("https://www.youtube.com/watch?v=abc")
+    assert not is_direct_media_url("ftp://example.com/clip.mp4")
+
+
+def test_manifest_merges_ranges_and_lists_missing_pieces(tmp_path):
+    manifest = SegmentManifest(str(tmp_path / "a.part.json"), "https://a/a.mp4", 100)
+    manifest.add(10, 19)
+    manifest.add(20, 29)
+    manifest.add(50, 59)
+    assert manifest.completed == [[10, 29], [50, 59]]
+    assert manifest.completed_bytes == 30
+    assert manifest.missing(16) == [(0, 9), (30, 45), (46, 49), (60, 75), (76, 91), (92, 99)]
+
+
+def test_manifest_round_trips_and_rejects_a_changed_file(tmp_path):
+    path = str(tmp_path / "a.part.json")
+    SegmentManifest(path, "https://a/a.mp4", 100, etag='"v1"').add(0, 49)
+    manifest = SegmentManifest.load(path)
+    assert manifest.completed == [[0, 49]]
+    assert manifest.matches(RemoteFile("https://a/a.mp4", 100, True, "a.mp4", etag='"v1"'))
+    assert not manifest.matches(RemoteFile("https://a/a.mp4", 100, True, "a.mp4", etag='"v2"'))
+    assert not manifest.matches(RemoteFile("https://a/a.mp4", 101, True, "a.mp4", etag='"v1"'))
+
+
+def test_manifest_load_ignores_a_damaged_file(tmp_path):
+    path = tmp_path / "a.part.json"
+    path.write_text("{not json")
+    assert SegmentManifest.load(str(path)) is None
+
+
+def test_segmented_download_matches_the_served_file(server, tmp_path):
+    downloader = SegmentedDownloader(connections=4, segment_size=256 * 1024)
+    result = downloader.download(f"{server}/clip.mp4", str(tmp_path))
+    assert result.path == str(tmp_path / "clip.mp4")
+    assert open(result.path, "rb").read() == RangeHandler.data
+    assert os.listdir(tmp_path) == ["clip.mp4"]
+    assert downloader.session.stats().connections_reused > 0
+
+
+def test_cancelled_download_resumes_from_its_manifest(server, tmp_path):
+    downloader = SegmentedDownloader(connections=2, segment_size=64 * 1024)
+    url = f"{server}/clip.mp4"
+    # Slowed down so the first progress report (and the cancel) lands mid-transfer
+    with pytest.raises(SegmentedDownloadCancelled):
+        downloader.download(url, str(tmp_path), lambda event: False, throttle=lambda count: time.sleep(0.02))
+    assert sorted(os.listdir(tmp_path)) == ["clip.mp4.part", "clip.mp4.part.json"]
+    saved = SegmentManifest.load(str(tmp_path / "clip.mp4.part.json")).completed_bytes
+    assert 0 < saved < len(RangeHandler.data)
+
+    result = downloader.download(url, str(tmp_path))
+    assert result.resumed_bytes == saved
+    assert hashlib.sha256(open(result.path, "rb").read()).digest() == hashlib.sha256(RangeHandler.data).digest()
+    assert os.listdir(tmp_path) == ["clip.mp4"]